@@ -11,6 +11,7 @@ from app.config import config
 from app.core.extensions import db, login_manager, jwt, migrate, cors, init_extensions, scheduler, mail
 from app.core.errors import register_error_handlers
 from app.core.middleware import log_request, handle_cors, validate_request
+from app.core.uploads import SpooledRequest
 from app.routes import main_bp, auth_bp
 from app.routes.reports import reports_bp
 from app.routes.notifications import notifications_bp
@@ -18,18 +19,25 @@ from app.routes.activities import activities_bp
 from app.api.v1 import api_bp
 from app.tasks.cleanup import cleanup_expired_items, cleanup_unverified_accounts
 from app.services.notification_service import NotificationService
-from datetime import datetime
+from datetime import datetime, timedelta
 
-def create_app(config_name=None):
-    """Create and configure the Flask application."""
+def create_app(config_name=None, **overrides):
+    """Create and configure the Flask application.
+
+    Keyword arguments override settings of the selected configuration.
+    """
     app = Flask(__name__)
     
+    # Spool large uploads to disk so they can be read without copying
+    app.request_class = SpooledRequest
+    
     # Determine which configuration to use
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
     
     # Load config
     app.config.from_object(config[config_name])
+    app.config.update(overrides)
     
     # Configure logging
     if not app.debug and not app.testing:
@@ -55,6 +63,30 @@ def create_app(config_name=None):
     # Initialize extensions
     init_extensions(app)
     
+    # Initialize outbound email queue
+    from app.services.email_queue import email_queue
+    email_queue.init_app(app)
+    
+    # Compile email templates once per worker
+    from app.services.email_templates import email_templates
+    email_templates.init_app(app)
+    
+    # Size limits for cached shared report pages
+    from app.services.public_report_cache import public_report_cache
+    public_report_cache.init_app(app)
+    
+    # Content-addressed OCR results for rescanned labels
+    from app.services.ocr_cache import ocr_cache
+    ocr_cache.init_app(app)
+    
+    # Worker pools for batch OCR requests
+    from app.services.ocr_batch import ocr_batch
+    ocr_batch.init_app(app)
+    
+    # Background workers for asynchronous OCR jobs
+    from app.services.ocr_jobs import ocr_jobs
+    ocr_jobs.init_app(app)
+    
     # Only initialize scheduler if not in testing mode
     if not app.config.get('TESTING', False):
         app.logger.info("Checking scheduler initialization conditions...")
@@ -68,7 +100,9 @@ def create_app(config_name=None):
             from app.tasks.scheduler_tasks import (
                 cleanup_expired_task,
                 cleanup_unverified_task,
-                send_daily_notifications_task
+                send_daily_notifications_task,
+                generate_nightly_reports_task,
+                resume_daily_notifications_task
             )
             
             # Add jobs with proper configuration
@@ -123,6 +157,36 @@ def create_app(config_name=None):
             except Exception as e:
                 app.logger.warning(f"Failed to add send_daily_notifications job: {str(e)}")
             
+            try:
+                scheduler.add_job(
+                    id='generate_nightly_reports',
+                    func=generate_nightly_reports_task,
+                    trigger='cron',
+                    hour=1,  # After the expiry status rollover
+                    minute=30,
+                    timezone='Europe/London',
+                    misfire_grace_time=60,  # Allow job to run up to 12 hours late
+                    coalesce=True,  # Run missed jobs only once on startup
+                    max_instances=1,  # Allow only one instance to run at a time
+                    replace_existing=True  # Replace existing job if it exists
+                )
+                app.logger.info("Added generate_nightly_reports job")
+            except Exception as e:
+                app.logger.warning(f"Failed to add generate_nightly_reports job: {str(e)}")
+            
+            try:
+                # Pick up today's notification run from its checkpoints if a crash interrupted it
+                scheduler.add_job(
+                    id='resume_daily_notifications',
+                    func=resume_daily_notifications_task,
+                    trigger='date',
+                    run_date=datetime.now() + timedelta(seconds=30),
+                    replace_existing=True
+                )
+                app.logger.info("Added resume_daily_notifications job")
+            except Exception as e:
+                app.logger.warning(f"Failed to add resume_daily_notifications job: {str(e)}")
+            
             # Log all scheduled jobs
             all_jobs = scheduler.get_jobs()
             app.logger.info("All scheduled jobs:")
@@ -1,47 +1,45 @@
-from flask import request, jsonify
+import json
+from flask import Response, request, jsonify, stream_with_context, url_for
 from app.core.extensions import csrf
+from app.core.uploads import upload_buffer
 from app.services.date_ocr_service import DateOCRService
+from app.services.ocr_batch import BatchImage, ocr_batch
+from app.services.ocr_jobs import ocr_jobs
 from app.api.v1.blueprint import api_bp
-import os
 
 ocr_service = DateOCRService()
 
 @api_bp.route('/date_ocr/test', methods=['GET'])
 @csrf.exempt
 def test_connection():
-    """Test endpoint to verify Azure connection."""
+    """Test endpoint to verify the configured OCR backend."""
     try:
-        # Test if credentials are loaded
-        if not os.getenv('AZURE_VISION_KEY') or not os.getenv('AZURE_VISION_ENDPOINT'):
+        backend = ocr_service.backend
+        if not backend.available:
             return jsonify({
                 'status': 'error',
-                'message': 'Azure credentials not found in environment variables'
+                'backend': backend.name,
+                'message': f"OCR backend '{backend.name}' is not configured"
             }), 500
 
-        # Test Azure connection by making a simple OCR call
-        test_image = b'fake_image_data'  # This will fail but will test the connection
         try:
-            if ocr_service.vision_client is None:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Azure Computer Vision client not initialized'
-                }), 500
-                
-            ocr_service.vision_client.recognize_printed_text_in_stream(image=test_image)
+            backend.check()
             return jsonify({
                 'status': 'success',
-                'message': 'Azure connection successful'
+                'backend': backend.name,
+                'message': f"OCR backend '{backend.name}' connection successful"
             })
         except Exception as e:
             return jsonify({
                 'status': 'error',
-                'message': f'Azure connection test failed: {str(e)}'
+                'backend': backend.name,
+                'message': f'OCR backend connection test failed: {str(e)}'
             }), 500
 
     except Exception as e:
         return jsonify({
             'status': 'error',
-            'message': f'Error testing Azure connection: {str(e)}'
+            'message': f'Error testing OCR backend: {str(e)}'
         }), 500
 
 @api_bp.route('/date_ocr/extract', methods=['POST'])
@@ -62,7 +60,106 @@ def extract_date():
                 'message': 'No image file selected'
             }), 400
 
-        # Read image data
+        # Read the upload in place: in memory when small, memory-mapped once spooled to disk
+        with upload_buffer(image_file) as image_data:
+            if not image_data:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Empty image file'
+                }), 400
+
+            # Check if the OCR backend is available
+            if not ocr_service.backend.available:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"OCR service not available. Please check the '{ocr_service.backend.name}' backend configuration."
+                }), 503
+
+            # Extract date with the configured OCR backend; rescans are served from the cache
+            result = ocr_service.extract(image_data)
+        
+        if result.date:
+            return jsonify({
+                'status': 'success',
+                'date': result.date,
+                'cached': result.cache is not None
+            })
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'No date found in image',
+                'cached': result.cache is not None
+            }), 404
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error processing image: {str(e)}'
+        }), 500
+
+@api_bp.route('/date_ocr/batch', methods=['POST'])
+@csrf.exempt
+def extract_dates_batch():
+    """Extract dates from many uploaded images, streaming one NDJSON line per image as it completes."""
+    try:
+        files = [image_file for image_file in request.files.getlist('images') if image_file.filename]
+        if not files:
+            return jsonify({
+                'status': 'error',
+                'message': 'No image files provided'
+            }), 400
+
+        if len(files) > ocr_batch.max_images:
+            return jsonify({
+                'status': 'error',
+                'message': f'At most {ocr_batch.max_images} images can be sent in one batch'
+            }), 400
+
+        # Check if the OCR backend is available
+        if not ocr_service.backend.available:
+            return jsonify({
+                'status': 'error',
+                'message': f"OCR service not available. Please check the '{ocr_service.backend.name}' backend configuration."
+            }), 503
+
+        images = [BatchImage(index, image_file.filename, image_file.read()) for index, image_file in enumerate(files)]
+        results = ocr_batch.run(ocr_service, images)
+        return Response(
+            stream_with_context(json.dumps(result) + '\n' for result in results),
+            mimetype='application/x-ndjson'
+        )
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error processing images: {str(e)}'
+        }), 500
+
+@api_bp.route('/date_ocr/jobs', methods=['POST'])
+@csrf.exempt
+def submit_ocr_job():
+    """Queue an uploaded image for date extraction and return the job id at once."""
+    try:
+        if not ocr_jobs.enabled:
+            return jsonify({
+                'status': 'error',
+                'message': 'Asynchronous OCR jobs are not enabled'
+            }), 503
+
+        if 'image' not in request.files:
+            return jsonify({
+                'status': 'error',
+                'message': 'No image file provided'
+            }), 400
+
+        image_file = request.files['image']
+        if not image_file.filename:
+            return jsonify({
+                'status': 'error',
+                'message': 'No image file selected'
+            }), 400
+
+        # The upload is gone once this request ends, so the job keeps its own copy
         image_data = image_file.read()
         if not image_data:
             return jsonify({
@@ -70,29 +167,61 @@ def extract_date():
                 'message': 'Empty image file'
             }), 400
 
-        # Check if Azure service is available
-        if ocr_service.vision_client is None:
+        # Check if the OCR backend is available
+        if not ocr_service.backend.available:
             return jsonify({
                 'status': 'error',
-                'message': 'OCR service not available. Please check Azure credentials.'
+                'message': f"OCR service not available. Please check the '{ocr_service.backend.name}' backend configuration."
             }), 503
 
-        # Extract date using Azure OCR
-        date = ocr_service.extract_date(image_data)
-        
-        if date:
-            return jsonify({
-                'status': 'success',
-                'date': date
+        try:
+            job = ocr_jobs.submit(image_data, image_file.filename)
+        except RuntimeError as e:
+            response = jsonify({
+                'status': 'error',
+                'message': str(e)
             })
-        else:
+            response.headers['Retry-After'] = '5'
+            return response, 503
+
+        poll_url = url_for('api.get_ocr_job', job_id=job.token)
+        response = jsonify({
+            'status': 'success',
+            'job': job.to_dict(),
+            'poll_url': poll_url
+        })
+        response.headers['Location'] = poll_url
+        return response, 202
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error queueing image: {str(e)}'
+        }), 500
+
+@api_bp.route('/date_ocr/jobs/<job_id>', methods=['GET'])
+@csrf.exempt
+def get_ocr_job(job_id):
+    """Return the state of an OCR job, waiting up to ?wait= seconds for it to finish."""
+    try:
+        wait = max(0.0, request.args.get('wait', 0, type=float))
+        job = ocr_jobs.wait(job_id, wait) if wait else ocr_jobs.get(job_id)
+        if job is None:
             return jsonify({
                 'status': 'error',
-                'message': 'No date found in image'
+                'message': 'OCR job not found'
             }), 404
 
+        response = jsonify({
+            'status': 'success',
+            'job': job.to_dict()
+        })
+        if not job.finished:
+            response.headers['Retry-After'] = '1'
+        return response
+
     except Exception as e:
         return jsonify({
             'status': 'error',
-            'message': f'Error processing image: {str(e)}'
-        }), 500 
\ No newline at end of file
+            'message': f'Error reading OCR job: {str(e)}'
+        }), 500
@@ -194,6 +194,18 @@ def get_item(item_id):
         current_app.logger.error(f"Error getting item: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/items/riskiest', methods=['GET'])
+@login_required
+def get_riskiest_items():
+    """Get the current user's highest-risk items from the stored risk scores."""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        items = Item.riskiest(current_user.id, limit)
+        return jsonify({'items': [item.to_dict() for item in items]})
+    except Exception as e:
+        current_app.logger.error(f"Error getting riskiest items: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/items/<int:item_id>', methods=['DELETE'])
 @login_required
 def delete_item(item_id):
@@ -356,7 +368,7 @@ def filter_items():
         
         # Apply sorting
         valid_sort_fields = {
-            'name', 'quantity', 'cost_price', 'selling_price', 'status', 'expiry_date'
+            'name', 'quantity', 'cost_price', 'selling_price', 'status', 'expiry_date', 'risk_score'
         }
         if sort_by not in valid_sort_fields:
             sort_by = 'expiry_date'
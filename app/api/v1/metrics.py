@@ -0,0 +1,18 @@
+from flask import jsonify, request, current_app
+from flask_login import login_required, current_user
+from app.api.v1.blueprint import api_bp
+from app.core.metrics import metrics
+
+@api_bp.route('/metrics', methods=['GET'])
+@login_required
+def get_metrics():
+    """Get in-process service metrics (admin only)."""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        prefix = request.args.get('prefix')
+        return jsonify(metrics.snapshot(prefix))
+    except Exception as e:
+        current_app.logger.error(f"API: get_metrics error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
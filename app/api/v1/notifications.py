@@ -35,10 +35,8 @@ def get_notifications():
         else:  # 'all'
             notifications, total_count = notification_service.get_user_notifications_all_paginated(current_user.id, page, per_page, search=search if search else None, search_mode=search_mode)
         
-        # Get total counts for stats
-        total_sent = notification_service.get_notification_count(current_user.id, 'sent')
-        total_pending = notification_service.get_notification_count(current_user.id, 'pending')
-        total_all = total_sent + total_pending
+        # Get total counts for stats (one aggregate, or a cached counter row)
+        stats = notification_service.get_notification_stats(current_user.id)
         
         # Calculate pagination info
         total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
@@ -51,9 +49,9 @@ def get_notifications():
         return jsonify({
             'notifications': result,
             'stats': {
-                'total_sent': total_sent,
-                'total_pending': total_pending,
-                'total_all': total_all
+                'total_sent': stats['sent'],
+                'total_pending': stats['pending'],
+                'total_all': stats['total']
             },
             'pagination': {
                 'current_page': page,
@@ -68,6 +66,16 @@ def get_notifications():
         current_app.logger.error(f"API: get_notifications error - {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/notifications/unread-count', methods=['GET'])
+@login_required
+def get_unread_notification_count():
+    """Get the unread notification count for the notification badge."""
+    try:
+        return jsonify({'unread': NotificationService().get_unread_count(current_user.id)})
+    except Exception as e:
+        current_app.logger.error(f"API: get_unread_notification_count error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/notifications/<int:notification_id>/read', methods=['PUT'])
 @login_required
 def mark_notification_read(notification_id):
@@ -94,11 +102,7 @@ def mark_all_notifications_read():
     """Mark all notifications as read."""
     try:
         # Update all pending notifications to sent status
-        Notification.query.filter_by(
-            user_id=current_user.id,
-            status='pending'
-        ).update({'status': 'sent'})
-        db.session.commit()
+        NotificationService().mark_all_notifications_read(current_user.id)
         return jsonify({'message': 'All notifications marked as read'})
     except Exception as e:
         db.session.rollback()
@@ -179,7 +183,8 @@ def test_notifications():
                         'name': test_item.name,
                         'days_until_expiry': 1,
                         'expiry_date': test_item.expiry_date
-                    }]
+                    }],
+                    force=True
                 )
             
             if success:
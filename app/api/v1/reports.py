@@ -1,8 +1,9 @@
-from flask import jsonify, request
+from flask import Response, jsonify, request, stream_with_context, url_for
 from flask_login import login_required, current_user
 from app.api.v1.blueprint import api_bp
 from app.core.extensions import db
 from app.services.report_service import ReportService
+from app.services.report_export import ReportExporter, EXPORT_FORMATS
 from app.models.report import Report
 from datetime import datetime, timedelta
 from flask import current_app
@@ -53,7 +54,8 @@ def get_reports():
         # Calculate pagination info
         total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
         
-        result = [report.to_dict() for report in reports]
+        # Detail data is only returned by GET /reports/<id>
+        result = [report.to_summary_dict() for report in reports]
         
         return jsonify({
             'reports': result,
@@ -93,6 +95,34 @@ def generate_report():
         current_app.logger.error(f"API: generate_report error - {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/reports/trends', methods=['GET'])
+@login_required
+def get_report_trends():
+    """Get the user's report metrics over a date range."""
+    try:
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=90)
+        if request.args.get('start_date'):
+            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
+        if request.args.get('end_date'):
+            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        resolution = request.args.get('resolution', 'day')
+        fields = [field for field in request.args.get('metrics', '').split(',') if field] or None
+        
+        series = report_service.history_service.get_series(current_user.id, start_date, end_date, resolution, fields)
+        return jsonify({
+            'resolution': resolution,
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'series': series
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"API: get_report_trends error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/reports/<int:report_id>', methods=['GET'])
 @login_required
 def get_report(report_id):
@@ -112,6 +142,76 @@ def get_report(report_id):
         current_app.logger.error(f"API: get_report error - {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/reports/<int:report_id>/export', methods=['GET'])
+@login_required
+def export_report(report_id):
+    """Stream a report's per-item section as CSV, XLSX or Parquet."""
+    try:
+        export_format = request.args.get('format', 'csv')
+        section = request.args.get('section', 'all_items')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        report = Report.query.filter_by(id=report_id, user_id=current_user.id).first()
+        if not report:
+            return jsonify({'error': 'Report not found'}), 404
+        
+        exporter = ReportExporter(report, section, current_app.config.get('REPORT_EXPORT_CHUNK_SIZE', 2000))
+        stream = exporter.stream(export_format)
+        current_version = report_service.get_inventory_versions([current_user.id])[current_user.id]
+        
+        current_app.logger.info(f"API: export_report - streaming {section} of report {report_id} as {export_format}")
+        return Response(
+            stream_with_context(stream),
+            mimetype=EXPORT_FORMATS[export_format][0],
+            headers={
+                'Content-Disposition': f'attachment; filename="{exporter.filename(export_format)}"',
+                # Whether the items have changed since the report was generated
+                'X-Inventory-Changed': 'false' if report.inventory_version == current_version else 'true'
+            }
+        )
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        current_app.logger.warning(f"API: export_report unavailable - {str(e)}")
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        current_app.logger.error(f"API: export_report error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/reports/<int:report_id>/share', methods=['POST'])
+@login_required
+def share_report(report_id):
+    """Make a report available through its public link."""
+    try:
+        report = report_service.make_report_public(report_id, current_user.id)
+        if not report:
+            return jsonify({'error': 'Report not found'}), 404
+        
+        return jsonify({
+            'message': 'Report shared successfully',
+            'public_url': url_for('reports.shared_report', token=report.public_token, _external=True)
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"API: share_report error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/reports/<int:report_id>/share', methods=['DELETE'])
+@login_required
+def unshare_report(report_id):
+    """Revoke a report's public link."""
+    try:
+        if not report_service.make_report_private(report_id, current_user.id):
+            return jsonify({'error': 'Report not found'}), 404
+        
+        return jsonify({'message': 'Report is no longer shared'})
+        
+    except Exception as e:
+        current_app.logger.error(f"API: unshare_report error - {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/reports/<int:report_id>', methods=['DELETE'])
 @login_required
 def delete_report(report_id):
@@ -119,12 +219,8 @@ def delete_report(report_id):
     try:
         current_app.logger.info(f"API: delete_report called - user_id: {current_user.id}, report_id: {report_id}")
         
-        report = report_service.get_report(report_id)
-        if not report or report.user_id != current_user.id:
+        if not report_service.delete_report(report_id, current_user.id):
             return jsonify({'error': 'Report not found'}), 404
-            
-        db.session.delete(report)
-        db.session.commit()
         
         current_app.logger.info(f"API: delete_report - successfully deleted report {report_id}")
         return jsonify({'message': 'Report deleted successfully'})
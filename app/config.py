@@ -34,6 +34,17 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
 
+    # Outbound email queue config
+    EMAIL_QUEUE_ENABLED = os.environ.get('EMAIL_QUEUE_ENABLED', 'true').lower() == 'true'
+    EMAIL_QUEUE_WORKERS = int(os.environ.get('EMAIL_QUEUE_WORKERS', 2))
+    EMAIL_QUEUE_BATCH_SIZE = 20  # Messages sent per SMTP connection
+    EMAIL_QUEUE_POLL_INTERVAL = 5  # Seconds between idle polls
+    EMAIL_QUEUE_MAX_ATTEMPTS = 5
+    EMAIL_QUEUE_BACKOFF_SECONDS = 30  # Doubled after each transient failure
+    EMAIL_QUEUE_BACKOFF_MAX_SECONDS = 3600
+    EMAIL_QUEUE_CLAIM_TIMEOUT = 300  # Reclaim rows stuck in 'sending' after this many seconds
+    EMAIL_TEMPLATE_WARMUP = True  # Compile email templates when a worker starts
+
     # Security config
     MAX_LOGIN_ATTEMPTS = 5
     LOGIN_LOCKOUT_TIME = timedelta(minutes=15)
@@ -50,6 +61,7 @@ class Config:
 
     # File upload config
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    UPLOAD_SPOOL_THRESHOLD = 1024 * 1024  # Requests larger than this spool uploads to a temporary file, not memory
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'bmp', 'tiff', 'webp'}
     UPLOAD_FOLDER = 'app/static/uploads'
 
@@ -72,10 +84,62 @@ class Config:
     # Notification config
     NOTIFICATION_EXPIRY_DAYS = 7
     NOTIFICATION_CHECK_INTERVAL = 3600  # 1 hour in seconds
+    NOTIFICATION_JOB_SHARDS = 8  # User id-range partitions per daily run
+    NOTIFICATION_JOB_WORKERS = 4  # Concurrent shards, capped by the DB connection pool
+    NOTIFICATION_JOB_BATCH_SIZE = 100  # Users loaded (and checkpointed) per step
+    NOTIFICATION_COUNTER_CACHE = os.environ.get('NOTIFICATION_COUNTER_CACHE', 'true').lower() == 'true'  # Serve badge counts from notification_counters
 
     # Report config
     REPORT_EXPIRY_DAYS = 30
     REPORT_CLEANUP_INTERVAL = 86400  # 24 hours in seconds
+    REPORT_AGGREGATION_MODE = os.environ.get('REPORT_AGGREGATION_MODE', 'incremental')  # 'incremental' (change log), 'sql' (grouped query) or 'memory' (load all items)
+    REPORT_DETAIL_LIMIT = 100  # Items listed per report section in 'incremental' and 'sql' mode
+    REPORT_AGGREGATE_REBUILD_DAYS = 7  # Full aggregate rebuild interval in 'incremental' mode, bounds drift
+    REPORT_AGGREGATE_MAX_CHANGES = 5000  # Pending changes above which a rebuild is cheaper than applying deltas
+    REPORT_JOB_PROCESSES = int(os.environ.get('REPORT_JOB_PROCESSES', 2))  # Worker processes for the nightly report job
+    REPORT_JOB_BATCH_SIZE = 25  # Users handed to a worker process at a time
+    REPORT_BACKFILL_BATCH_SIZE = 200  # Reports repaired per commit by the offline backfill
+    REPORT_BACKFILL_SHARDS = 4  # Report id-range partitions per backfill run
+    REPORT_BACKFILL_WORKERS = 2  # Concurrent backfill shards, capped by the DB connection pool
+    REPORT_EXPORT_CHUNK_SIZE = 2000  # Items fetched per cursor partition when streaming exports
+    REPORT_PUBLIC_CACHE_BYTES = 32 * 1024 * 1024  # Rendered shared-report pages kept per worker
+    # Cache-Control max-age for shared report pages. Browsers and proxies may serve an unshared or
+    # deleted report for this long; 0 sends no-cache so they revalidate with the ETag
+    REPORT_PUBLIC_MAX_AGE = 0
+
+    # OCR config
+    OCR_BACKEND = os.environ.get('OCR_BACKEND', 'azure')  # 'azure', 'tesseract' (needs pytesseract) or 'fake'
+    AZURE_VISION_KEY = os.environ.get('AZURE_VISION_KEY')
+    AZURE_VISION_ENDPOINT = os.environ.get('AZURE_VISION_ENDPOINT')
+    OCR_TESSERACT_CONFIG = '--psm 6'  # Assume one uniform block of text
+    OCR_TESSERACT_LANG = os.environ.get('OCR_TESSERACT_LANG', 'eng')
+    OCR_FAKE_TEXT = os.environ.get('OCR_FAKE_TEXT', '')  # Fake backend: text for images without a transcript
+    OCR_FAKE_TRANSCRIPTS = os.environ.get('OCR_FAKE_TRANSCRIPTS')  # Fake backend: JSON file of {sha256 of upload: text}
+    OCR_TARGET_DPI = 300  # Resolution label photos are downsampled to before OCR
+    OCR_SOURCE_WIDTH_INCHES = 4.0  # Physical width assumed across a photo's long side
+    OCR_PREPROCESS_STAGES = ('clahe', 'denoise', 'threshold')  # Optional stages run after downsampling; add 'roi' to crop to text
+    OCR_ROI_PADDING = 12  # 'roi' stage: background pixels kept around each text region
+    OCR_ROI_MAX_REGIONS = 12  # 'roi' stage: most text regions kept, largest first
+    OCR_DENOISE_DIAMETER = 9  # Bilateral filter neighbourhood in pixels
+    OCR_ENCODE_FORMAT = '.png'  # Format of the image sent to the OCR backend
+    OCR_MAX_DECODE_PIXELS = 16_000_000  # Largest decoded upload; bigger JPEGs are decoded at 1/2, 1/4 or 1/8 size
+    OCR_DEBUG_IMAGES = os.environ.get('OCR_DEBUG_IMAGES', 'false').lower() == 'true'  # Save each preprocessed image
+    OCR_DEBUG_DIR = os.environ.get('OCR_DEBUG_DIR')  # Defaults to app/debug_images
+    OCR_CACHE_ENABLED = True  # Serve rescanned images from the OCR result cache
+    OCR_CACHE_SIZE = 1024  # Results kept in memory per worker
+    OCR_CACHE_DIR = os.environ.get('OCR_CACHE_DIR')  # Persistent tier shared by workers; unset keeps results in memory only
+    OCR_CACHE_DIR_MAX_ENTRIES = int(os.environ.get('OCR_CACHE_DIR_MAX_ENTRIES', 100_000))  # Files kept on disk; least recently used are pruned
+    OCR_BATCH_MAX_IMAGES = 50  # Images accepted by one batch OCR request
+    OCR_BATCH_PROCESSES = int(os.environ.get('OCR_BATCH_PROCESSES', 2))  # Preprocessing worker processes; 0 uses threads
+    OCR_BATCH_THREADS = int(os.environ.get('OCR_BATCH_THREADS', 4))  # Concurrent OCR backend calls per server worker
+    OCR_JOBS_ENABLED = os.environ.get('OCR_JOBS_ENABLED', 'false').lower() == 'true'  # Accept asynchronous OCR jobs
+    OCR_JOBS_WORKERS = int(os.environ.get('OCR_JOBS_WORKERS', 2))  # Job worker threads, started with a process's first job
+    OCR_JOBS_POLL_INTERVAL = 2  # Seconds between idle polls for jobs queued by other processes
+    OCR_JOBS_MAX_QUEUED = 200  # Submissions are refused with 503 while this many jobs wait
+    OCR_JOBS_MAX_WAIT = 20  # Longest long-poll in seconds; each one holds a server worker
+    OCR_JOBS_MAX_ATTEMPTS = 3  # Fail a job after this many workers died processing it
+    OCR_JOBS_CLAIM_TIMEOUT = 300  # Requeue jobs stuck in 'processing' after this many seconds
+    OCR_JOBS_RETENTION = 3600  # Seconds finished jobs can still be polled
 
     # API config
     API_PREFIX = '/api/v1'
@@ -221,6 +285,7 @@ class TestingConfig(Config):
     
     # Use in-memory SQLite for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # One static connection; the pool sizes above do not apply
     
     # Testing-specific settings
     SECRET_KEY = 'test-secret-key'
@@ -229,6 +294,9 @@ class TestingConfig(Config):
     # Disable CSRF protection in testing
     WTF_CSRF_ENABLED = False
     
+    # Send email inline in testing
+    EMAIL_QUEUE_ENABLED = False
+    
     # Testing Zoho settings
     ZOHO_CLIENT_ID = 'test-client-id'
     ZOHO_CLIENT_SECRET = 'test-client-secret'
@@ -79,8 +79,8 @@ def init_extensions(app):
     print(f"MAIL_USERNAME: {app.config.get('MAIL_USERNAME')}")
     print(f"MAIL_DEFAULT_SENDER: {app.config.get('MAIL_DEFAULT_SENDER')}")
 
-    # Initialize scheduler with proper configuration
-    if not scheduler.running:
+    # Initialize scheduler with proper configuration; SCHEDULER_RUN=False leaves it off (worker processes)
+    if not scheduler.running and app.config.get('SCHEDULER_RUN', True):
         # Configure scheduler to use SQLAlchemy job store
         app.config['SCHEDULER_JOBSTORES'] = {
             'default': SQLAlchemyJobStore(url=app.config['SQLALCHEMY_DATABASE_URI'])
@@ -0,0 +1,140 @@
+"""Lightweight in-process metrics used by background workers and services."""
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+# Default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Thread-safe histogram with cumulative buckets and recent-sample percentiles."""
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 1000) -> None:
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            self._recent.append(value)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    return
+            self._counts[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the histogram as a JSON-serializable dictionary."""
+        with self._lock:
+            recent = sorted(self._recent)
+            counts = list(self._counts)
+            count = self._count
+            total = self._sum
+
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[f'le_{bound}'] = cumulative
+        buckets['le_inf'] = cumulative + counts[-1]
+
+        return {
+            'count': count,
+            'sum': total,
+            'avg': (total / count) if count else 0.0,
+            'p50': _percentile(recent, 50),
+            'p95': _percentile(recent, 95),
+            'max': recent[-1] if recent else 0.0,
+            'buckets': buckets
+        }
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class MetricsRegistry:
+    """Registry of named counters, histograms and gauge callbacks."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, buckets)
+            return self._histograms[name]
+
+    def counter(self, name: str) -> Counter:
+        """Get or create a counter."""
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name)
+            return self._counters[name]
+
+    def gauge(self, name: str, func: Callable[[], Any]) -> None:
+        """Register a callback evaluated when a snapshot is taken."""
+        with self._lock:
+            self._gauges[name] = func
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        """Return all metrics, optionally limited to names starting with prefix."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        def wanted(name: str) -> bool:
+            return prefix is None or name.startswith(prefix)
+
+        result: Dict[str, Any] = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        for name, counter in counters.items():
+            if wanted(name):
+                result['counters'][name] = counter.value
+        for name, func in gauges.items():
+            if wanted(name):
+                try:
+                    result['gauges'][name] = func()
+                except Exception as e:
+                    result['gauges'][name] = f'error: {str(e)}'
+        for name, histogram in histograms.items():
+            if wanted(name):
+                result['histograms'][name] = histogram.snapshot()
+        return result
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percentile / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,35 @@
+"""Worker process pools that are safe to start from a server process.
+
+Server processes run threads besides the one starting a pool: request
+threads, the email queue and OCR job workers, the scheduler. Forking such a
+process copies any lock another thread holds at that moment (logging, the
+connection pool, database and mail drivers) into the child, where nothing
+will ever release it. Pools therefore start their workers from a fork
+server, a single-threaded process started for the purpose.
+
+Like spawned ones, fork server workers import the parent's main module as
+``__mp_main__`` before they run anything, so entry points must not start
+work at import time; run.py skips building its app there. Workers that need
+an app build one with ``create_app`` and settings that keep the scheduler
+and queue workers off.
+"""
+import multiprocessing
+from multiprocessing.context import BaseContext
+from typing import Optional
+
+# Imported once by the fork server, so each worker does not import the app package again
+FORKSERVER_PRELOAD = ['app']
+
+
+def worker_context() -> Optional[BaseContext]:
+    """Multiprocessing context for worker pools.
+
+    Returns:
+        BaseContext: The fork server context, or None where it is not
+            available (Windows); callers then run the work in-process
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return context
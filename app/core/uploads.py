@@ -0,0 +1,76 @@
+"""Upload spooling and zero-copy access to uploaded files.
+
+Werkzeug keeps uploads in a ``SpooledTemporaryFile`` that only moves to disk
+past 500 KB, and reading a ``FileStorage`` copies the whole file into a new
+bytes object. ``SpooledRequest`` decides up front from the request size:
+uploads above ``UPLOAD_SPOOL_THRESHOLD`` are written straight to a temporary
+file, smaller ones to memory. ``upload_buffer`` then exposes either as a
+read-only buffer without copying it, which NumPy, OpenCV and hashlib accept
+in place of bytes.
+"""
+import mmap
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+from typing import IO, Iterator, Optional
+from flask import Request, current_app
+from werkzeug.datastructures import FileStorage
+
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+
+
+class SpooledRequest(Request):
+    """Request that spools large uploads to disk instead of memory."""
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None
+    ) -> IO[bytes]:
+        threshold = current_app.config.get('UPLOAD_SPOOL_THRESHOLD', DEFAULT_SPOOL_THRESHOLD)
+        if total_content_length is None or total_content_length > threshold:
+            return tempfile.TemporaryFile('w+b')
+        return BytesIO()
+
+
+@contextmanager
+def upload_buffer(file: FileStorage) -> Iterator[memoryview]:
+    """Expose an uploaded file as a read-only buffer without copying it.
+
+    In-memory uploads are shared with their ``BytesIO``; spooled ones are
+    memory-mapped, so the OS pages them in as they are read. Streams that
+    support neither are read into memory. The buffer is only valid inside
+    the ``with`` block.
+
+    Yields:
+        memoryview: The file contents from the start of the stream
+    """
+    stream = file.stream
+    stream.seek(0)
+    mapped: Optional[mmap.mmap] = None
+    if isinstance(stream, BytesIO):
+        view = stream.getbuffer()
+    else:
+        try:
+            fileno = stream.fileno()
+        except (AttributeError, OSError):
+            fileno = None
+        if fileno is not None and stream.seek(0, 2) > 0:
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+        else:
+            stream.seek(0)
+            view = memoryview(stream.read())  # Empty or unmappable stream
+    readonly = view.toreadonly()
+    try:
+        yield readonly
+    finally:
+        try:
+            readonly.release()
+            view.release()
+            if mapped is not None:
+                mapped.close()
+        except BufferError:
+            pass  # Something still refers to the buffer; it is freed with that reference
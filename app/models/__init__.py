@@ -4,5 +4,15 @@ from app.models.user import User
 from app.models.item import Item
 from app.models.notification import Notification
 from app.models.activity import Activity
+from app.models.outbound_email import OutboundEmail
+from app.models.ocr_job import OCRJob
+from app.models.job_checkpoint import JobCheckpoint
+from app.models.digest_delivery import DigestDelivery
+from app.models.notification_counter import NotificationCounter
+from app.models.report_payload import ReportPayload
+from app.models.daily_metric import DailyMetric
+from app.models.metric_rollup import MetricRollup
+from app.models.item_change import ItemChange
+from app.models.inventory_aggregate import InventoryAggregate, InventoryAggregateState
 
-__all__ = ['BaseModel', 'User', 'Item', 'Notification', 'Activity'] 
\ No newline at end of file
+__all__ = ['BaseModel', 'User', 'Item', 'Notification', 'Activity', 'OutboundEmail', 'OCRJob', 'JobCheckpoint', 'DigestDelivery', 'NotificationCounter', 'ReportPayload', 'DailyMetric', 'MetricRollup', 'ItemChange', 'InventoryAggregate', 'InventoryAggregateState'] 
\ No newline at end of file
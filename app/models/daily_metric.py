@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Any, Dict
+from app.core.extensions import db
+
+# Metrics recorded for every daily report, in column order
+METRIC_FIELDS = (
+    'total_items', 'active_items', 'expired_items', 'expiring_items', 'pending_items',
+    'low_stock_items', 'critical_items', 'high_value_expiring',
+    'total_value', 'expiring_value', 'expired_value', 'value_at_risk', 'risk_score'
+)
+
+class DailyMetric(db.Model):
+    """One narrow row of report metrics per user per day.
+
+    Written alongside each generated report so trends and comparisons are a
+    range scan over this table instead of loading full reports. Past days are
+    never modified; regenerating today's report replaces today's row.
+    """
+
+    __tablename__ = 'daily_metrics'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    active_items = db.Column(db.Integer, nullable=False, default=0)
+    expired_items = db.Column(db.Integer, nullable=False, default=0)
+    expiring_items = db.Column(db.Integer, nullable=False, default=0)
+    pending_items = db.Column(db.Integer, nullable=False, default=0)
+    low_stock_items = db.Column(db.Integer, nullable=False, default=0)
+    critical_items = db.Column(db.Integer, nullable=False, default=0)
+    high_value_expiring = db.Column(db.Integer, nullable=False, default=0)
+    total_value = db.Column(db.Float, nullable=False, default=0.0)
+    expiring_value = db.Column(db.Float, nullable=False, default=0.0)
+    expired_value = db.Column(db.Float, nullable=False, default=0.0)
+    value_at_risk = db.Column(db.Float, nullable=False, default=0.0)  # Value expiring within 90 days
+    risk_score = db.Column(db.Float, nullable=False, default=0.0)  # Weighted value-at-risk score, 0-100
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_daily_metrics_user_date', 'user_id', 'date', unique=True),
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert metrics to dictionary."""
+        data = {'date': self.date.strftime('%Y-%m-%d')}
+        data.update({field: getattr(self, field) for field in METRIC_FIELDS})
+        return data
+
+    def __repr__(self):
+        return f'<DailyMetric user {self.user_id} {self.date}>'
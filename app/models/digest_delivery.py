@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from app.core.extensions import db
+
+# Ledger status constants
+DELIVERY_CLAIMED = 'claimed'
+DELIVERY_SENT = 'sent'
+
+class DigestDelivery(db.Model):
+    """Ledger of daily digest deliveries, one row per user, day and channel.
+
+    The unique index on (user_id, digest_date, channel) makes the
+    "already notified today" check a single index lookup, and inserting the
+    row before sending acts as a claim so parallel workers and retries never
+    deliver the same digest twice.
+    """
+
+    __tablename__ = 'digest_deliveries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    digest_date = db.Column(db.Date, nullable=False)
+    channel = db.Column(db.String(20), nullable=False, default='email')
+    status = db.Column(db.String(20), nullable=False, default=DELIVERY_CLAIMED)
+    item_count = db.Column(db.Integer, default=0)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_digest_deliveries_user_date_channel', 'user_id', 'digest_date', 'channel', unique=True),
+        db.CheckConstraint(
+            "status IN ('claimed', 'sent')",
+            name='check_digest_delivery_status'
+        ),
+    )
+
+    @classmethod
+    def claim(
+        cls,
+        user_id: int,
+        digest_date: date,
+        channel: str = 'email',
+        stale_after: timedelta = timedelta(minutes=30)
+    ) -> Tuple[Optional['DigestDelivery'], bool]:
+        """Claim the right to deliver a digest.
+
+        Args:
+            user_id: ID of the recipient
+            digest_date: Day the digest covers
+            channel: Delivery channel
+            stale_after: Age after which an unfinished claim may be taken over
+
+        Returns:
+            tuple: (claimed delivery or None, whether it was already sent)
+        """
+        delivery = cls(user_id=user_id, digest_date=digest_date, channel=channel, status=DELIVERY_CLAIMED)
+        try:
+            db.session.add(delivery)
+            db.session.commit()
+            return delivery, False
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = cls.query.filter_by(user_id=user_id, digest_date=digest_date, channel=channel).first()
+        if existing is None:
+            return None, False
+        if existing.status == DELIVERY_SENT:
+            return None, True
+
+        # Take over a claim abandoned by a crashed worker; only one taker can win
+        now = datetime.utcnow()
+        taken = cls.query.filter(
+            cls.id == existing.id,
+            cls.status == DELIVERY_CLAIMED,
+            cls.claimed_at == existing.claimed_at,
+            cls.claimed_at < now - stale_after
+        ).update({'claimed_at': now}, synchronize_session=False)
+        db.session.commit()
+        if taken:
+            return db.session.get(cls, existing.id), False
+        return None, False
+
+    def mark_sent(self, item_count: int) -> None:
+        """Record a successful delivery."""
+        self.status = DELIVERY_SENT
+        self.item_count = item_count
+        self.sent_at = datetime.utcnow()
+        db.session.commit()
+
+    def release(self) -> None:
+        """Drop an unfinished claim so a later retry can deliver."""
+        try:
+            db.session.delete(self)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def __repr__(self):
+        return f'<DigestDelivery user {self.user_id} {self.digest_date} {self.channel}: {self.status}>'
@@ -0,0 +1,52 @@
+from datetime import datetime
+from app.core.extensions import db
+
+class InventoryAggregate(db.Model):
+    """Per-user item counts and sums grouped by the report's banding.
+
+    Groups are keyed by the absolute expiry date rather than days until
+    expiry, so rows stay valid as days pass and only item changes touch
+    them. Reports fold the rows into today's expiry buckets.
+    """
+
+    __tablename__ = 'inventory_aggregates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20))
+    expiry_ordinal = db.Column(db.Integer, nullable=False, default=0)  # date.toordinal(), 0 for no expiry date
+    quantity_band = db.Column(db.Integer, nullable=False)
+    value_band = db.Column(db.Integer, nullable=False)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity_sum = db.Column(db.Float, nullable=False, default=0.0)
+    value_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index(
+            'ix_inventory_aggregates_group',
+            'user_id', 'status', 'expiry_ordinal', 'quantity_band', 'value_band',
+            unique=True
+        ),
+    )
+
+    def __repr__(self):
+        return f'<InventoryAggregate user {self.user_id} {self.status} {self.expiry_ordinal}: {self.item_count}>'
+
+class InventoryAggregateState(db.Model):
+    """How far a user's aggregates have read the item change log."""
+
+    __tablename__ = 'inventory_aggregate_states'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    last_change_id = db.Column(db.Integer, nullable=False, default=0)
+    changes_applied = db.Column(db.Integer, nullable=False, default=0)  # Deltas applied since the last rebuild
+    rebuilt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        """Drop a user's state so the next report rebuilds the aggregates."""
+        cls.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+    def __repr__(self):
+        return f'<InventoryAggregateState user {self.user_id} at change {self.last_change_id}>'
@@ -1,9 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import case, func
 from app.core.extensions import db
 from app.models.base import BaseModel
+from app.models.item_change import ItemChange, CHANGE_INSERT, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_STATUS, CHANGE_UNKNOWN
 from flask import current_app
 from functools import lru_cache
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 # Status constants
 STATUS_ACTIVE = 'active'
@@ -15,6 +17,46 @@ STATUS_PENDING = 'pending_expiry_date'
 EXPIRING_SOON_DAYS = 30
 PENDING_STATUS_HOURS = 24
 
+# Risk score given to items without an expiry date
+NO_EXPIRY_RISK_SCORE = 50
+
+def calculate_risk_score(days_until_expiry: Optional[int], quantity: Optional[float], cost_price: Optional[float]) -> int:
+    """Risk score (0-100) from expiry (40%), quantity (30%) and value (30%).
+
+    Items without an expiry date get a medium score.
+    """
+    if days_until_expiry is None:
+        return NO_EXPIRY_RISK_SCORE
+
+    quantity = quantity or 0
+    value = quantity * (cost_price or 0)
+    score = 0
+
+    if days_until_expiry <= 7:
+        score += 40  # Expired or expiring within a week
+    elif days_until_expiry <= 30:
+        score += 25
+    elif days_until_expiry <= 90:
+        score += 15
+    elif days_until_expiry <= 365:
+        score += 5
+
+    if quantity <= 5:
+        score += 30  # Below safety stock
+    elif quantity <= 10:
+        score += 20  # Below minimum order quantity
+    elif quantity <= 20:
+        score += 10
+
+    if value > 1000:
+        score += 30
+    elif value > 500:
+        score += 20
+    elif value > 100:
+        score += 10
+
+    return min(score, 100)
+
 class Item(BaseModel):
     """Item model for inventory management.
     
@@ -62,15 +104,26 @@ class Item(BaseModel):
     image_url = db.Column(db.String(255))
     status_changed_at = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='Pending Expiry Date')
+    risk_score = db.Column(db.Integer, default=NO_EXPIRY_RISK_SCORE)  # Kept current on write and by the nightly rollover
     
     # Foreign keys
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # active_history loads the previous owner on reassignment, so the change log can debit them
+    user_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False), active_history=True
+    )
     zoho_item_id = db.Column(db.String(100), unique=True)
     
     # Relationships
     notifications = db.relationship('Notification', back_populates='item', lazy='dynamic')
     user = db.relationship('User', back_populates='items')
     
+    __table_args__ = (
+        # Top-N riskiest items per user is a range scan on this index
+        db.Index('ix_items_user_risk_score', 'user_id', 'risk_score'),
+        # Incremental reports read each group's soonest-expiring items as a range on this index
+        db.Index('ix_items_user_status_expiry', 'user_id', 'status', 'expiry_date'),
+    )
+    
     def __init__(self, **kwargs):
         """Initialize item with given parameters."""
         super().__init__()
@@ -87,6 +140,10 @@ class Item(BaseModel):
         expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
         return (expiry_date - current_date).days
     
+    def compute_risk_score(self) -> int:
+        """Risk score for the item as of today."""
+        return calculate_risk_score(self.days_until_expiry, self.quantity, self.cost_price)
+    
     @property
     def is_expired(self) -> bool:
         """Check if item is expired with caching."""
@@ -140,6 +197,7 @@ class Item(BaseModel):
             'is_expired': self.is_expired,
             'is_near_expiry': self.is_near_expiry,
             'status': status,
+            'risk_score': self.risk_score,
             'zoho_item_id': self.zoho_item_id
         })
         
@@ -223,6 +281,57 @@ class Item(BaseModel):
             
             db.session.commit()
 
+    @classmethod
+    def riskiest(cls, user_id: int, limit: int = 10) -> List['Item']:
+        """A user's highest-risk items, soonest expiry first among equal scores."""
+        return cls.query.filter_by(user_id=user_id).order_by(
+            cls.risk_score.desc(),
+            cls.expiry_date.asc().nullslast(),
+            cls.id
+        ).limit(limit).all()
+    
+    @classmethod
+    def risk_score_expression(cls, today: date):
+        """SQL twin of :func:`calculate_risk_score` for set-based refreshes."""
+        def day_start(offset: int) -> datetime:
+            return datetime.combine(today + timedelta(days=offset), time.min)
+        
+        quantity = func.coalesce(cls.quantity, 0)
+        value = quantity * func.coalesce(cls.cost_price, 0)
+        expiry_score = case(
+            (cls.expiry_date < day_start(8), 40),
+            (cls.expiry_date < day_start(31), 25),
+            (cls.expiry_date < day_start(91), 15),
+            (cls.expiry_date < day_start(366), 5),
+            else_=0
+        )
+        quantity_score = case((quantity <= 5, 30), (quantity <= 10, 20), (quantity <= 20, 10), else_=0)
+        value_score = case((value > 1000, 30), (value > 500, 20), (value > 100, 10), else_=0)
+        return case(
+            (cls.expiry_date.is_(None), NO_EXPIRY_RISK_SCORE),
+            else_=expiry_score + quantity_score + value_score
+        )
+    
+    @classmethod
+    def refresh_risk_scores(cls, today: Optional[date] = None) -> int:
+        """Recompute stored risk scores after the day rolls over.
+        
+        Scores move only when an item crosses an expiry threshold, so one
+        UPDATE rewrites just those rows. ``updated_at`` is left alone: the
+        inventory itself did not change.
+        
+        Returns:
+            int: Number of items whose score changed
+        """
+        expression = cls.risk_score_expression(today or datetime.now().date())
+        result = db.session.execute(
+            db.update(cls)
+            .where(db.or_(cls.risk_score.is_(None), cls.risk_score != expression))
+            .values(risk_score=expression, updated_at=cls.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     @classmethod
     def find_existing_item(cls, name: str, user_id: int) -> Optional['Item']:
         """Find an existing item with the same name for the given user.
@@ -263,4 +372,127 @@ class Item(BaseModel):
         # Create new item
         new_item = cls(name=name, user_id=user_id, **kwargs)
         new_item.update_status(force_update=True)
-        return new_item, True 
\ No newline at end of file
+        return new_item, True
+
+
+# Item fields that feed the report aggregates
+AGGREGATED_FIELDS = ('user_id', 'status', 'expiry_date', 'quantity', 'cost_price')
+
+_NOT_LOADED = object()
+
+def _expiry_ordinal(expiry_date) -> Optional[int]:
+    if expiry_date is None:
+        return None
+    if isinstance(expiry_date, datetime):
+        expiry_date = expiry_date.date()
+    return expiry_date.toordinal()
+
+def _change_values(prefix: str, values: dict) -> dict:
+    quantity = values['quantity'] or 0
+    return {
+        f'{prefix}_status': values['status'],
+        f'{prefix}_expiry_ordinal': _expiry_ordinal(values['expiry_date']),
+        f'{prefix}_quantity': quantity,
+        f'{prefix}_value': quantity * (values['cost_price'] or 0)
+    }
+
+# Value columns of the change log; rows in one insert must all carry the same keys
+_CHANGE_COLUMNS = tuple(
+    f'{prefix}_{field}' for prefix in ('old', 'new') for field in ('status', 'expiry_ordinal', 'quantity', 'value')
+)
+
+def _lock_owners(connection, user_ids) -> None:
+    """Share-lock the owners' user rows until the transaction ends.
+
+    ``ReportAggregateService`` locks a user's row exclusively while it reads
+    the change log, so it never sees a change id allocated by a transaction
+    that has not committed yet. Locks are taken once per transaction and in
+    id order, so two writers cannot deadlock on them.
+    """
+    from app.models.user import User
+
+    transaction = connection.get_transaction()
+    locked = connection.info.get('item_change_owner_locks')
+    if locked is None or locked[0] is not transaction:
+        locked = connection.info['item_change_owner_locks'] = (transaction, set())
+    pending = sorted(set(user_ids) - locked[1])
+    if not pending:
+        return
+    connection.execute(
+        db.select(User.id).where(User.id.in_(pending)).order_by(User.id).with_for_update(read=True)
+    )
+    if not connection.in_nested_transaction():
+        locked[1].update(pending)  # Rolling back a savepoint releases the locks taken inside it
+
+def _log_changes(connection, rows: list) -> None:
+    _lock_owners(connection, [row['user_id'] for row in rows])
+    changed_at = datetime.utcnow()
+    connection.execute(ItemChange.__table__.insert(), [
+        {'changed_at': changed_at, **dict.fromkeys(_CHANGE_COLUMNS), **row} for row in rows
+    ])
+
+def _previous_values(target: Item) -> dict:
+    """Aggregated fields as last loaded from the database."""
+    state = db.inspect(target)
+    previous = {}
+    for key in AGGREGATED_FIELDS:
+        history = state.attrs[key].history
+        if history.deleted:
+            previous[key] = history.deleted[0]
+        elif history.unchanged:
+            previous[key] = history.unchanged[0]
+        elif not history.added and key in state.dict:
+            previous[key] = state.dict[key]
+        else:
+            previous[key] = _NOT_LOADED
+    return previous
+
+@db.event.listens_for(Item, 'before_insert')
+@db.event.listens_for(Item, 'before_update')
+def _refresh_risk_score(mapper, connection, target: Item) -> None:
+    target.risk_score = target.compute_risk_score()
+
+@db.event.listens_for(Item, 'after_insert')
+def _log_item_insert(mapper, connection, target: Item) -> None:
+    current = {key: getattr(target, key) for key in AGGREGATED_FIELDS}
+    _log_changes(connection, [{
+        'user_id': target.user_id, 'item_id': target.id, 'operation': CHANGE_INSERT,
+        **_change_values('new', current)
+    }])
+
+@db.event.listens_for(Item, 'after_delete')
+def _log_item_delete(mapper, connection, target: Item) -> None:
+    previous = _previous_values(target)
+    if _NOT_LOADED in previous.values():
+        row = {'operation': CHANGE_UNKNOWN}
+    else:
+        row = {'operation': CHANGE_DELETE, **_change_values('old', previous)}
+    _log_changes(connection, [{'user_id': target.user_id, 'item_id': target.id, **row}])
+
+@db.event.listens_for(Item, 'after_update')
+def _log_item_update(mapper, connection, target: Item) -> None:
+    state = db.inspect(target)
+    changed = [key for key in AGGREGATED_FIELDS if state.attrs[key].history.has_changes()]
+    if not changed:
+        return
+
+    previous = _previous_values(target)
+    current = {key: getattr(target, key) for key in AGGREGATED_FIELDS}
+    if _NOT_LOADED in previous.values():
+        rows = [{'user_id': target.user_id, 'item_id': target.id, 'operation': CHANGE_UNKNOWN}]
+        if previous['user_id'] not in (_NOT_LOADED, target.user_id):
+            rows.append({'user_id': previous['user_id'], 'item_id': target.id, 'operation': CHANGE_UNKNOWN})
+    elif previous['user_id'] != current['user_id']:
+        # Moved to another user: a delete for the old owner and an insert for the new one
+        rows = [
+            {'user_id': previous['user_id'], 'item_id': target.id, 'operation': CHANGE_DELETE, **_change_values('old', previous)},
+            {'user_id': current['user_id'], 'item_id': target.id, 'operation': CHANGE_INSERT, **_change_values('new', current)}
+        ]
+    else:
+        old_values = _change_values('old', previous)
+        new_values = _change_values('new', current)
+        if all(old_values[f'old_{field}'] == new_values[f'new_{field}'] for field in ('status', 'expiry_ordinal', 'quantity', 'value')):
+            return
+        operation = CHANGE_STATUS if changed == ['status'] else CHANGE_UPDATE
+        rows = [{'user_id': target.user_id, 'item_id': target.id, 'operation': operation, **old_values, **new_values}]
+    _log_changes(connection, rows)
@@ -0,0 +1,41 @@
+from datetime import datetime
+from app.core.extensions import db
+
+# Change operations
+CHANGE_INSERT = 'insert'
+CHANGE_UPDATE = 'update'
+CHANGE_DELETE = 'delete'
+CHANGE_STATUS = 'status'  # Update that only moved the item to another status
+CHANGE_UNKNOWN = 'unknown'  # Previous values were not loaded; forces an aggregate rebuild
+
+class ItemChange(db.Model):
+    """Compact log of item changes that affect report aggregates.
+
+    One row per inserted, deleted or relevantly updated item, with the
+    report-relevant fields before and after the change. Rows are written by
+    mapper events in the same transaction as the item itself, and are pruned
+    once a user's aggregates have absorbed them.
+    """
+
+    __tablename__ = 'item_changes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    old_status = db.Column(db.String(20))
+    old_expiry_ordinal = db.Column(db.Integer)  # date.toordinal() of the expiry date
+    old_quantity = db.Column(db.Float)
+    old_value = db.Column(db.Float)
+    new_status = db.Column(db.String(20))
+    new_expiry_ordinal = db.Column(db.Integer)
+    new_quantity = db.Column(db.Float)
+    new_value = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_item_changes_user_id_id', 'user_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ItemChange {self.id} {self.operation} item {self.item_id}>'
@@ -0,0 +1,64 @@
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Checkpoint status constants
+SHARD_PENDING = 'pending'
+SHARD_RUNNING = 'running'
+SHARD_DONE = 'done'
+SHARD_FAILED = 'failed'
+
+class JobCheckpoint(BaseModel):
+    """Progress of one shard of a partitioned background job run.
+
+    A run of a job (``job_name`` on ``run_date``) is split into shards that
+    each cover an inclusive id range. ``last_id`` records the last id fully
+    processed so a crashed run resumes where it stopped.
+    """
+
+    __tablename__ = 'job_checkpoints'
+
+    job_name = db.Column(db.String(100), nullable=False)
+    run_date = db.Column(db.Date, nullable=False)
+    shard = db.Column(db.Integer, nullable=False)
+    start_id = db.Column(db.Integer, nullable=False)
+    end_id = db.Column(db.Integer, nullable=False)
+    last_id = db.Column(db.Integer)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default=SHARD_PENDING)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.String(500))
+
+    __table_args__ = (
+        db.UniqueConstraint('job_name', 'run_date', 'shard', name='unique_job_run_shard'),
+        db.CheckConstraint(
+            "status IN ('pending', 'running', 'done', 'failed')",
+            name='check_job_checkpoint_status'
+        ),
+    )
+
+    @property
+    def resume_after(self) -> int:
+        """Id after which processing should continue."""
+        return self.last_id if self.last_id is not None else self.start_id - 1
+
+    def to_dict(self) -> dict:
+        """Convert checkpoint to dictionary."""
+        data = super().to_dict()
+        data.update({
+            'job_name': self.job_name,
+            'run_date': self.run_date.strftime('%Y-%m-%d') if self.run_date else None,
+            'shard': self.shard,
+            'start_id': self.start_id,
+            'end_id': self.end_id,
+            'last_id': self.last_id,
+            'processed': self.processed,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error
+        })
+        return data
+
+    def __repr__(self):
+        return f'<JobCheckpoint {self.job_name} {self.run_date} shard {self.shard}: {self.status}>'
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from typing import Any, Dict
+from app.core.extensions import db
+from app.models.daily_metric import METRIC_FIELDS
+
+# Rollup periods
+PERIOD_WEEK = 'week'
+PERIOD_MONTH = 'month'
+
+def period_bounds(period: str, day: date) -> tuple:
+    """First and last day of the week (Monday-Sunday) or month containing day."""
+    if period == PERIOD_WEEK:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+class MetricRollup(db.Model):
+    """Weekly or monthly averages of a user's daily report metrics.
+
+    Refreshed from ``daily_metrics`` whenever a day in the period is
+    recorded, so long-range trend charts read a few rows per year.
+    """
+
+    __tablename__ = 'metric_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    days = db.Column(db.Integer, nullable=False, default=0)  # Daily rows averaged
+    total_items = db.Column(db.Float, nullable=False, default=0.0)
+    active_items = db.Column(db.Float, nullable=False, default=0.0)
+    expired_items = db.Column(db.Float, nullable=False, default=0.0)
+    expiring_items = db.Column(db.Float, nullable=False, default=0.0)
+    pending_items = db.Column(db.Float, nullable=False, default=0.0)
+    low_stock_items = db.Column(db.Float, nullable=False, default=0.0)
+    critical_items = db.Column(db.Float, nullable=False, default=0.0)
+    high_value_expiring = db.Column(db.Float, nullable=False, default=0.0)
+    total_value = db.Column(db.Float, nullable=False, default=0.0)
+    expiring_value = db.Column(db.Float, nullable=False, default=0.0)
+    expired_value = db.Column(db.Float, nullable=False, default=0.0)
+    value_at_risk = db.Column(db.Float, nullable=False, default=0.0)
+    risk_score = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_metric_rollups_user_period_start', 'user_id', 'period', 'period_start', unique=True),
+        db.CheckConstraint(
+            "period IN ('week', 'month')",
+            name='check_metric_rollup_period'
+        ),
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert rollup to dictionary."""
+        data = {'date': self.period_start.strftime('%Y-%m-%d'), 'days': self.days}
+        data.update({field: round(getattr(self, field), 2) for field in METRIC_FIELDS})
+        return data
+
+    def __repr__(self):
+        return f'<MetricRollup user {self.user_id} {self.period} {self.period_start}>'
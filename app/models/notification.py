@@ -1,6 +1,7 @@
 from datetime import datetime
 from app.core.extensions import db
 from app.models.base import BaseModel
+from app.models.notification_counter import NotificationCounter
 
 class Notification(BaseModel):
     """Model for storing user notifications."""
@@ -30,6 +31,8 @@ class Notification(BaseModel):
             "status IN ('pending', 'sent')",
             name='check_notification_status'
         ),
+        # Covers the list, filter and count queries behind the notification bell
+        db.Index('ix_notifications_user_type_status_created', 'user_id', 'type', 'status', 'created_at'),
     )
     
     # Relationships
@@ -54,5 +57,7 @@ class Notification(BaseModel):
     
     def mark_as_read(self):
         """Mark the notification as read."""
+        if self.status == 'pending' and self.type == 'email':
+            NotificationCounter.adjust(self.user_id, pending=-1, sent=1)
         self.status = 'sent'
         db.session.commit() 
\ No newline at end of file
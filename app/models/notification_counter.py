@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import case, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from app.core.extensions import db
+
+class NotificationCounter(db.Model):
+    """Cached per-user notification counts for badge polling.
+
+    Rows are created lazily the first time a user's counts are read, by an
+    ``INSERT ... SELECT`` that counts the notifications in the same
+    statement. Writes adjust rows that already exist. A write that finds no
+    row locks the user first, as does a seed, so a seed either sees the
+    writer's notifications once it commits or has committed a row the writer
+    then adjusts; a missing row is always rebuilt from the source of truth.
+    """
+
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def adjust(cls, user_id: int, pending: int = 0, sent: int = 0) -> None:
+        """Apply a delta to a user's counters within the caller's transaction.
+
+        Args:
+            user_id: ID of the user whose counters changed
+            pending: Change in the number of pending notifications
+            sent: Change in the number of sent notifications
+        """
+        if not pending and not sent:
+            return
+        values = {
+            'pending': cls.pending + pending,
+            'sent': cls.sent + sent,
+            'updated_at': datetime.utcnow()
+        }
+        if cls.query.filter_by(user_id=user_id).update(values, synchronize_session=False):
+            return
+        # No row yet: wait out any seed in progress, which may have committed one
+        cls._lock_user(user_id)
+        cls.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+
+    @classmethod
+    def seed(cls, user_id: int) -> Optional['NotificationCounter']:
+        """Create a user's counter row, counting their email notifications in the insert."""
+        from app.models.notification import Notification
+
+        counts = select(
+            literal(user_id),
+            func.count(case((Notification.status == 'pending', 1))),
+            func.count(case((Notification.status == 'sent', 1))),
+            literal(datetime.utcnow())
+        ).where(
+            Notification.user_id == user_id,
+            Notification.type == 'email'
+        )
+        try:
+            cls._lock_user(user_id)
+            db.session.execute(
+                insert(cls).from_select(['user_id', 'pending', 'sent', 'updated_at'], counts)
+            )
+            db.session.commit()
+        except IntegrityError:
+            # Another request seeded the row first
+            db.session.rollback()
+        return db.session.get(cls, user_id)
+
+    @staticmethod
+    def _lock_user(user_id: int) -> None:
+        """Lock the user's row until the end of the transaction."""
+        from app.models.user import User
+
+        db.session.query(User.id).filter_by(id=user_id).with_for_update().first()
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        """Drop a user's counters so the next read rebuilds them."""
+        cls.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+    def __repr__(self):
+        return f'<NotificationCounter user {self.user_id}: {self.pending} pending, {self.sent} sent>'
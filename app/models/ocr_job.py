@@ -0,0 +1,63 @@
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Job status constants
+OCR_JOB_QUEUED = 'queued'
+OCR_JOB_PROCESSING = 'processing'
+OCR_JOB_DONE = 'done'
+OCR_JOB_FAILED = 'failed'
+
+class OCRJob(BaseModel):
+    """Model for a date OCR request processed in the background.
+
+    The uploaded image is kept on the row only until a worker has read it.
+    Clients refer to jobs by ``token``, a random hex string, so job results
+    cannot be enumerated through the public endpoint.
+    """
+
+    __tablename__ = 'ocr_jobs'
+
+    token = db.Column(db.String(32), nullable=False, unique=True, index=True)
+    filename = db.Column(db.String(255))
+    image = db.deferred(db.Column(db.LargeBinary))  # Loaded only by the worker that processes the job
+    status = db.Column(db.String(20), nullable=False, default=OCR_JOB_QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    date = db.Column(db.String(10))  # YYYY-MM-DD
+    cached = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.String(500))
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN ('queued', 'processing', 'done', 'failed')",
+            name='check_ocr_job_status'
+        ),
+        db.Index('ix_ocr_jobs_status_created', 'status', 'created_at'),
+    )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (OCR_JOB_DONE, OCR_JOB_FAILED)
+
+    def to_dict(self) -> dict:
+        """Convert job to dictionary, identified by its token."""
+        if self.status == OCR_JOB_DONE and not self.date:
+            message = 'No date found in image'
+        else:
+            message = self.error
+        return {
+            'id': self.token,
+            'state': self.status,
+            'filename': self.filename,
+            'date': self.date,
+            'cached': self.cached,
+            'message': message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.claimed_at.isoformat() if self.claimed_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<OCRJob {self.token}: {self.status}>'
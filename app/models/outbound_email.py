@@ -0,0 +1,53 @@
+from datetime import datetime
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Queue status constants
+EMAIL_QUEUED = 'queued'
+EMAIL_SENDING = 'sending'
+EMAIL_SENT = 'sent'
+EMAIL_FAILED = 'failed'
+
+class OutboundEmail(BaseModel):
+    """Model for the persistent outbound email queue."""
+
+    __tablename__ = 'outbound_emails'
+
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    template = db.Column(db.String(50))
+    status = db.Column(db.String(20), nullable=False, default=EMAIL_QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN ('queued', 'sending', 'sent', 'failed')",
+            name='check_outbound_email_status'
+        ),
+        db.Index('ix_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self) -> dict:
+        """Convert queued email to dictionary (without the rendered body)."""
+        data = super().to_dict()
+        data.update({
+            'subject': self.subject,
+            'recipients': self.recipients,
+            'template': self.template,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'last_error': self.last_error
+        })
+        return data
+
+    def __repr__(self):
+        return f'<OutboundEmail {self.id}: {self.status}>'
@@ -1,9 +1,21 @@
 from datetime import datetime
+from sqlalchemy import inspect
 from app.core.extensions import db
 from app.models.base import BaseModel
+from app.models.report_payload import ReportPayload
+
+# Layout version of report_data written by ReportService.generate_daily_report
+REPORT_SCHEMA_VERSION = 1
+
+# Columns that may change after a report is generated; everything else is a snapshot
+MUTABLE_FIELDS = ('is_public', 'public_token', 'updated_at')
 
 class Report(BaseModel):
-    """Model for storing daily inventory reports."""
+    """Model for storing daily inventory reports.
+    
+    Reports are immutable snapshots: only the generator creates them, and
+    apart from the sharing fields a stored report is never updated.
+    """
     
     __tablename__ = 'reports'
     
@@ -16,9 +28,10 @@ class Report(BaseModel):
     low_stock_items = db.Column(db.Integer, default=0)
     total_sales = db.Column(db.Float, default=0.0)
     total_purchases = db.Column(db.Float, default=0.0)
-    report_data = db.Column(db.JSON)  # Store detailed report data
     is_public = db.Column(db.Boolean, default=False)  # Whether report is publicly accessible
     public_token = db.Column(db.String(64), unique=True)  # Token for public access
+    inventory_version = db.Column(db.String(64))  # Fingerprint of the items the report was built from
+    schema_version = db.Column(db.Integer)  # Layout version of report_data (REPORT_SCHEMA_VERSION)
     
     # Add unique constraint on date and user_id together
     __table_args__ = (
@@ -28,6 +41,9 @@ class Report(BaseModel):
     # Add relationship to User model
     user = db.relationship('User', backref=db.backref('reports', lazy=True))
     
+    # Detailed report data, compressed in its own table and loaded on first access
+    payload = db.relationship(ReportPayload, uselist=False, lazy='select', cascade='all, delete-orphan')
+    
     def __init__(self, **kwargs):
         """Initialize report with given parameters."""
         super().__init__()
@@ -35,6 +51,41 @@ class Report(BaseModel):
             if hasattr(self, key):
                 setattr(self, key, value)
     
+    @property
+    def report_data(self):
+        """Detailed report data, decompressed from the payload on first access."""
+        if '_report_data' not in self.__dict__:
+            self.__dict__['_report_data'] = self.payload.load() if self.payload else None
+        return self.__dict__['_report_data']
+    
+    @report_data.setter
+    def report_data(self, value):
+        if inspect(self).persistent:
+            raise ValueError("Report data cannot be changed once a report is stored")
+        if value is None:
+            self.payload = None
+        else:
+            if self.payload is None:
+                self.payload = ReportPayload()
+            self.payload.store(value)
+        self.__dict__['_report_data'] = value
+    
+    def to_summary_dict(self):
+        """Convert report to a dictionary without the detailed report data."""
+        data = super().to_dict()
+        data.update({
+            'date': self.date.strftime('%Y-%m-%d'),
+            'total_items': self.total_items,
+            'total_value': self.total_value,
+            'expiring_items': self.expiring_items,
+            'expired_items': self.expired_items,
+            'low_stock_items': self.low_stock_items,
+            'total_sales': self.total_sales,
+            'total_purchases': self.total_purchases,
+            'is_public': self.is_public
+        })
+        return data
+    
     def to_dict(self):
         """Convert report to dictionary."""
         data = super().to_dict()
@@ -49,10 +100,23 @@ class Report(BaseModel):
             'total_purchases': self.total_purchases,
             'report_data': self.report_data,
             'is_public': self.is_public,
-            'public_token': self.public_token
+            'public_token': self.public_token,
+            'schema_version': self.schema_version
         })
         return data
     
     def __repr__(self):
         """String representation of the report."""
-        return f'<Report {self.date}>' 
\ No newline at end of file
+        return f'<Report {self.date}>'
+
+
+@db.event.listens_for(Report, 'before_update')
+def _reject_snapshot_changes(mapper, connection, target):
+    """Refuse to flush changes to a report's snapshot columns."""
+    state = inspect(target)
+    changed = [
+        column.key for column in mapper.column_attrs
+        if column.key not in MUTABLE_FIELDS and state.attrs[column.key].history.has_changes()
+    ]
+    if changed:
+        raise ValueError(f"Reports are immutable snapshots; cannot change {', '.join(changed)}")
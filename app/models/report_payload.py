@@ -0,0 +1,43 @@
+import json
+import zlib
+from typing import Any, Optional
+from app.core.extensions import db
+
+# Payload encoding identifiers
+ENCODING_ZLIB_JSON = 'zlib+json'
+
+class ReportPayload(db.Model):
+    """Compressed detail data for a report, stored apart from the summary row.
+
+    The per-item risk list and category item lists make up most of a report's
+    size. Keeping them in their own table means listing reports never reads
+    them; the payload is loaded and decompressed only when a report's detail
+    is viewed.
+    """
+
+    __tablename__ = 'report_payloads'
+
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), primary_key=True)
+    encoding = db.Column(db.String(20), nullable=False, default=ENCODING_ZLIB_JSON)
+    data = db.Column(db.LargeBinary, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False, default=0)
+
+    def store(self, value: Any) -> None:
+        """Replace the payload with the compressed form of value."""
+        raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        self.encoding = ENCODING_ZLIB_JSON
+        self.data = zlib.compress(raw, 6)
+        self.raw_size = len(raw)
+
+    def load(self) -> Optional[Any]:
+        """Decompress and parse the payload."""
+        if self.data is None:
+            return None
+        return json.loads(zlib.decompress(self.data).decode('utf-8'))
+
+    @property
+    def compressed_size(self) -> int:
+        return len(self.data or b'')
+
+    def __repr__(self):
+        return f'<ReportPayload report {self.report_id}: {self.compressed_size}/{self.raw_size} bytes>'
@@ -56,6 +56,9 @@ def dashboard():
         activity_service = ActivityService()
         activities = activity_service.get_recent_activities_for_dashboard(current_user.id, limit=5)
         
+        # Statuses were refreshed above, so the stored scores are current
+        riskiest_items = [item.to_dict() for item in Item.riskiest(current_user.id, limit=5)]
+        
         return render_template('dashboard.html',
                             items=all_items_dict,
                             expiring_items=expiring_items,
@@ -66,7 +69,8 @@ def dashboard():
                             total_expired_value=total_expired_value,
                             total_value=total_value,
                             notifications=notifications,
-                            activities=activities)
+                            activities=activities,
+                            riskiest_items=riskiest_items)
         
     except Exception as e:
         current_app.logger.error(f"Dashboard error: {str(e)}")
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, jsonify, request, current_app, url_for
+from flask import Blueprint, render_template, jsonify, request, current_app, url_for, abort, make_response
 from flask_login import login_required, current_user
 from app.services.report_service import ReportService
+from app.services.public_report_cache import public_report_cache
 from app.core.extensions import db
 
 reports_bp = Blueprint('reports', __name__)
@@ -25,4 +26,37 @@ def view_report(report_id):
     report = report_service.get_report(report_id)
     if not report or report.user_id != current_user.id:
         return jsonify({'error': 'Report not found'}), 404
-    return render_template('view_report.html', report=report, is_public=report.is_public) 
\ No newline at end of file
+    return render_template('view_report.html', report=report, is_public=report.is_public)
+
+@reports_bp.route('/reports/shared/<token>')
+def shared_report(token):
+    """View a report through its public link."""
+    # One indexed lookup per view, so a link revoked through any worker stops working at once
+    share = report_service.get_public_report_version(token)
+    if share is None:
+        abort(404)
+    report_id, version = share
+    
+    page = public_report_cache.get(token, version)
+    if page is None:
+        report = report_service.get_report(report_id)
+        if not report:
+            abort(404)
+        # Rendered without the app layout so the page is the same for every viewer
+        page = public_report_cache.put(
+            token,
+            report.id,
+            version,
+            render_template('view_report.html', report=report, is_public=True, shared=True)
+        )
+    
+    response = make_response(page.body)
+    response.mimetype = 'text/html'
+    response.set_etag(page.etag)
+    response.cache_control.public = True
+    max_age = current_app.config.get('REPORT_PUBLIC_MAX_AGE', 0)
+    if max_age > 0:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True  # Revalidate every view; an unchanged page is a 304
+    return response.make_conditional(request)
@@ -0,0 +1,303 @@
+"""Persistent outbound email queue drained by a background worker pool."""
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from flask import Flask
+from flask_mail import Message
+from app.core.extensions import db, mail
+from app.core.metrics import metrics
+from app.models.outbound_email import (
+    OutboundEmail, EMAIL_QUEUED, EMAIL_SENDING, EMAIL_SENT, EMAIL_FAILED
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """Return True if an SMTP error is worth retrying later."""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    # Socket level failures (timeouts, refused connections, resets)
+    return isinstance(error, OSError)
+
+
+class EmailQueue:
+    """Outbound email queue backed by the ``outbound_emails`` table.
+
+    Messages are rendered by the caller and stored as rows. Worker threads
+    claim due rows in batches, send each batch over a single SMTP connection
+    opened with ``mail.connect()``, and reschedule transient failures with
+    exponential backoff.
+    """
+
+    def __init__(self) -> None:
+        self.app: Optional[Flask] = None
+        self._workers: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._send_seconds = metrics.histogram('email_queue.send_seconds')
+        self._queue_seconds = metrics.histogram(
+            'email_queue.queue_seconds',
+            buckets=(1, 5, 15, 30, 60, 300, 900, 3600, 14400)
+        )
+        self._sent = metrics.counter('email_queue.sent')
+        self._retried = metrics.counter('email_queue.retried')
+        self._failed = metrics.counter('email_queue.failed')
+        self._enqueued = metrics.counter('email_queue.enqueued')
+
+    def init_app(self, app: Flask) -> None:
+        """Bind the queue to an application and start workers if enabled."""
+        self.app = app
+        app.extensions['email_queue'] = self
+        metrics.gauge('email_queue.depth', self.depth)
+        if self.enabled and not app.config.get('TESTING', False):
+            self._ensure_workers()
+
+    @property
+    def enabled(self) -> bool:
+        return self.app is not None and bool(self.app.config.get('EMAIL_QUEUE_ENABLED', False))
+
+    def _config(self, key: str, default):
+        if self.app is None:
+            return default
+        return self.app.config.get(key, default)
+
+    def enqueue(
+        self,
+        subject: str,
+        recipients: List[str],
+        html: str,
+        sender: str,
+        template: Optional[str] = None
+    ) -> int:
+        """Persist a rendered message and wake a worker.
+
+        The row is written and committed in a session of its own, so the
+        caller's ``db.session`` is neither committed nor rolled back here:
+        pending changes the message depends on (a verification code, say)
+        stay the caller's to commit, and survive a failed enqueue.
+
+        Returns:
+            int: ID of the queued email
+        """
+        email = OutboundEmail()
+        email.subject = subject
+        email.recipients = list(recipients)
+        email.html = html
+        email.sender = sender
+        email.template = template
+        email.status = EMAIL_QUEUED
+        email.attempts = 0
+        email.next_attempt_at = datetime.utcnow()
+
+        session = db.session.session_factory()
+        try:
+            session.add(email)
+            session.commit()
+            email_id = email.id
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        self._enqueued.inc()
+        self._ensure_workers()
+        self._wakeup.set()
+        logger.info(f"Queued email {email_id} ({template}) for {len(recipients)} recipient(s)")
+        return email_id
+
+    def depth(self) -> dict:
+        """Count queued and in-flight emails."""
+        if self.app is None:
+            return {}
+        with self.app.app_context():
+            rows = db.session.query(
+                OutboundEmail.status, db.func.count(OutboundEmail.id)
+            ).filter(
+                OutboundEmail.status.in_([EMAIL_QUEUED, EMAIL_SENDING])
+            ).group_by(OutboundEmail.status).all()
+        counts = {EMAIL_QUEUED: 0, EMAIL_SENDING: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool once per process (restarted after fork)."""
+        with self._lock:
+            pid = os.getpid()
+            if self._pid == pid and any(worker.is_alive() for worker in self._workers):
+                return
+            self._pid = pid
+            self._stop.clear()
+            self._workers = []
+            for index in range(int(self._config('EMAIL_QUEUE_WORKERS', 2))):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'email-queue-{index}',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Started {len(self._workers)} email queue worker(s) in process {pid}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop worker threads; claimed rows are recovered after the claim timeout."""
+        self._stop.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _worker_loop(self) -> None:
+        poll_interval = float(self._config('EMAIL_QUEUE_POLL_INTERVAL', 5))
+        while not self._stop.is_set():
+            processed = 0
+            try:
+                with self.app.app_context():
+                    processed = self.drain_once()
+            except Exception as e:
+                logger.error(f"Email queue worker error: {str(e)}", exc_info=True)
+            if not processed:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+
+    def drain_once(self) -> int:
+        """Claim and send one batch. Must run inside an application context.
+
+        Returns:
+            int: Number of emails claimed
+        """
+        batch = self._claim_batch()
+        if batch:
+            self._send_batch(batch)
+        return len(batch)
+
+    def _claim_batch(self) -> List[OutboundEmail]:
+        now = datetime.utcnow()
+        batch_size = int(self._config('EMAIL_QUEUE_BATCH_SIZE', 20))
+        claim_timeout = int(self._config('EMAIL_QUEUE_CLAIM_TIMEOUT', 300))
+        token = uuid.uuid4().hex
+
+        try:
+            # Recover rows claimed by a worker that died mid-batch
+            OutboundEmail.query.filter(
+                OutboundEmail.status == EMAIL_SENDING,
+                OutboundEmail.claimed_at < now - timedelta(seconds=claim_timeout)
+            ).update({'status': EMAIL_QUEUED, 'claim_token': None}, synchronize_session=False)
+
+            candidate_ids = [
+                row.id for row in db.session.query(OutboundEmail.id).filter(
+                    OutboundEmail.status == EMAIL_QUEUED,
+                    OutboundEmail.next_attempt_at <= now
+                ).order_by(OutboundEmail.next_attempt_at).limit(batch_size).all()
+            ]
+            if not candidate_ids:
+                db.session.commit()
+                return []
+
+            # Only rows still queued are claimed, so concurrent workers never share a row
+            OutboundEmail.query.filter(
+                OutboundEmail.id.in_(candidate_ids),
+                OutboundEmail.status == EMAIL_QUEUED
+            ).update({
+                'status': EMAIL_SENDING,
+                'claim_token': token,
+                'claimed_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return OutboundEmail.query.filter_by(claim_token=token, status=EMAIL_SENDING).order_by(OutboundEmail.id).all()
+
+    def _send_batch(self, batch: List[OutboundEmail]) -> None:
+        try:
+            with mail.connect() as connection:
+                for index, email in enumerate(batch):
+                    msg = Message(
+                        subject=email.subject,
+                        recipients=list(email.recipients),
+                        sender=email.sender,
+                        html=email.html
+                    )
+                    started = time.perf_counter()
+                    try:
+                        connection.send(msg)
+                    except Exception as send_error:
+                        self._record_failure(email, send_error)
+                        if is_transient_smtp_error(send_error):
+                            # The connection is probably unusable; hand the rest back untouched
+                            self._release(batch[index + 1:])
+                            break
+                        continue
+
+                    self._send_seconds.observe(time.perf_counter() - started)
+                    if email.created_at:
+                        self._queue_seconds.observe((datetime.utcnow() - email.created_at).total_seconds())
+                    email.status = EMAIL_SENT
+                    email.sent_at = datetime.utcnow()
+                    email.claim_token = None
+                    email.last_error = None
+                    db.session.commit()
+                    self._sent.inc()
+        except Exception as e:
+            # Connection setup or teardown failed; only unsent rows need attention
+            pending = [email for email in batch if email.status == EMAIL_SENDING]
+            if pending:
+                logger.error(f"SMTP connection error, rescheduling {len(pending)} email(s): {str(e)}")
+                for email in pending:
+                    self._record_failure(email, e)
+            else:
+                logger.warning(f"Error closing SMTP connection: {str(e)}")
+
+    def _release(self, emails: List[OutboundEmail]) -> None:
+        """Return claimed rows to the queue without counting an attempt."""
+        for email in emails:
+            email.status = EMAIL_QUEUED
+            email.claim_token = None
+        db.session.commit()
+
+    def _record_failure(self, email: OutboundEmail, error: Exception) -> None:
+        max_attempts = int(self._config('EMAIL_QUEUE_MAX_ATTEMPTS', 5))
+        backoff = float(self._config('EMAIL_QUEUE_BACKOFF_SECONDS', 30))
+        backoff_max = float(self._config('EMAIL_QUEUE_BACKOFF_MAX_SECONDS', 3600))
+
+        email.attempts = (email.attempts or 0) + 1
+        email.last_error = f"{error.__class__.__name__}: {str(error)}"[:500]
+        email.claim_token = None
+
+        if is_transient_smtp_error(error) and email.attempts < max_attempts:
+            delay = min(backoff_max, backoff * (2 ** (email.attempts - 1)))
+            delay *= 1 + random.random() * 0.25  # Jitter so retries don't stampede
+            email.status = EMAIL_QUEUED
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            self._retried.inc()
+            logger.warning(f"Transient error sending email {email.id}, retry {email.attempts} in {delay:.0f}s: {email.last_error}")
+        else:
+            email.status = EMAIL_FAILED
+            self._failed.inc()
+            logger.error(f"Giving up on email {email.id} after {email.attempts} attempt(s): {email.last_error}")
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Failed to record email failure: {str(e)}")
+            db.session.rollback()
+
+
+email_queue = EmailQueue()
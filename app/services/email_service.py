@@ -1,6 +1,8 @@
-from flask import current_app, render_template
+from flask import current_app
 from flask_mail import Message
 from app.core.extensions import mail
+from app.services.email_queue import email_queue
+from app.services.email_templates import email_templates
 from app.models.user import User
 from typing import List, Dict, Any, Optional, Union, Literal
 import logging
@@ -37,12 +39,12 @@ class EmailService:
             **kwargs: Additional arguments to pass to the template
             
         Returns:
-            bool: True if email was sent successfully, False otherwise
+            bool: True if email was sent (or queued for delivery) successfully, False otherwise
         """
         try:
-            logger.info(f"Preparing to send email to {recipients}")
-            logger.info(f"Using template: {template}")
-            logger.info(f"Template kwargs: {kwargs}")
+            logger.info(f"Preparing to send email to {recipients} using template {template}")
+            # Context can hold every item of a digest, so only log its keys
+            logger.debug(f"Template context keys: {sorted(kwargs)}")
             
             # Verify email configuration
             if not all([
@@ -66,20 +68,30 @@ class EmailService:
             )
             
             # Log email configuration
-            logger.info(f"Mail server: {current_app.config['MAIL_SERVER']}")
-            logger.info(f"Mail port: {current_app.config['MAIL_PORT']}")
-            logger.info(f"Mail use TLS: {current_app.config['MAIL_USE_TLS']}")
-            logger.info(f"Mail username: {current_app.config['MAIL_USERNAME']}")
+            logger.debug(f"Mail server: {current_app.config['MAIL_SERVER']}:{current_app.config['MAIL_PORT']}")
+            logger.debug(f"Mail use TLS: {current_app.config['MAIL_USE_TLS']}")
             
             try:
-                template_path = f'emails/{template}.html'
-                logger.info(f"Attempting to render template: {template_path}")
-                msg.html = render_template(template_path, **kwargs)
-                logger.info("Email template rendered successfully")
+                # Precompiled template; shared sections come from the per-job cache
+                msg.html = email_templates.render(template, **kwargs)
             except Exception as template_error:
-                logger.error(f"Error rendering email template {template_path}: {str(template_error)}", exc_info=True)
+                logger.error(f"Error rendering email template emails/{template}.html: {str(template_error)}", exc_info=True)
                 return False
             
+            # Hand off to the outbound queue so the caller doesn't wait on SMTP
+            if email_queue.enabled:
+                try:
+                    email_queue.enqueue(
+                        subject=subject,
+                        recipients=recipients,
+                        html=msg.html,
+                        sender=current_app.config['MAIL_DEFAULT_SENDER'],
+                        template=template
+                    )
+                    return True
+                except Exception as queue_error:
+                    logger.error(f"Failed to queue email, sending inline: {str(queue_error)}")
+            
             try:
                 self.mail.send(msg)
                 logger.info(f"Email sent successfully to {recipients}")
@@ -0,0 +1,131 @@
+"""Precompiled email templates with timed rendering and per-job section caching."""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+import threading
+import time
+from flask import Flask, current_app, render_template
+from jinja2 import Template
+from markupsafe import Markup
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Templates compiled when a worker starts
+EMAIL_TEMPLATES = (
+    'verify_email',
+    'reset_password',
+    'daily_notification',
+    'password_reset_confirmation'
+)
+
+# Sections that don't depend on the recipient, rendered from emails/partials/<template>_<section>.html
+SHARED_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    'daily_notification': ('header', 'action', 'footer')
+}
+
+
+class EmailTemplateCache:
+    """Holds compiled email templates and renders them with timing.
+
+    Templates are compiled once per worker by :meth:`warm`, so sending does
+    not go through the loader. Sections shared by every recipient are
+    rendered once per :meth:`render_scope` (typically one notification job)
+    and passed to the template as ``shared``.
+    """
+
+    def __init__(self) -> None:
+        self._templates: Dict[str, Template] = {}
+        self._shared: Optional[Dict[str, Dict[str, Markup]]] = None
+        self._scope_depth = 0
+        self._lock = threading.Lock()
+        self._render_seconds = metrics.histogram(
+            'email.render_seconds',
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+        )
+
+    def init_app(self, app: Flask) -> None:
+        """Compile the email templates for this worker."""
+        app.extensions['email_templates'] = self
+        if app.config.get('EMAIL_TEMPLATE_WARMUP', True):
+            self.warm(app)
+
+    def warm(self, app: Flask) -> None:
+        """Compile every email template and partial up front."""
+        started = time.perf_counter()
+        names = list(EMAIL_TEMPLATES)
+        for template, sections in SHARED_SECTIONS.items():
+            names.extend(f'partials/{template}_{section}' for section in sections)
+
+        for name in names:
+            try:
+                self._templates[name] = app.jinja_env.get_template(f'emails/{name}.html')
+            except Exception as e:
+                logger.error(f"Failed to compile email template {name}: {str(e)}")
+        logger.info(f"Compiled {len(self._templates)} email template(s) in {time.perf_counter() - started:.3f}s")
+
+    def get_template(self, name: str) -> Template:
+        """Return the compiled template, loading it if it wasn't warmed."""
+        if current_app.jinja_env.auto_reload:
+            # Let Jinja pick up edits during development
+            return current_app.jinja_env.get_template(f'emails/{name}.html')
+        template = self._templates.get(name)
+        if template is None:
+            template = current_app.jinja_env.get_template(f'emails/{name}.html')
+            self._templates[name] = template
+        return template
+
+    def render(self, name: str, **context) -> str:
+        """Render an email template and record the render time.
+
+        Args:
+            name: Template name without the ``emails/`` prefix and extension
+            **context: Template variables
+
+        Returns:
+            str: Rendered HTML
+        """
+        if name in SHARED_SECTIONS and 'shared' not in context:
+            context['shared'] = self.shared_sections(name)
+
+        started = time.perf_counter()
+        try:
+            return render_template(self.get_template(name), **context)
+        finally:
+            self._render_seconds.observe(time.perf_counter() - started)
+
+    def shared_sections(self, name: str) -> Dict[str, Markup]:
+        """Render the recipient-independent sections of a template.
+
+        Inside a :meth:`render_scope` the result is cached, so a job renders
+        each section once no matter how many emails it sends.
+        """
+        with self._lock:
+            if self._shared is not None and name in self._shared:
+                return self._shared[name]
+
+            sections = {
+                section: Markup(render_template(self.get_template(f'partials/{name}_{section}')))
+                for section in SHARED_SECTIONS.get(name, ())
+            }
+            if self._shared is not None:
+                self._shared[name] = sections
+            return sections
+
+    @contextmanager
+    def render_scope(self) -> Iterator[None]:
+        """Cache shared sections until the outermost scope exits."""
+        with self._lock:
+            if self._scope_depth == 0:
+                self._shared = {}
+            self._scope_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._scope_depth -= 1
+                if self._scope_depth == 0:
+                    self._shared = None
+
+
+email_templates = EmailTemplateCache()
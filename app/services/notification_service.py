@@ -3,13 +3,15 @@ from typing import List, Optional, Union, Dict, Any, Literal, TypedDict, Sequenc
 from flask import current_app
 from app.core.extensions import db
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.models.digest_delivery import DigestDelivery, DELIVERY_SENT
 from app.models.item import Item, STATUS_EXPIRED
 from app.models.user import User
 from app.services.email_service import EmailService
 from app.services.activity_service import ActivityService
-from sqlalchemy import and_, not_, or_
+from sqlalchemy import not_, or_, func
 from sqlalchemy.sql import expression
-from sqlalchemy.sql.expression import BinaryExpression, ColumnElement
+from sqlalchemy.sql.expression import BinaryExpression
 
 class ItemNotification(TypedDict):
     name: str
@@ -56,63 +58,16 @@ class NotificationService:
             
             current_app.logger.info("Found %d items to check for notifications", len(items))
             
-            # Group items by user
-            user_items: Dict[int, List[Dict[str, Any]]] = {}
-            
-            for item in items:
-                days_until_expiry = item.days_until_expiry
-                if days_until_expiry is None:
-                    current_app.logger.debug(f"Skipping item {item.id} - No expiry date")
-                    continue
-                    
-                # Process all items for daily notification
-                if item.user_id not in user_items:
-                    user_items[item.user_id] = []
-                
-                # Set priority based on days until expiry
-                if days_until_expiry < 0:  # Already expired
-                    priority = 'high'
-                    # Log expiry alert for expired items
-                    self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
-                elif days_until_expiry <= 1:  # Today or tomorrow
-                    priority = 'high'
-                    # Log expiry alert for urgent items
-                    self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
-                elif 2 <= days_until_expiry <= 7:  # 2-7 days
-                    priority = 'normal'
-                    # Log expiry alert for items expiring soon
-                    self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
-                else:  # 8+ days
-                    priority = 'low'
-                
-                user_items[item.user_id].append({
-                    'id': item.id,
-                    'name': item.name,
-                    'days_until_expiry': days_until_expiry,
-                    'expiry_date': item.expiry_date,
-                    'priority': priority
-                })
-                current_app.logger.debug(f"Added item {item.id} ({item.name}) to notifications - Days until expiry: {days_until_expiry}, Priority: {priority}")
-            
             # Send email notifications to each user
-            for user_id, items in user_items.items():
+            for user_id, user_items in self._group_items_by_user(items).items():
                 user = User.query.get(user_id)
                 current_app.logger.info(f"Processing notifications for user {user_id}")
                 
                 if not user:
                     current_app.logger.warning(f"User {user_id} not found")
                     continue
-                    
-                if not user.email:
-                    current_app.logger.warning(f"User {user_id} has no email address")
-                    continue
-                    
-                if not user.email_notifications:
-                    current_app.logger.info(f"User {user_id} ({user.email}) has disabled email notifications")
-                    continue
                 
-                current_app.logger.info(f"Attempting to send notification to user {user.username} ({user.email}) for {len(items)} items")
-                self.send_daily_notification_email(user, items)
+                self.notify_user(user, user_items)
             
             current_app.logger.info("Completed expiry date check at %s", datetime.now())
             
@@ -120,8 +75,97 @@ class NotificationService:
             current_app.logger.error(f"Error checking expiry dates: {str(e)}")
             raise
     
-    def send_daily_notification_email(self, user: User, items: List[Dict[str, Any]]) -> bool:
-        """Send a daily notification email to a user about their items."""
+    def check_expiry_dates_for_users(self, users: Sequence[User]) -> Dict[int, bool]:
+        """Check expiry dates for a batch of users with a single item query.
+        
+        Args:
+            users: Users to notify, typically one batch of a job shard
+            
+        Returns:
+            Mapping of user ID to whether a notification was sent
+        """
+        if not users:
+            return {}
+        
+        users_by_id = {user.id: user for user in users}
+        items = Item.query.filter(
+            cast(BinaryExpression, Item.expiry_date.isnot(None)),
+            Item.user_id.in_(list(users_by_id))
+        ).order_by(Item.user_id).all()
+        
+        current_app.logger.info("Found %d items to check for %d users", len(items), len(users))
+        
+        results: Dict[int, bool] = {}
+        for user_id, user_items in self._group_items_by_user(items).items():
+            results[user_id] = self.notify_user(users_by_id[user_id], user_items)
+        return results
+    
+    def notify_user(self, user: User, items: List[Dict[str, Any]]) -> bool:
+        """Send the daily notification to a user if they can receive email."""
+        if not user.email:
+            current_app.logger.warning(f"User {user.id} has no email address")
+            return False
+            
+        if not user.email_notifications:
+            current_app.logger.info(f"User {user.id} ({user.email}) has disabled email notifications")
+            return False
+        
+        current_app.logger.info(f"Attempting to send notification to user {user.username} ({user.email}) for {len(items)} items")
+        return self.send_daily_notification_email(user, items)
+    
+    def _group_items_by_user(self, items: Sequence[Item]) -> Dict[int, List[Dict[str, Any]]]:
+        """Build notification entries for items and group them by user."""
+        user_items: Dict[int, List[Dict[str, Any]]] = {}
+        
+        for item in items:
+            days_until_expiry = item.days_until_expiry
+            if days_until_expiry is None:
+                current_app.logger.debug(f"Skipping item {item.id} - No expiry date")
+                continue
+                
+            # Process all items for daily notification
+            if item.user_id not in user_items:
+                user_items[item.user_id] = []
+            
+            # Set priority based on days until expiry
+            if days_until_expiry < 0:  # Already expired
+                priority = 'high'
+                # Log expiry alert for expired items
+                self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
+            elif days_until_expiry <= 1:  # Today or tomorrow
+                priority = 'high'
+                # Log expiry alert for urgent items
+                self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
+            elif 2 <= days_until_expiry <= 7:  # 2-7 days
+                priority = 'normal'
+                # Log expiry alert for items expiring soon
+                self.activity_service.log_expiry_alert(item.user_id, item.name, days_until_expiry)
+            else:  # 8+ days
+                priority = 'low'
+            
+            user_items[item.user_id].append({
+                'id': item.id,
+                'name': item.name,
+                'days_until_expiry': days_until_expiry,
+                'expiry_date': item.expiry_date,
+                'priority': priority
+            })
+            current_app.logger.debug(f"Added item {item.id} ({item.name}) to notifications - Days until expiry: {days_until_expiry}, Priority: {priority}")
+        
+        return user_items
+    
+    def send_daily_notification_email(self, user: User, items: List[Dict[str, Any]], force: bool = False) -> bool:
+        """Send a daily notification email to a user about their items.
+        
+        Delivery is recorded in the digest ledger so each user gets at most one
+        digest per day, even across job retries and parallel workers.
+        
+        Args:
+            user: User to notify
+            items: Item notification entries
+            force: Send even if today's digest was already delivered (used for test sends)
+        """
+        delivery = None
         try:
             if not items:
                 current_app.logger.info(f"No items to notify about for user {user.email}")
@@ -130,21 +174,15 @@ class NotificationService:
             # Sort items by days until expiry
             items.sort(key=lambda x: x['days_until_expiry'])
             
-            # Check if notification already sent today
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            existing_notification = Notification.query.filter(
-                and_(
-                    cast(ColumnElement[bool], Notification.user_id == user.id),
-                    cast(ColumnElement[bool], Notification.created_at >= today_start),
-                    cast(ColumnElement[bool], Notification.type == 'email'),
-                    cast(ColumnElement[bool], Notification.status == 'sent'),
-                    cast(ColumnElement[bool], Notification.message.like('Daily status update sent for% items%'))
-                )
-            ).first()
-            
-            if existing_notification:
-                current_app.logger.info(f"Daily notification already sent to {user.email} today at {existing_notification.created_at}")
-                return True
+            # Claim today's digest; a unique index makes this a single lookup
+            if not force:
+                delivery, already_sent = DigestDelivery.claim(user.id, datetime.now().date(), 'email')
+                if already_sent:
+                    current_app.logger.info(f"Daily notification already sent to {user.email} today")
+                    return True
+                if delivery is None:
+                    current_app.logger.info(f"Daily notification for {user.email} is being sent by another worker")
+                    return True
             
             current_app.logger.info(f"Preparing to send notification email to {user.email} for {len(items)} items")
             
@@ -152,6 +190,10 @@ class NotificationService:
             subject = "Expiry Tracker - Daily Item Status Update"
             template = 'daily_notification'
             
+            if delivery is not None:
+                # Flushed with the queued email so both commit together
+                delivery.status = DELIVERY_SENT
+            
             # Send email
             result = self.email_service.send_email(
                 subject=subject,
@@ -162,6 +204,9 @@ class NotificationService:
             )
             
             if result:
+                if delivery is not None:
+                    delivery.mark_sent(len(items))
+                
                 current_app.logger.info(f"Successfully sent notification email to {user.email}")
                 
                 # Log activity for notification sent
@@ -186,13 +231,26 @@ class NotificationService:
                     current_app.logger.error(f"Failed to create notification record for user {user.email}")
             else:
                 current_app.logger.error(f"Failed to send notification email to {user.email}")
+                self._release_delivery(delivery)
             
             return result
             
         except Exception as e:
             current_app.logger.error(f"Error sending daily notification email to {user.email}: {str(e)}")
+            self._release_delivery(delivery)
             return False
     
+    def _release_delivery(self, delivery: Optional[DigestDelivery]) -> None:
+        """Release an unsent digest claim so a retry can deliver it."""
+        if delivery is None:
+            return
+        try:
+            db.session.rollback()
+            if delivery.status != DELIVERY_SENT:
+                delivery.release()
+        except Exception as e:
+            current_app.logger.error(f"Failed to release digest claim: {str(e)}")
+    
     def create_notification(
         self,
         user_id: int,
@@ -225,6 +283,12 @@ class NotificationService:
         
         try:
             db.session.add(notification)
+            if type == 'email':
+                NotificationCounter.adjust(
+                    user_id,
+                    pending=1 if status == 'pending' else 0,
+                    sent=1 if status == 'sent' else 0
+                )
             db.session.commit()
             return notification
         except Exception as e:
@@ -308,6 +372,84 @@ class NotificationService:
             current_app.logger.error(f"Error getting notification count: {str(e)}")
             return 0
     
+    def get_notification_stats(self, user_id: int) -> Dict[str, int]:
+        """Get sent, pending and total notification counts for a user.
+        
+        With ``NOTIFICATION_COUNTER_CACHE`` enabled this is a primary-key
+        lookup on the user's counter row, seeded from the notifications on
+        first use; otherwise the counts come from one grouped aggregate.
+        
+        Args:
+            user_id: The ID of the user to get statistics for
+            
+        Returns:
+            Dictionary with 'sent', 'pending' and 'total' counts
+        """
+        try:
+            counter = None
+            if current_app.config.get('NOTIFICATION_COUNTER_CACHE', True):
+                counter = db.session.get(NotificationCounter, user_id) or NotificationCounter.seed(user_id)
+            
+            if counter is None:
+                rows = db.session.query(
+                    Notification.status, func.count(Notification.id)
+                ).filter(
+                    Notification.user_id == user_id,
+                    Notification.type == 'email'
+                ).group_by(Notification.status).all()
+                counts = {status: count for status, count in rows}
+                pending, sent = counts.get('pending', 0), counts.get('sent', 0)
+            else:
+                pending, sent = counter.pending, counter.sent
+            
+            return {'sent': sent, 'pending': pending, 'total': sent + pending}
+        except Exception as e:
+            current_app.logger.error(f"Error getting notification stats: {str(e)}")
+            db.session.rollback()
+            return {'sent': 0, 'pending': 0, 'total': 0}
+    
+    def get_unread_count(self, user_id: int) -> int:
+        """Get the number of unread (pending) notifications for a user."""
+        return self.get_notification_stats(user_id)['pending']
+    
+    def mark_all_notifications_read(self, user_id: int) -> int:
+        """Mark all pending notifications as read and update the counter cache.
+        
+        Args:
+            user_id: The ID of the user whose notifications to mark
+            
+        Returns:
+            Number of notifications marked as read
+        """
+        try:
+            updated = Notification.query.filter_by(
+                user_id=user_id,
+                type='email',
+                status='pending'
+            ).update({'status': 'sent'}, synchronize_session=False)
+            NotificationCounter.adjust(user_id, pending=-updated, sent=updated)
+            db.session.commit()
+            return updated
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def _paginate(self, query, page: int, per_page: int) -> tuple[List[Notification], int]:
+        """Fetch one page and the total match count in a single query.
+        
+        The total comes from a ``COUNT(*) OVER ()`` window column, so only an
+        out-of-range page needs a separate count.
+        """
+        rows = query.add_columns(
+            func.count(Notification.id).over().label('total_count')
+        ).order_by(
+            Notification.created_at.desc()
+        ).offset((page - 1) * per_page).limit(per_page).all()
+        
+        if rows:
+            return [row[0] for row in rows], rows[0][1]
+        return [], query.count() if page > 1 else 0
+    
     def get_user_notifications_paginated(self, user_id: int, page: int = 1, per_page: int = 20, show_sent: bool = False, search: Optional[str] = None, search_mode: str = 'message') -> tuple[List[Notification], int]:
         """Get paginated notifications for a specific user.
         
@@ -361,15 +503,7 @@ class NotificationService:
                         # Fallback to no results if date parsing fails
                         query = query.filter(Notification.id == -1)  # Impossible condition
             
-            # Get total count
-            total_count = query.count()
-            
-            # Get paginated results
-            notifications = query.order_by(
-                Notification.created_at.desc()
-            ).offset((page - 1) * per_page).limit(per_page).all()
-            
-            return notifications, total_count
+            return self._paginate(query, page, per_page)
         except Exception as e:
             current_app.logger.error(f"Error getting paginated user notifications: {str(e)}")
             return [], 0
@@ -425,15 +559,7 @@ class NotificationService:
                         # Fallback to no results if date parsing fails
                         query = query.filter(Notification.id == -1)  # Impossible condition
             
-            # Get total count
-            total_count = query.count()
-            
-            # Get paginated results
-            notifications = query.order_by(
-                Notification.created_at.desc()
-            ).offset((page - 1) * per_page).limit(per_page).all()
-            
-            return notifications, total_count
+            return self._paginate(query, page, per_page)
         except Exception as e:
             current_app.logger.error(f"Error getting all paginated user notifications: {str(e)}")
             return [], 0 
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""OCR engines behind one interface.
+
+A backend turns an encoded image into lines of text; finding the date in
+that text is shared by all of them (see ``DateOCRService``). ``OCR_BACKEND``
+selects the engine: Azure Computer Vision, a local Tesseract install, or a
+deterministic fake for tests and benchmarks. Engine SDKs are imported when
+a backend is built, so importing this module stays cheap.
+"""
+import hashlib
+import json
+import os
+from io import SEEK_CUR, SEEK_END, SEEK_SET, BytesIO, RawIOBase
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+ImageBuffer = Union[bytes, bytearray, memoryview]
+
+
+class BufferReader(RawIOBase):
+    """Seekable file object over a buffer, for clients that upload from a stream.
+
+    ``BytesIO`` copies anything but ``bytes`` on construction; this reads
+    the caller's buffer (a memory-mapped upload, an encoder's output) in
+    place, one chunk at a time.
+    """
+
+    def __init__(self, data: ImageBuffer) -> None:
+        super().__init__()
+        self._view = memoryview(data).cast('B')
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), len(self._view) - self._position))
+        memoryview(buffer).cast('B')[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        base = {SEEK_SET: 0, SEEK_CUR: self._position, SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class OCRBackend:
+    """Base class for OCR engines."""
+
+    name = 'base'
+
+    @property
+    def available(self) -> bool:
+        """Whether the engine is configured and can be called."""
+        return True
+
+    def recognize(self, image_data: ImageBuffer, source_id: Optional[str] = None) -> List[str]:
+        """Read the text lines in an encoded image.
+
+        Args:
+            image_data: Encoded (preprocessed) image; bytes or any buffer,
+                which backends read without copying where they can
+            source_id: SHA-256 hex digest of the original upload; backends
+                that do not need it ignore it
+
+        Returns:
+            list: Text lines in reading order
+        """
+        raise NotImplementedError
+
+    def check(self) -> None:
+        """Raise if the engine cannot be reached."""
+        if not self.available:
+            raise RuntimeError(f"OCR backend '{self.name}' is not configured")
+
+
+class AzureOCRBackend(OCRBackend):
+    """Azure Computer Vision printed-text recognition."""
+
+    name = 'azure'
+
+    def __init__(self, subscription_key: Optional[str] = None, endpoint: Optional[str] = None) -> None:
+        self.subscription_key = subscription_key
+        self.endpoint = endpoint
+        self.client = None
+        if subscription_key and endpoint:
+            from azure.cognitiveservices.vision.computervision import ComputerVisionClient
+            from msrest.authentication import CognitiveServicesCredentials
+
+            if not endpoint.endswith('/'):
+                self.endpoint = endpoint + '/'
+            self.client = ComputerVisionClient(
+                endpoint=self.endpoint,
+                credentials=CognitiveServicesCredentials(subscription_key)
+            )
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def recognize(self, image_data: ImageBuffer, source_id: Optional[str] = None) -> List[str]:
+        if self.client is None:
+            raise RuntimeError("Azure Computer Vision credentials are not configured")
+        from azure.cognitiveservices.vision.computervision.models import OcrResult
+
+        result = self.client.recognize_printed_text_in_stream(image=BufferReader(image_data))
+        if not isinstance(result, OcrResult):
+            raise RuntimeError("Invalid OCR result type")
+
+        lines: List[str] = []
+        for region in result.regions or []:
+            for line in getattr(region, 'lines', None) or []:
+                words = getattr(line, 'words', None) or []
+                lines.append(' '.join(word.text for word in words))
+        return lines
+
+    def check(self) -> None:
+        super().check()
+        self.client.recognize_printed_text_in_stream(image=BytesIO(b'connection-test'))
+
+
+class TesseractOCRBackend(OCRBackend):
+    """Local Tesseract engine through the optional ``pytesseract`` package."""
+
+    name = 'tesseract'
+
+    def __init__(self, config: str = '--psm 6', lang: str = 'eng') -> None:
+        self.config = config
+        self.lang = lang
+        try:
+            import pytesseract
+        except ImportError:
+            pytesseract = None
+        self._pytesseract = pytesseract
+
+    @property
+    def available(self) -> bool:
+        return self._pytesseract is not None
+
+    def recognize(self, image_data: ImageBuffer, source_id: Optional[str] = None) -> List[str]:
+        if self._pytesseract is None:
+            raise RuntimeError("Tesseract OCR requires the pytesseract package")
+        import cv2
+        import numpy as np
+
+        image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError("Image data could not be decoded")
+        text = self._pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+    def check(self) -> None:
+        super().check()
+        self._pytesseract.get_tesseract_version()
+
+
+class FakeOCRBackend(OCRBackend):
+    """Deterministic backend returning canned transcripts.
+
+    Args:
+        transcripts: Text per upload, keyed by the SHA-256 of the original
+            image bytes
+        default: Text returned for uploads without a transcript
+    """
+
+    name = 'fake'
+
+    def __init__(self, transcripts: Optional[Mapping[str, Any]] = None, default: str = '') -> None:
+        self.transcripts: Dict[str, Any] = dict(transcripts or {})
+        self.default = default
+
+    def add(self, image_data: bytes, text: Any) -> None:
+        """Register the transcript of an upload."""
+        self.transcripts[hashlib.sha256(image_data).hexdigest()] = text
+
+    def recognize(self, image_data: ImageBuffer, source_id: Optional[str] = None) -> List[str]:
+        text = self.transcripts.get(source_id or hashlib.sha256(image_data).hexdigest(), self.default)
+        lines: Sequence[str] = text.splitlines() if isinstance(text, str) else text
+        return [line for line in lines if line]
+
+
+def create_backend(config: Mapping[str, Any]) -> OCRBackend:
+    """Build the backend named by ``OCR_BACKEND`` from an app config.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = config.get('OCR_BACKEND', 'azure')
+    if name == 'azure':
+        return AzureOCRBackend(config.get('AZURE_VISION_KEY'), config.get('AZURE_VISION_ENDPOINT'))
+    if name == 'tesseract':
+        return TesseractOCRBackend(config.get('OCR_TESSERACT_CONFIG', '--psm 6'), config.get('OCR_TESSERACT_LANG', 'eng'))
+    if name == 'fake':
+        transcripts = {}
+        path = config.get('OCR_FAKE_TRANSCRIPTS')
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                transcripts = json.load(handle)
+        return FakeOCRBackend(transcripts, config.get('OCR_FAKE_TEXT', ''))
+    raise ValueError(f"Unknown OCR backend: {name}")
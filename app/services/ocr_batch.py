@@ -0,0 +1,215 @@
+"""Concurrent date OCR of many images for the batch endpoint."""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from flask import Flask, current_app
+from app.core.metrics import metrics
+from app.core.processes import worker_context
+from app.services.ocr_backends import OCRBackend
+from app.services.ocr_cache import ocr_cache
+
+if TYPE_CHECKING:
+    from app.services.date_ocr_service import DateOCRService
+    from app.services.ocr_preprocessing import PreprocessingPipeline, PreprocessResult
+
+
+class BatchImage(NamedTuple):
+    index: int  # Position of the upload in the request
+    filename: str
+    data: bytes
+
+
+def _init_worker() -> None:
+    """Keep OpenCV single-threaded in each worker; the pool provides the parallelism."""
+    import cv2
+
+    cv2.setNumThreads(1)
+
+
+def _preprocess(pipeline: 'PreprocessingPipeline', image_data: bytes) -> 'PreprocessResult':
+    """Run the pipeline in a worker, returning only what the parent needs.
+
+    Returns:
+        PreprocessResult: The result with the encoded image as bytes and
+            without the decoded image
+    """
+    result = pipeline.run(image_data, record=False)
+    return result._replace(image=None, data=bytes(result.data))
+
+
+class OCRBatchProcessor:
+    """Runs date OCR over many images concurrently and yields results as they finish.
+
+    Preprocessing is CPU-bound and OpenCV holds the GIL for part of it, so it
+    runs in a pool of ``OCR_BATCH_PROCESSES`` worker processes started from a
+    fork server, never forked from the threaded server process (threads when
+    set to 0 or no fork server is available). Backend calls mostly wait on the
+    network and run in a pool of ``OCR_BATCH_THREADS`` threads. Both pools
+    are shared by all requests in a worker process, which bounds the load a
+    burst of batches can put on the CPU and on the OCR service.
+    """
+
+    def __init__(self) -> None:
+        self.max_images = 50
+        self.processes = 2
+        self.threads = 4
+        self._lock = threading.Lock()
+        self._process_pool: Optional[Executor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._images = metrics.counter('ocr.batch.images')
+        self._errors = metrics.counter('ocr.batch.errors')
+        self._seconds = metrics.histogram('ocr.batch.seconds')
+
+    def init_app(self, app: Flask) -> None:
+        """Read the batch limits and pool sizes from the app config."""
+        app.extensions['ocr_batch'] = self
+        self.max_images = app.config.get('OCR_BATCH_MAX_IMAGES', self.max_images)
+        self.processes = app.config.get('OCR_BATCH_PROCESSES', self.processes)
+        self.threads = max(1, app.config.get('OCR_BATCH_THREADS', self.threads))
+
+    def run(self, service: 'DateOCRService', images: Sequence[BatchImage]) -> Iterator[Dict[str, Any]]:
+        """Start OCR of a batch of uploads.
+
+        The backend and pipeline are resolved here, in the request context;
+        the returned generator does the work.
+
+        Returns:
+            generator: One result dict per image, in completion order
+
+        Raises:
+            RuntimeError: If the OCR backend is not available
+        """
+        backend = service.backend
+        if not backend.available:
+            raise RuntimeError(f"OCR backend '{backend.name}' not available")
+        return self._stream(service, backend, service.pipeline, images)
+
+    def shutdown(self) -> None:
+        """Stop both pools; they are recreated on the next batch."""
+        with self._lock:
+            for pool in (self._process_pool, self._thread_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = self._thread_pool = None
+
+    def _stream(
+        self,
+        service: 'DateOCRService',
+        backend: OCRBackend,
+        pipeline: 'PreprocessingPipeline',
+        images: Sequence[BatchImage]
+    ) -> Iterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        process_pool, thread_pool = self._pools()
+
+        # Identical uploads in one batch are read once
+        groups: Dict[str, List[BatchImage]] = {}
+        for image in images:
+            if not image.data:
+                yield self._error(image, 'Empty image file')
+                continue
+            groups.setdefault(hashlib.sha256(image.data).hexdigest(), []).append(image)
+
+        pending: Dict[Future, Tuple[str, str]] = {}
+        for digest, group in groups.items():
+            cached = ocr_cache.get(ocr_cache.content_key(backend.name, digest))
+            if cached is not None:
+                yield from self._results(group, cached.date, cached=True)
+                continue
+            ocr_cache.miss()
+            future = process_pool.submit(_preprocess, pipeline, group[0].data)
+            pending[future] = ('preprocess', digest)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, digest = pending.pop(future)
+                group = groups[digest]
+                keys = [ocr_cache.content_key(backend.name, digest)]
+
+                if stage == 'preprocess':
+                    try:
+                        result = future.result()
+                        pipeline.record(result)
+                        data = result.data
+                    except Exception as e:
+                        if isinstance(e, BrokenProcessPool):
+                            self._reset_process_pool(process_pool)
+                        current_app.logger.warning(f"OCR batch: preprocessing {group[0].filename} failed: {str(e)}")
+                        data = group[0].data  # Original image, as for single uploads
+
+                    recognize = thread_pool.submit(self._recognize, service, backend, data, digest, keys)
+                    pending[recognize] = ('ocr', digest)
+                    continue
+
+                try:
+                    date = future.result()
+                except Exception as e:
+                    current_app.logger.warning(f"OCR batch: recognising {group[0].filename} failed: {str(e)}")
+                    for image in group:
+                        yield self._error(image, f'Error processing image: {str(e)}')
+                    continue
+                yield from self._results(group, date, cached=False)
+
+        self._seconds.observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _recognize(service: 'DateOCRService', backend: OCRBackend, data: bytes, digest: str, keys: List[str]) -> Optional[str]:
+        """Call the backend and cache the result; runs in the thread pool."""
+        text_blocks = backend.recognize(data, digest)
+        full_text = ' '.join(text_blocks)
+        date = service.extract_date_from_text(full_text) if text_blocks else None
+        ocr_cache.put(keys, full_text, date)
+        return date
+
+    def _results(self, group: Sequence[BatchImage], date: Optional[str], cached: bool) -> Iterator[Dict[str, Any]]:
+        for image in group:
+            self._images.inc()
+            if date:
+                yield {'index': image.index, 'filename': image.filename, 'status': 'success', 'date': date, 'cached': cached}
+            else:
+                yield {
+                    'index': image.index, 'filename': image.filename, 'status': 'error',
+                    'message': 'No date found in image', 'cached': cached
+                }
+
+    def _error(self, image: BatchImage, message: str) -> Dict[str, Any]:
+        self._images.inc()
+        self._errors.inc()
+        return {'index': image.index, 'filename': image.filename, 'status': 'error', 'message': message}
+
+    def _pools(self) -> Tuple[Executor, ThreadPoolExecutor]:
+        with self._lock:
+            if self._pool_pid != os.getpid():
+                # Pools do not survive a fork of the server process; start new ones
+                self._process_pool = self._thread_pool = None
+                self._pool_pid = os.getpid()
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='ocr-batch')
+            if self._process_pool is None:
+                context = worker_context() if self.processes > 0 else None
+                if context is not None:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        mp_context=context,
+                        initializer=_init_worker
+                    )
+                else:
+                    self._process_pool = ThreadPoolExecutor(
+                        max_workers=max(1, self.processes), thread_name_prefix='ocr-preprocess'
+                    )
+            return self._process_pool, self._thread_pool
+
+    def _reset_process_pool(self, broken: Executor) -> None:
+        """Drop a pool whose worker died so the next batch starts a fresh one."""
+        with self._lock:
+            if self._process_pool is broken:
+                self._process_pool = None
+
+
+ocr_batch = OCRBatchProcessor()
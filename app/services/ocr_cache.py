@@ -0,0 +1,179 @@
+"""Content-addressed cache of OCR results."""
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from flask import Flask
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CachedOCRResult(NamedTuple):
+    text: str
+    date: Optional[str]
+    stored_at: float
+
+
+class OCRResultCache:
+    """LRU cache of OCR text and dates keyed by image content.
+
+    Keys are the SHA-256 of the uploaded bytes, namespaced by the backend
+    that produced the result. Only identical uploads share a result: a
+    similarity match could hand one label the date printed on another. With
+    ``OCR_CACHE_DIR`` set, entries are also written to disk as a second tier
+    shared by every worker and kept across restarts. Each worker prunes the
+    least recently used files once the directory holds more than
+    ``disk_max_entries``, checking every tenth of that many writes.
+    """
+
+    def __init__(self) -> None:
+        self._entries: 'OrderedDict[str, CachedOCRResult]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.enabled = True
+        self.max_entries = 1024
+        self.directory: Optional[str] = None
+        self.disk_max_entries = 100_000
+        self._disk_writes = 0
+        self._hits = {
+            tier: metrics.counter(f'ocr.cache.hits.{tier}') for tier in ('memory', 'disk')
+        }
+        self._pruned = metrics.counter('ocr.cache.disk_pruned')
+        self._misses = metrics.counter('ocr.cache.misses')
+        metrics.gauge('ocr.cache.entries', lambda: len(self._entries))
+        metrics.gauge('ocr.cache.hit_rate', self.hit_rate)
+
+    def init_app(self, app: Flask) -> None:
+        """Read the cache settings from the app config."""
+        app.extensions['ocr_cache'] = self
+        self.enabled = app.config.get('OCR_CACHE_ENABLED', self.enabled)
+        self.max_entries = app.config.get('OCR_CACHE_SIZE', self.max_entries)
+        self.directory = app.config.get('OCR_CACHE_DIR') or None
+        self.disk_max_entries = app.config.get('OCR_CACHE_DIR_MAX_ENTRIES', self.disk_max_entries)
+
+    @staticmethod
+    def content_key(backend: str, sha256: str) -> str:
+        return f'{backend}-sha256-{sha256}'
+
+    def get(self, key: str) -> Optional[CachedOCRResult]:
+        """Look a key up in memory, then on disk; misses are counted by the caller."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                tier = 'memory'
+        if entry is None:
+            entry = self._read(key)
+            if entry is None:
+                return None
+            tier = 'disk'
+            self._remember(key, entry)
+
+        self._hits[tier].inc()
+        return entry
+
+    def miss(self) -> None:
+        """Record a lookup that no tier could answer."""
+        self._misses.inc()
+
+    def put(self, keys: Sequence[str], text: str, date: Optional[str]) -> CachedOCRResult:
+        """Store a result under every given key."""
+        entry = CachedOCRResult(text, date, time.time())
+        if not self.enabled:
+            return entry
+        for key in keys:
+            self._remember(key, entry)
+            self._write(key, entry)
+        return entry
+
+    def hit_rate(self) -> float:
+        hits = sum(counter.value for counter in self._hits.values())
+        total = hits + self._misses.value
+        return round(hits / total, 4) if total else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, entry: CachedOCRResult) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[-2:], f'{key}.json')
+
+    def _read(self, key: str) -> Optional[CachedOCRResult]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+            os.utime(path)  # Pruning removes the least recently used files first
+            return CachedOCRResult(data['text'], data['date'], data['stored_at'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key: str, entry: CachedOCRResult) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so concurrent readers never see a partial file
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(handle, 'w', encoding='utf-8') as temp:
+                json.dump(entry._asdict(), temp)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            due = self._disk_writes % max(1, self.disk_max_entries // 10) == 0
+            self._disk_writes += 1
+        if due:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Delete the least recently used disk entries beyond ``disk_max_entries``."""
+        files: List[Tuple[float, str]] = []
+        try:
+            with os.scandir(self.directory) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as entries:
+                        for entry in entries:
+                            if not entry.name.endswith('.json'):
+                                continue
+                            try:
+                                files.append((entry.stat().st_mtime, entry.path))
+                            except FileNotFoundError:
+                                pass  # Pruned by another worker while scanning
+        except OSError as e:
+            logger.warning(f"Could not scan OCR cache directory: {str(e)}")
+            return
+
+        excess = len(files) - self.disk_max_entries
+        if excess <= 0:
+            return
+        files.sort()
+        for _, path in files[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Already pruned by another worker
+        self._pruned.inc(excess)
+        logger.info(f"Pruned {excess} OCR cache file(s) from {self.directory}")
+
+
+ocr_cache = OCRResultCache()
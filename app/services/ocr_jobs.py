@@ -0,0 +1,310 @@
+"""Asynchronous date OCR: uploads are queued as jobs and read by background workers."""
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+import os
+import threading
+import time
+import uuid
+from flask import Flask
+from app.core.extensions import db
+from app.core.metrics import metrics
+from app.models.ocr_job import (
+    OCRJob, OCR_JOB_QUEUED, OCR_JOB_PROCESSING, OCR_JOB_DONE, OCR_JOB_FAILED
+)
+from app.services.date_ocr_service import DateOCRService
+
+logger = logging.getLogger(__name__)
+
+
+class OCRJobQueue:
+    """Date OCR job queue backed by the ``ocr_jobs`` table.
+
+    A request stores the upload as a queued row and returns at once. Worker
+    threads, started in a process by its first job, claim the oldest queued
+    job, run it through ``DateOCRService.extract`` (so the result cache
+    still applies) and store the date on the row, which clients poll by
+    token. Keeping jobs in the database lets any server process answer a
+    poll, whichever one accepted the upload or processed it.
+    """
+
+    PURGE_INTERVAL = 60  # Seconds between deletions of expired jobs in each process
+    WAIT_RECHECK = 0.5  # Seconds between reads while long-polling a job processed elsewhere
+
+    def __init__(self) -> None:
+        self.app: Optional[Flask] = None
+        self.service = DateOCRService()
+        self._workers: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._finished = threading.Condition()
+        self._last_purge = 0.0
+        self._wait_seconds = metrics.histogram(
+            'ocr.jobs.wait_seconds',
+            buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+        )
+        self._processing_seconds = metrics.histogram('ocr.jobs.processing_seconds')
+        self._submitted = metrics.counter('ocr.jobs.submitted')
+        self._rejected = metrics.counter('ocr.jobs.rejected')
+        self._completed = metrics.counter('ocr.jobs.completed')
+        self._failed = metrics.counter('ocr.jobs.failed')
+
+    def init_app(self, app: Flask) -> None:
+        """Bind the queue to an application.
+
+        Workers are not started here: most processes that create the app
+        (scheduler runs, CLI commands, scripts) never see an OCR job. They
+        start with the first job submitted or waited on in a process.
+        """
+        self.app = app
+        app.extensions['ocr_jobs'] = self
+        if self.enabled:
+            metrics.gauge('ocr.jobs.depth', self.depth)
+
+    @property
+    def enabled(self) -> bool:
+        return self.app is not None and bool(self.app.config.get('OCR_JOBS_ENABLED', False))
+
+    def _config(self, key: str, default):
+        if self.app is None:
+            return default
+        return self.app.config.get(key, default)
+
+    @property
+    def max_wait(self) -> float:
+        """Longest time a poll may wait for a job to finish, in seconds."""
+        return float(self._config('OCR_JOBS_MAX_WAIT', 20))
+
+    def submit(self, image_data: bytes, filename: Optional[str] = None) -> OCRJob:
+        """Persist an upload as a queued job and wake a worker.
+
+        Returns:
+            OCRJob: The queued job; clients refer to it by ``token``
+
+        Raises:
+            RuntimeError: If jobs are disabled or ``OCR_JOBS_MAX_QUEUED`` jobs are already waiting
+        """
+        if not self.enabled:
+            raise RuntimeError('OCR jobs are not enabled')
+        max_queued = int(self._config('OCR_JOBS_MAX_QUEUED', 200))
+        if OCRJob.query.filter_by(status=OCR_JOB_QUEUED).count() >= max_queued:
+            self._rejected.inc()
+            raise RuntimeError('OCR job queue is full, please retry later')
+
+        job = OCRJob()
+        job.token = uuid.uuid4().hex
+        job.filename = filename
+        job.image = image_data
+        job.status = OCR_JOB_QUEUED
+        job.attempts = 0
+        job.cached = False
+
+        try:
+            db.session.add(job)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self._submitted.inc()
+        self._ensure_workers()
+        self._wakeup.set()
+        logger.info(f"Queued OCR job {job.token} ({len(image_data)} bytes)")
+        return job
+
+    def get(self, token: str) -> Optional[OCRJob]:
+        return OCRJob.query.filter_by(token=token).first()
+
+    def wait(self, token: str, timeout: float) -> Optional[OCRJob]:
+        """Return a job once it has finished or ``timeout`` seconds have passed.
+
+        Jobs finished by a worker of this process end the wait at once; jobs
+        finished by another process are noticed within ``WAIT_RECHECK``.
+
+        Returns:
+            OCRJob: The job in its latest state, or None if the token is unknown
+        """
+        deadline = time.monotonic() + min(timeout, self.max_wait)
+        while True:
+            job = self.get(token)
+            remaining = deadline - time.monotonic()
+            if job is None or job.finished or remaining <= 0:
+                return job
+            if self.enabled:
+                self._ensure_workers()  # The job may have been queued by a process that has since exited
+            with self._finished:
+                self._finished.wait(min(remaining, self.WAIT_RECHECK))
+            # End the read transaction so the next query sees what workers committed since
+            db.session.commit()
+
+    def depth(self) -> dict:
+        """Count queued and in-progress jobs."""
+        if self.app is None:
+            return {}
+        with self.app.app_context():
+            rows = db.session.query(
+                OCRJob.status, db.func.count(OCRJob.id)
+            ).filter(
+                OCRJob.status.in_([OCR_JOB_QUEUED, OCR_JOB_PROCESSING])
+            ).group_by(OCRJob.status).all()
+        counts = {OCR_JOB_QUEUED: 0, OCR_JOB_PROCESSING: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool once per process (restarted after fork)."""
+        with self._lock:
+            pid = os.getpid()
+            if self._pid == pid and any(worker.is_alive() for worker in self._workers):
+                return
+            self._pid = pid
+            self._stop.clear()
+            self._workers = []
+            for index in range(int(self._config('OCR_JOBS_WORKERS', 2))):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'ocr-jobs-{index}',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Started {len(self._workers)} OCR job worker(s) in process {pid}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop worker threads; claimed jobs are recovered after the claim timeout."""
+        self._stop.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _worker_loop(self) -> None:
+        poll_interval = float(self._config('OCR_JOBS_POLL_INTERVAL', 2))
+        while not self._stop.is_set():
+            claimed = False
+            try:
+                with self.app.app_context():
+                    claimed = self.process_once()
+            except Exception as e:
+                logger.error(f"OCR job worker error: {str(e)}", exc_info=True)
+            if not claimed:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+
+    def process_once(self) -> bool:
+        """Claim and process the oldest queued job. Must run inside an application context.
+
+        Returns:
+            bool: True if a job was waiting, even if another worker claimed it first
+        """
+        job_id = self._next_job_id()
+        if job_id is None:
+            return False
+        job = self._claim(job_id)
+        if job is not None:
+            self._process(job)
+        return True
+
+    def _next_job_id(self) -> Optional[int]:
+        now = datetime.utcnow()
+        claim_timeout = int(self._config('OCR_JOBS_CLAIM_TIMEOUT', 300))
+        max_attempts = int(self._config('OCR_JOBS_MAX_ATTEMPTS', 3))
+        expired = OCRJob.claimed_at < now - timedelta(seconds=claim_timeout)
+
+        try:
+            # Recover jobs claimed by a worker that died, giving up on ones that keep killing workers
+            OCRJob.query.filter(
+                OCRJob.status == OCR_JOB_PROCESSING, expired, OCRJob.attempts >= max_attempts
+            ).update({
+                'status': OCR_JOB_FAILED,
+                'claim_token': None,
+                'image': None,
+                'error': f'Processing did not finish after {max_attempts} attempt(s)',
+                'finished_at': now
+            }, synchronize_session=False)
+            OCRJob.query.filter(
+                OCRJob.status == OCR_JOB_PROCESSING, expired
+            ).update({'status': OCR_JOB_QUEUED, 'claim_token': None}, synchronize_session=False)
+            self._purge(now)
+
+            row = db.session.query(OCRJob.id).filter(
+                OCRJob.status == OCR_JOB_QUEUED
+            ).order_by(OCRJob.created_at, OCRJob.id).first()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return row.id if row is not None else None
+
+    def _purge(self, now: datetime) -> None:
+        """Delete finished jobs older than ``OCR_JOBS_RETENTION`` seconds, once a minute."""
+        if time.monotonic() - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        retention = int(self._config('OCR_JOBS_RETENTION', 3600))
+        deleted = OCRJob.query.filter(
+            OCRJob.status.in_([OCR_JOB_DONE, OCR_JOB_FAILED]),
+            OCRJob.finished_at < now - timedelta(seconds=retention)
+        ).delete(synchronize_session=False)
+        if deleted:
+            logger.info(f"Deleted {deleted} expired OCR job(s)")
+
+    def _claim(self, job_id: int) -> Optional[OCRJob]:
+        token = uuid.uuid4().hex
+        try:
+            # Only a row still queued is claimed, so concurrent workers never share a job
+            claimed = OCRJob.query.filter(
+                OCRJob.id == job_id,
+                OCRJob.status == OCR_JOB_QUEUED
+            ).update({
+                'status': OCR_JOB_PROCESSING,
+                'claim_token': token,
+                'claimed_at': datetime.utcnow(),
+                'attempts': OCRJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not claimed:
+            return None
+        return OCRJob.query.filter_by(claim_token=token, status=OCR_JOB_PROCESSING).first()
+
+    def _process(self, job: OCRJob) -> None:
+        # Kept from the claim: the row may be reloaded below and by then hold another worker's token
+        job_id, token, claim_token = job.id, job.token, job.claim_token
+        if job.created_at and job.claimed_at:
+            self._wait_seconds.observe((job.claimed_at - job.created_at).total_seconds())
+        started = time.perf_counter()
+        values = {'claim_token': None, 'image': None, 'error': None}
+        try:
+            result = self.service.extract(job.image)
+            values.update(status=OCR_JOB_DONE, date=result.date, cached=result.cache is not None)
+        except Exception as e:
+            values.update(status=OCR_JOB_FAILED, error=f'Error processing image: {str(e)}'[:500])
+            logger.warning(f"OCR job {token} failed: {str(e)}")
+        elapsed = time.perf_counter() - started
+        values['finished_at'] = datetime.utcnow()
+
+        try:
+            # A job whose claim expired may already belong to another worker; leave it to that one
+            updated = OCRJob.query.filter_by(
+                id=job_id, claim_token=claim_token
+            ).update(values, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if not updated:
+            logger.warning(f"OCR job {token} finished after its claim expired; result discarded")
+            return
+        self._processing_seconds.observe(elapsed)
+        (self._completed if values['status'] == OCR_JOB_DONE else self._failed).inc()
+        with self._finished:
+            self._finished.notify_all()
+
+
+ocr_jobs = OCRJobQueue()
@@ -0,0 +1,444 @@
+"""Configurable image preprocessing for date OCR.
+
+Phone photos are several thousand pixels across, far more than OCR needs to
+read a printed date. The pipeline first shrinks the image to a target
+resolution, then runs the enabled enhancement stages on the small image and
+records how long each stage took.
+
+JPEG photos are decoded straight to a reduced size: the file header gives
+the dimensions, and libjpeg scales by 1/2, 1/4 or 1/8 while decoding, so a
+12 megapixel photo never exists in memory at full size.
+
+The optional 'roi' stage looks for blocks of text on the downsampled image
+and keeps only those, stacked into one smaller image. Later stages and the
+OCR backend then work on a fraction of the photo.
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+from app.core.metrics import metrics
+from app.services.ocr_backends import ImageBuffer
+
+# Optional stages, in the order they run
+PREPROCESS_STAGES = ('roi', 'clahe', 'denoise', 'threshold')
+
+# Stages run when none are configured; region cropping is opt-in
+DEFAULT_STAGES = ('clahe', 'denoise', 'threshold')
+
+# Decode flags for libjpeg's scaled decoding, by reduction factor
+_REDUCED_GRAYSCALE = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# JPEG start-of-frame markers, which carry the image dimensions
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Buckets of the decoded and encoded size histograms
+_DECODED_MB_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64)
+_PAYLOAD_KB_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048)
+_FRACTION_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+
+# Text block detection is tuned on images with a 1200 pixel long side
+_REGION_UNIT_SIDE = 1200
+# Crop nothing when text covers more than this share of the image
+_REGION_MAX_FRACTION = 0.8
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1
+
+
+class ImageHeader(NamedTuple):
+    format: str  # 'jpeg' or 'png'
+    width: int
+    height: int
+
+
+class PreprocessResult(NamedTuple):
+    image: np.ndarray  # Final single-channel image
+    data: memoryview  # Encoded image handed to the OCR backend, a view of the encoder's output
+    timings: Dict[str, float]  # Seconds per stage, in run order
+    scale: float  # Downsampling factor applied to the original
+    decoded_bytes: int  # Size of the image as first decoded, before downsampling
+    region_fraction: float = 1.0  # Share of the downsampled image kept by the 'roi' stage
+
+
+def read_image_header(image_data: ImageBuffer) -> Optional[ImageHeader]:
+    """Read the format and dimensions of a JPEG or PNG without decoding it.
+
+    Returns:
+        ImageHeader: Format and size, or None for other formats and
+            truncated headers
+    """
+    view = memoryview(image_data)
+    if view[:8] == b'\x89PNG\r\n\x1a\n' and view[12:16] == b'IHDR':
+        return ImageHeader('png', int.from_bytes(view[16:20], 'big'), int.from_bytes(view[20:24], 'big'))
+    if view[:2] != b'\xff\xd8':
+        return None
+
+    # Walk the marker segments up to the frame header
+    position = 2
+    while position + 4 <= len(view):
+        if view[position] != 0xFF:
+            return None
+        marker = view[position + 1]
+        if marker == 0xFF:  # Fill byte
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # Markers without a length
+            position += 2
+            continue
+        length = int.from_bytes(view[position + 2:position + 4], 'big')
+        if marker in _JPEG_SOF_MARKERS:
+            if position + 9 > len(view):
+                return None
+            height = int.from_bytes(view[position + 5:position + 7], 'big')
+            width = int.from_bytes(view[position + 7:position + 9], 'big')
+            return ImageHeader('jpeg', width, height)
+        if marker == 0xDA:  # Entropy-coded data follows; no frame header was found
+            return None
+        position += 2 + length
+    return None
+
+
+class TextRegion(NamedTuple):
+    box: Box
+    components: FrozenSet[int]  # Labels of the text blobs inside the box
+
+
+def find_text_regions(image: np.ndarray, max_regions: int = 12) -> Tuple[List[TextRegion], np.ndarray]:
+    """Find blocks of printed text in a grayscale image.
+
+    Character edges are found with a morphological gradient, then closed
+    horizontally so the letters of a word or line join into one blob. Blobs
+    of the wrong shape for text are dropped, and blobs on the same line are
+    merged so a date is never split from its keyword.
+
+    Args:
+        image: Single-channel image, ideally already downsampled
+        max_regions: Most regions returned; the largest are kept
+
+    Returns:
+        tuple: (regions in reading order, label image of the blobs)
+    """
+    height, width = image.shape[:2]
+    unit = max(height, width) / _REGION_UNIT_SIDE
+    gradient = cv2.morphologyEx(image, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, round(25 * unit)), max(3, round(5 * unit))))
+    blocks = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, line_kernel)
+    blocks = cv2.morphologyEx(blocks, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    count, labels, stats, centroids = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+
+    regions: List[TextRegion] = []
+    specks: List[int] = []
+    for label in range(1, count):  # Label 0 is the background
+        x, y, box_width, box_height = (int(value) for value in stats[label, :4])
+        if box_height < 8 * unit:
+            specks.append(label)  # Too small to be a word, but may be punctuation within one
+            continue
+        if box_height > height / 4 or box_width < box_height * 0.3:
+            continue  # Large shapes and vertical strokes
+        if cv2.countNonZero(edges[y:y + box_height, x:x + box_width]) < 0.1 * box_width * box_height:
+            continue  # Smooth areas such as shadows
+        regions.append(TextRegion((x, y, x + box_width, y + box_height), frozenset([label])))
+
+    regions = _merge_lines(regions)
+    for index, (box, components) in enumerate(regions):
+        # Punctuation and the ends of letter strokes on the same line, up to a line height away
+        reach = box[3] - box[1]
+        attached = [
+            label for label in specks
+            if box[0] - reach <= centroids[label][0] < box[2] + reach and box[1] <= centroids[label][1] < box[3]
+        ]
+        for label in attached:
+            x, y, speck_width, speck_height = (int(value) for value in stats[label, :4])
+            box = (min(box[0], x), min(box[1], y), max(box[2], x + speck_width), max(box[3], y + speck_height))
+        regions[index] = TextRegion(box, components | frozenset(attached))
+    if len(regions) > max_regions:
+        regions = sorted(regions, key=lambda region: _area(region.box), reverse=True)[:max_regions]
+    return sorted(regions, key=lambda region: (region.box[1], region.box[0])), labels
+
+
+def _area(box: Box) -> int:
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _merge_lines(regions: List[TextRegion]) -> List[TextRegion]:
+    """Merge regions that sit on the same text line and are close together."""
+    merged = list(regions)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i].box, merged[j].box
+                overlap = min(a[3], b[3]) - max(a[1], b[1])
+                gap = max(a[0], b[0]) - min(a[2], b[2])
+                if overlap >= min(a[3] - a[1], b[3] - b[1]) / 2 and gap <= 4 * max(a[3] - a[1], b[3] - b[1]):
+                    box = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    merged[i] = TextRegion(box, merged[i].components | merged[j].components)
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+
+def _fill_spans(mask: np.ndarray) -> np.ndarray:
+    """Fill every row and column of a mask between its first and last set pixel.
+
+    Closing leaves notches in a blob where letters have gaps taller than the
+    kernel, such as between the bars of an E; filling spans closes them
+    without reaching past the blob into neighbouring lines.
+    """
+    rows = np.arange(mask.shape[0])[:, None]
+    columns = np.arange(mask.shape[1])[None, :]
+    top = mask.argmax(axis=0)
+    bottom = mask.shape[0] - 1 - mask[::-1].argmax(axis=0)
+    left = mask.argmax(axis=1)[:, None]
+    right = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)[:, None]
+    vertical = (rows >= top) & (rows <= bottom) & mask.any(axis=0)
+    horizontal = (columns >= left) & (columns <= right) & mask.any(axis=1)[:, None]
+    return vertical | horizontal
+
+
+def tile_regions(image: np.ndarray, regions: Sequence[TextRegion], labels: np.ndarray, padding: int) -> np.ndarray:
+    """Stack the text regions of an image top to bottom on a plain background.
+
+    Only the region's own blobs are copied, so the edges of neighbouring
+    lines that fall inside a box (on a tilted label, say) are left out.
+    Regions keep their order and are spaced by ``padding``, so the OCR
+    engine reads them as separate lines in reading order.
+    """
+    background = int(np.median(image[::8, ::8]))  # A sample is enough to find the paper colour
+    canvas = np.full(
+        (
+            sum(box[3] - box[1] for box, _ in regions) + padding * (len(regions) + 1),
+            max(box[2] - box[0] for box, _ in regions) + 2 * padding
+        ),
+        background, np.uint8
+    )
+    grow = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+    y = padding
+    for (x0, y0, x1, y1), components in regions:
+        mask = _fill_spans(np.isin(labels[y0:y1, x0:x1], list(components)))
+        mask = cv2.dilate(mask.astype(np.uint8), grow)  # Keep the anti-aliased rim of each glyph
+        target = canvas[y:y + y1 - y0, padding:padding + x1 - x0]
+        np.copyto(target, image[y0:y1, x0:x1], where=mask.astype(bool))
+        y += y1 - y0 + padding
+    return canvas
+
+
+class PreprocessingPipeline:
+    """Decode, downsample, enhance and encode a label photo.
+
+    Args:
+        target_dpi: Resolution OCR should see
+        source_width_inches: Physical width assumed to span the photo's long
+            side; with ``target_dpi`` it gives the longest side kept in pixels
+        stages: Optional stages to run, from ``PREPROCESS_STAGES``
+        denoise_diameter: Pixel neighbourhood of the bilateral filter
+        encode_format: Extension passed to ``cv2.imencode``
+        debug_dir: Directory for debug images; None disables them
+        max_decode_pixels: Most pixels an upload may decode to; JPEGs are
+            decoded at a reduced size to stay under it
+        region_padding: Pixels of background between and around text regions
+        max_regions: Most text regions the 'roi' stage keeps
+    """
+
+    def __init__(
+        self,
+        target_dpi: int = 300,
+        source_width_inches: float = 4.0,
+        stages: Sequence[str] = DEFAULT_STAGES,
+        denoise_diameter: int = 9,
+        encode_format: str = '.png',
+        debug_dir: Optional[str] = None,
+        max_decode_pixels: int = 16_000_000,
+        region_padding: int = 12,
+        max_regions: int = 12
+    ) -> None:
+        unknown = set(stages) - set(PREPROCESS_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stage(s): {', '.join(sorted(unknown))}")
+        self.max_side = int(target_dpi * source_width_inches)
+        self.stages = [stage for stage in PREPROCESS_STAGES if stage in stages]
+        self.denoise_diameter = denoise_diameter
+        self.encode_format = encode_format
+        self.encode_params = [cv2.IMWRITE_PNG_COMPRESSION, 1] if encode_format == '.png' else []
+        self.debug_dir = debug_dir
+        self.max_decode_pixels = max_decode_pixels
+        self.region_padding = region_padding
+        self.max_regions = max_regions
+        # CLAHE objects keep internal buffers, so each thread reuses its own
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], root_path: str = '') -> 'PreprocessingPipeline':
+        """Build a pipeline from the ``OCR_*`` settings of an app config."""
+        debug_dir = None
+        if config.get('OCR_DEBUG_IMAGES'):
+            debug_dir = config.get('OCR_DEBUG_DIR') or os.path.join(root_path, 'debug_images')
+        return cls(
+            target_dpi=config.get('OCR_TARGET_DPI', 300),
+            source_width_inches=config.get('OCR_SOURCE_WIDTH_INCHES', 4.0),
+            stages=config.get('OCR_PREPROCESS_STAGES', DEFAULT_STAGES),
+            denoise_diameter=config.get('OCR_DENOISE_DIAMETER', 9),
+            encode_format=config.get('OCR_ENCODE_FORMAT', '.png'),
+            debug_dir=debug_dir,
+            max_decode_pixels=config.get('OCR_MAX_DECODE_PIXELS', 16_000_000),
+            region_padding=config.get('OCR_ROI_PADDING', 12),
+            max_regions=config.get('OCR_ROI_MAX_REGIONS', 12)
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pipelines are sent to worker processes by the batch endpoint; thread-local state stays behind
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def run(self, image_data: ImageBuffer, record: bool = True) -> PreprocessResult:
+        """Preprocess an encoded image.
+
+        Args:
+            image_data: Encoded image; any buffer, read without copying
+            record: Whether to record the stage timings as metrics; worker
+                processes pass False and leave it to the parent
+
+        Raises:
+            ValueError: If the data is not a JPEG or PNG, cannot be decoded,
+                or would decode to more than ``max_decode_pixels``
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        def lap(stage: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = now - started
+            started = now
+
+        header = read_image_header(image_data)
+        image = cv2.imdecode(np.frombuffer(image_data, np.uint8), self._decode_flags(header))
+        if image is None:
+            raise ValueError("Image data could not be decoded")
+        decoded_bytes = image.nbytes
+        original_side = max(header.width, header.height)
+        lap('decode')
+
+        image = self._downsample(image)
+        scale = max(image.shape[:2]) / original_side
+        lap('downsample')
+
+        region_fraction = 1.0
+        if 'roi' in self.stages:
+            image, region_fraction = self._crop_text(image)
+            lap('roi')
+
+        if 'clahe' in self.stages:
+            image = self._clahe().apply(image)
+            lap('clahe')
+
+        if 'denoise' in self.stages:
+            image = cv2.bilateralFilter(image, self.denoise_diameter, 75, 75)
+            lap('denoise')
+
+        if 'threshold' in self.stages:
+            _, otsu = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            adaptive = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+            image = cv2.bitwise_or(otsu, adaptive)
+            lap('threshold')
+
+        ok, encoded = cv2.imencode(self.encode_format, image, self.encode_params)
+        if not ok:
+            raise ValueError(f"Image could not be encoded as {self.encode_format}")
+        data = encoded.data  # The backend reads the encoder's buffer; no copy to bytes
+        lap('encode')
+
+        if self.debug_dir:
+            self._write_debug(image)
+            lap('debug')
+
+        result = PreprocessResult(image, data, timings, scale, decoded_bytes, region_fraction)
+        if record:
+            self.record(result)
+        return result
+
+    @staticmethod
+    def record(result: PreprocessResult) -> None:
+        """Record stage timings and image sizes in the ``ocr.preprocess`` histograms."""
+        for stage, seconds in result.timings.items():
+            metrics.histogram(f'ocr.preprocess.{stage}_seconds').observe(seconds)
+        # The decoded image is the largest allocation of a request
+        metrics.histogram('ocr.preprocess.decoded_mb', _DECODED_MB_BUCKETS).observe(result.decoded_bytes / 2 ** 20)
+        metrics.histogram('ocr.preprocess.payload_kb', _PAYLOAD_KB_BUCKETS).observe(len(result.data) / 1024)
+        if 'roi' in result.timings:
+            metrics.histogram('ocr.preprocess.region_fraction', _FRACTION_BUCKETS).observe(result.region_fraction)
+
+    def _crop_text(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Tile the text regions of an image, or keep it whole when cropping would not help.
+
+        Returns:
+            tuple: (image for the next stage, its size as a share of the input)
+        """
+        regions, labels = find_text_regions(image, self.max_regions)
+        if not regions:
+            return image, 1.0
+        tiled = tile_regions(image, regions, labels, self.region_padding)
+        fraction = tiled.size / image.size
+        if fraction > _REGION_MAX_FRACTION:
+            return image, 1.0
+        return tiled, fraction
+
+    def _decode_flags(self, header: Optional[ImageHeader]) -> int:
+        """Pick the smallest JPEG decode size that keeps ``max_side`` and the pixel cap.
+
+        Raises:
+            ValueError: If the image is too large to decode under the cap, or
+                its size cannot be read from the header (formats other than
+                JPEG and PNG), so the cap could not be enforced before decoding
+        """
+        if header is None:
+            raise ValueError("Image size cannot be read before decoding; only JPEG and PNG are preprocessed")
+        pixels = header.width * header.height
+        if header.format != 'jpeg':
+            if pixels > self.max_decode_pixels:
+                raise ValueError(f"Image of {header.width}x{header.height} exceeds the decode limit")
+            return cv2.IMREAD_GRAYSCALE
+
+        factor = 1
+        longest = max(header.width, header.height)
+        while factor < 8 and (longest // (factor * 2) >= self.max_side or pixels / factor ** 2 > self.max_decode_pixels):
+            factor *= 2
+        if pixels / factor ** 2 > self.max_decode_pixels:
+            raise ValueError(f"Image of {header.width}x{header.height} exceeds the decode limit")
+        return _REDUCED_GRAYSCALE.get(factor, cv2.IMREAD_GRAYSCALE)
+
+    def _downsample(self, image: np.ndarray) -> np.ndarray:
+        height, width = image.shape[:2]
+        scale = self.max_side / max(height, width)
+        if scale >= 1:
+            return image
+        return cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def _clahe(self):
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+        return clahe
+
+    def _write_debug(self, image: np.ndarray) -> None:
+        """Write the preprocessed image under a unique name, so concurrent requests never collide."""
+        os.makedirs(self.debug_dir, exist_ok=True)
+        cv2.imwrite(os.path.join(self.debug_dir, f'preprocessed-{uuid.uuid4().hex}.png'), image)
@@ -0,0 +1,305 @@
+"""Correction and expiry date matching for OCR text.
+
+The correction table, expiry keywords and date patterns are compiled once
+into regexes that share common prefixes like a trie. Correcting a transcript
+is then a single substitution pass, and every keyword occurrence is found in
+one scan, instead of one ``re.sub`` per correction and one ``find`` per
+keyword on each call.
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+# Common OCR misreads and spelling variants, matched as whole words in lowercased text
+OCR_CORRECTIONS: Dict[str, str] = {
+    'マ': 'M', '了': 'L', 'ー': '-', 'つ': 'T', 'Ⅵ': '6', '「': '(',
+    'see': 'exp', 'beee': 'date', 'expiry': 'expiry', 'date': 'date',
+    '12ember': 'december',
+    # Month name variations
+    'jan': 'january', 'feb': 'february', 'mar': 'march', 'apr': 'april', 'may': 'may', 'jun': 'june',
+    'jul': 'july', 'aug': 'august', 'sep': 'september', 'oct': 'october', 'nov': 'november', 'dec': 'december',
+    'january': 'january', 'february': 'february', 'march': 'march', 'april': 'april', 'june': 'june',
+    'july': 'july', 'august': 'august', 'september': 'september', 'october': 'october',
+    'november': 'november', 'december': 'december',
+    # Expiry terms
+    'use by': 'use by', 'use-by': 'use by', 'useby': 'use by', 'use:by': 'use by',
+    'best before': 'best before', 'best-before': 'best before', 'bestbefore': 'best before',
+    'best:before': 'best before',
+    'exp': 'expiry', 'exp.': 'expiry', 'exp:': 'expiry',
+    'expiry date': 'expiry date', 'expiry-date': 'expiry date', 'expirydate': 'expiry date',
+    'expiry:date': 'expiry date',
+    'bb': 'best before', 'bb:': 'best before', 'bb.': 'best before',
+    'ub': 'use by', 'ub:': 'use by', 'ub.': 'use by',
+    # Year-only formats
+    'year': 'year', 'years': 'year', 'yr': 'year', 'yrs': 'year',
+    # French terms
+    "date d'expiration": "date d'expiration",
+    "date d'exp": "date d'expiration", "date d'exp.": "date d'expiration", "date d'exp:": "date d'expiration",
+    "date d'expiry": "date d'expiration", "date d'expiry date": "date d'expiration",
+    "date d'expiry-date": "date d'expiration", "date d'expirydate": "date d'expiration",
+    "date d'expiry:date": "date d'expiration",
+    "date d'expiration:": "date d'expiration", "date d'expiration.": "date d'expiration",
+    "date d'expiration-": "date d'expiration",
+    "date d'expiration date": "date d'expiration", "date d'expiration-date": "date d'expiration",
+    "date d'expirationdate": "date d'expiration", "date d'expiration:date": "date d'expiration",
+    "date d'expiration date:": "date d'expiration", "date d'expiration date.": "date d'expiration",
+    "date d'expiration date-": "date d'expiration",
+    "date d'expiration date date": "date d'expiration", "date d'expiration date-date": "date d'expiration",
+    "date d'expiration datedate": "date d'expiration", "date d'expiration date:date": "date d'expiration",
+}
+
+# Phrases a printed expiry date usually follows
+EXPIRY_KEYWORDS: List[str] = [
+    # English keywords
+    'expiry date', 'expiry', 'exp', 'best before', 'use by',
+    'bb', 'ub', 'best-before', 'use-by', 'expiry-date',
+    'best:before', 'use:by', 'expiry:date',
+    # French keywords
+    "date d'expiration", "date d'exp", "date d'exp.",
+    "date d'exp:", "date d'expiry", "date d'expiry date",
+    "date d'expiry-date", "date d'expirydate", "date d'expiry:date",
+    "date d'expiration:", "date d'expiration.", "date d'expiration-",
+    "date d'expiration date", "date d'expiration-date", "date d'expirationdate",
+    "date d'expiration:date", "date d'expiration date:", "date d'expiration date.",
+    "date d'expiration date-", "date d'expiration date date", "date d'expiration date-date",
+    "date d'expiration datedate", "date d'expiration date:date",
+    # Spanish keywords
+    'fecha de caducidad', 'fecha de exp', 'fecha de exp.',
+    'fecha de exp:', 'fecha de expiry', 'fecha de expiry date',
+    'fecha de expiry-date', 'fecha de expirydate', 'fecha de expiry:date',
+    'fecha de caducidad:', 'fecha de caducidad.', 'fecha de caducidad-',
+    'fecha de caducidad date', 'fecha de caducidad-date', 'fecha de caducidaddate',
+    'fecha de caducidad:date', 'fecha de caducidad date:', 'fecha de caducidad date.',
+    'fecha de caducidad date-', 'fecha de caducidad date date', 'fecha de caducidad date-date',
+    'fecha de caducidad datedate', 'fecha de caducidad date:date',
+]
+
+_MONTHS = 'january|february|march|april|may|june|july|august|september|october|november|december'
+
+# Tried in order; the first match of the first pattern that parses wins
+DATE_PATTERNS: List[str] = [
+    # Full year formats first (to prevent year truncation)
+    r'\d{4}[./-]\d{1,2}[./-]\d{1,2}',  # YYYY/MM/DD
+    r'\d{1,2}[./-]\d{1,2}[./-]\d{4}',  # DD/MM/YYYY
+    # Then 2-digit year formats
+    r'\d{1,2}[./-]\d{1,2}[./-]\d{2}',  # DD/MM/YY
+    r'\d{2}[./-]\d{1,2}[./-]\d{2}',  # YY/MM/DD
+    # Month name formats
+    rf'(?:{_MONTHS})\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{2,4}}',
+    # Month/Year only formats
+    r'\d{1,2}[./-]\d{4}',  # MM/YYYY
+    r'\d{4}[./-]\d{1,2}',  # YYYY/MM
+    rf'(?:{_MONTHS})\s+\d{{4}}',  # Month YYYY
+    # Year-only format
+    r'\b\d{4}\b',  # YYYY
+]
+
+DATE_FORMATS: List[str] = [
+    '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d',  # YYYY-MM-DD or YYYY/MM/DD or YYYY.MM.DD
+    '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y',  # DD-MM-YYYY or DD/MM/YYYY or DD.MM.YYYY
+    '%d-%m-%y', '%d/%m/%y', '%d.%m.%y',  # DD-MM-YY or DD/MM/YY or DD.MM.YY
+    '%y-%m-%d', '%y/%m/%d', '%y.%m.%d',  # YY-MM-DD or YY/MM/DD or YY.MM.DD
+    '%B %d, %Y', '%b %d, %Y',  # Month name formats
+    '%m/%Y', '%Y/%m',  # Month/Year formats
+    '%B %Y',  # Month YYYY format
+    '%Y',  # Year-only format
+]
+
+# Formats without a day resolve to the end of the month or year
+MONTH_ONLY_FORMATS = ('%m/%Y', '%Y/%m', '%B %Y')
+
+_CONCATENATED_DATE = re.compile(r'\d{8,10}')  # DDMMYYYY written without separators
+
+
+def _separators(text: str) -> str:
+    """Punctuation and spacing between the fields of a date or format string."""
+    return re.sub(r'\s+', ' ', re.sub(r'%[a-zA-Z]|[a-zA-Z0-9]+', '', text))
+
+
+def trie_regex(words: Iterable[str], terminator: str = '') -> str:
+    """Build a regex matching any of the words, preferring the longest.
+
+    Words sharing a prefix share a branch, so the regex engine follows one
+    path per position instead of trying every word.
+
+    Args:
+        words: Literal words to match
+        terminator: Regex every match must be followed by, such as ``\\b``
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if '' in node:
+            branches.append(terminator)  # Ending here is tried last, after every longer word
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+def parse_concatenated_date(date_str: str) -> Optional[datetime]:
+    """Parse a concatenated date string (e.g., '31122024' -> '31/12/2024')."""
+    try:
+        # Handle 8-digit format (DDMMYYYY)
+        if len(date_str) == 8:
+            day = int(date_str[:2])
+            month = int(date_str[2:4])
+            year = int(date_str[4:])
+            if 1 <= day <= 31 and 1 <= month <= 12 and 2000 <= year <= 2100:
+                return datetime(year, month, day)
+
+        # Handle 10-digit format (DDMMYYYY)
+        elif len(date_str) == 10:
+            day = int(date_str[:2])
+            month = int(date_str[2:4])
+            year = int(date_str[4:])
+            if 1 <= day <= 31 and 1 <= month <= 12 and 2000 <= year <= 2100:
+                return datetime(year, month, day)
+
+        return None
+    except (ValueError, IndexError):
+        return None
+
+
+class DateTextMatcher:
+    """Finds the expiry date in OCR text with regexes compiled once.
+
+    Corrections are applied in one pass. The table was previously applied one
+    entry at a time, longest first, so a replacement could itself be
+    corrected by a later, shorter entry ('see' -> 'exp' -> 'expiry'); those
+    chains are resolved when the matcher is built. Entries that map a word to
+    itself never changed the text and are left out. Word boundaries are those
+    of the original text, so a replacement no longer hides the word after it
+    ("exp:oct" became "expiryoct" and lost its month).
+
+    Args:
+        corrections: Lowercase misreads and their replacements
+        keywords: Phrases a printed expiry date usually follows
+        patterns: Date regexes in priority order
+    """
+
+    def __init__(
+        self,
+        corrections: Mapping[str, str] = OCR_CORRECTIONS,
+        keywords: Sequence[str] = EXPIRY_KEYWORDS,
+        patterns: Sequence[str] = DATE_PATTERNS
+    ) -> None:
+        self.replacements = self._resolve_chains(corrections)
+        self._correction_regex = re.compile(r'\b' + trie_regex(self.replacements, r'\b'))
+
+        # Longest first, as keywords are tried in that order
+        self.keywords = sorted(dict.fromkeys(keyword.lower() for keyword in keywords), key=len, reverse=True)
+        # The scan reports the longest keyword at each position; shorter ones starting there are its prefixes
+        self._keyword_prefixes = {
+            keyword: [other for other in self.keywords if keyword.startswith(other)]
+            for keyword in self.keywords
+        }
+        self._keyword_regex = re.compile('(?=(' + trie_regex(self.keywords) + '))')
+
+        # strptime fails unless the separators agree, so each candidate is only tried against formats that can match
+        self._formats_by_separators: Dict[str, List[str]] = {}
+        for fmt in DATE_FORMATS:
+            self._formats_by_separators.setdefault(_separators(fmt), []).append(fmt)
+
+        self._patterns = [re.compile(pattern) for pattern in patterns]
+        # One scan tells whether any pattern can match before trying them in priority order
+        self._any_pattern = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+    @staticmethod
+    def _resolve_chains(corrections: Mapping[str, str]) -> Dict[str, str]:
+        ordered = sorted(corrections.items(), key=lambda item: len(item[0]), reverse=True)
+        replacements = {}
+        for position, (wrong, right) in enumerate(ordered):
+            for later, later_right in ordered[position + 1:]:
+                right = re.sub(r'\b' + re.escape(later) + r'\b', later_right, right)
+            if right != wrong:
+                replacements[wrong] = right
+        return replacements
+
+    def correct(self, text: str) -> str:
+        """Lowercase OCR text and correct common misreads."""
+        replacements = self.replacements
+        return self._correction_regex.sub(lambda match: replacements[match.group()], text.lower())
+
+    def find_date(self, text: str) -> Optional[str]:
+        """Find the expiry date in OCR text.
+
+        Dates following an expiry keyword win, longest keyword first; if
+        none parses, the first date anywhere in the text is used.
+
+        Returns:
+            str: Date in YYYY-MM-DD format, or None if no date was found
+        """
+        full_text = self.correct(text)
+
+        first_seen: Dict[str, int] = {}
+        for match in self._keyword_regex.finditer(full_text):
+            for keyword in self._keyword_prefixes[match.group(1)]:
+                first_seen.setdefault(keyword, match.start())
+
+        for keyword in self.keywords:
+            position = first_seen.get(keyword)
+            if position is None:
+                continue
+            text_after_keyword = full_text[position + len(keyword):].lstrip(' :.,;')
+            found = self._find_in(text_after_keyword)
+            if found:
+                return found
+
+        return self._find_in(full_text)
+
+    def _find_in(self, text: str) -> Optional[str]:
+        for candidate in _CONCATENATED_DATE.findall(text):
+            date_obj = parse_concatenated_date(candidate)
+            if date_obj:
+                return date_obj.strftime('%Y-%m-%d')
+
+        if not self._any_pattern.search(text):
+            return None
+        for pattern in self._patterns:
+            match = pattern.search(text)
+            if match:
+                found = self._parse(match.group())
+                if found:
+                    return found
+        return None
+
+    def _parse(self, date_str: str) -> Optional[str]:
+        for fmt in self._formats_by_separators.get(_separators(date_str), ()):
+            try:
+                date_obj = datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+            # Validate year is reasonable
+            if not 2000 <= date_obj.year <= 2100:
+                continue
+
+            if fmt in MONTH_ONLY_FORMATS:
+                # Last day of the month
+                if date_obj.month == 12:
+                    next_month = date_obj.replace(year=date_obj.year + 1, month=1)
+                else:
+                    next_month = date_obj.replace(month=date_obj.month + 1)
+                date_obj = date_obj.replace(day=(next_month - timedelta(days=1)).day)
+            if fmt == '%Y':
+                date_obj = date_obj.replace(month=12, day=31)
+            return date_obj.strftime('%Y-%m-%d')
+        return None
+
+
+_matcher: Optional[DateTextMatcher] = None
+
+
+def get_date_text_matcher() -> DateTextMatcher:
+    """Shared matcher, compiled on first use rather than when the app starts."""
+    global _matcher
+    if _matcher is None:
+        _matcher = DateTextMatcher()
+    return _matcher
@@ -0,0 +1,99 @@
+"""Size-bounded cache of rendered public report pages."""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+import hashlib
+import threading
+from flask import Flask
+from app.core.metrics import metrics
+
+
+class CachedPage(NamedTuple):
+    report_id: int
+    version: Optional[datetime]
+    etag: str
+    body: bytes
+
+
+class PublicReportCache:
+    """LRU cache of rendered shared-report pages keyed by public token.
+
+    Reports are immutable apart from their sharing fields, so a page stays
+    valid until the report is deleted, made private or shared again. Callers
+    look up the shared report's ``updated_at`` on every request and pass it as
+    the version: a revocation handled by any worker process is seen at once,
+    and a page stored for an older version is never served.
+    """
+
+    def __init__(self) -> None:
+        self._pages: 'OrderedDict[str, CachedPage]' = OrderedDict()
+        self._tokens_by_report: Dict[int, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.max_bytes = 32 * 1024 * 1024
+        self._hits = metrics.counter('reports.public_cache.hits')
+        self._misses = metrics.counter('reports.public_cache.misses')
+        metrics.gauge('reports.public_cache.bytes', lambda: self._bytes)
+        metrics.gauge('reports.public_cache.entries', lambda: len(self._pages))
+
+    def init_app(self, app: Flask) -> None:
+        """Read the cache limits from the app config."""
+        app.extensions['public_report_cache'] = self
+        self.max_bytes = app.config.get('REPORT_PUBLIC_CACHE_BYTES', self.max_bytes)
+
+    def get(self, token: str, version: Optional[datetime]) -> Optional[CachedPage]:
+        """Return the cached page for a token, if it was rendered from this version."""
+        with self._lock:
+            page = self._pages.get(token)
+            if page is not None and page.version != version:
+                self._remove(token)
+                page = None
+            if page is None:
+                self._misses.inc()
+                return None
+            self._pages.move_to_end(token)
+            self._hits.inc()
+            return page
+
+    def put(self, token: str, report_id: int, version: Optional[datetime], body: str) -> CachedPage:
+        """Store a rendered page, evicting least recently used pages over the size limit.
+
+        Returns:
+            CachedPage: The stored page with its ETag
+        """
+        data = body.encode('utf-8')
+        page = CachedPage(report_id, version, hashlib.sha1(data).hexdigest(), data)
+        if len(data) > self.max_bytes:
+            return page
+
+        with self._lock:
+            self._remove(token)
+            self._pages[token] = page
+            self._tokens_by_report[report_id] = token
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._pages)))
+        return page
+
+    def invalidate_report(self, report_id: int) -> None:
+        """Drop the cached page of a report that was deleted or made private in this process."""
+        with self._lock:
+            token = self._tokens_by_report.get(report_id)
+            if token is not None:
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._tokens_by_report.clear()
+            self._bytes = 0
+
+    def _remove(self, token: str) -> None:
+        page = self._pages.pop(token, None)
+        if page is not None:
+            self._bytes -= len(page.body)
+            if self._tokens_by_report.get(page.report_id) == token:
+                del self._tokens_by_report[page.report_id]
+
+
+public_report_cache = PublicReportCache()
@@ -0,0 +1,212 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import func
+from app.core.extensions import db
+from app.core.metrics import metrics
+from app.models.item import Item
+from app.models.user import User
+from app.models.item_change import ItemChange, CHANGE_INSERT, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_STATUS, CHANGE_UNKNOWN
+from app.models.inventory_aggregate import InventoryAggregate, InventoryAggregateState
+from app.services.report_metrics import item_bands, quantity_band, value_band
+
+# Aggregate group key: (status, expiry ordinal or 0, quantity band, value band)
+GroupKey = Tuple[Optional[str], int, int, int]
+
+class ReportAggregateService:
+    """Keeps per-user report aggregates current from the item change log.
+
+    Each refresh applies the changes logged since the last one, so its cost
+    follows item churn rather than inventory size. Deltas can drift (float
+    sums, writes that bypassed the mapper events), so the aggregates are
+    rebuilt from the items table every ``REPORT_AGGREGATE_REBUILD_DAYS``
+    days, or sooner when the backlog of changes is large enough that a scan
+    is cheaper.
+
+    Refreshes and rebuilds hold the user's row locked exclusively, and
+    logging a change takes a shared lock on it first. While the aggregates
+    read the log, every change below the watermark has therefore committed
+    and no new one can, so the items scanned and the watermark stored with
+    them always cover the same changes.
+    """
+
+    def __init__(self):
+        self._rebuilds = metrics.counter('reports.aggregates.rebuilds')
+        self._changes_applied = metrics.counter('reports.aggregates.changes_applied')
+
+    def refresh(self, user_id: int, now: Optional[datetime] = None) -> List[Tuple]:
+        """Bring a user's aggregates up to date within the caller's transaction.
+
+        Args:
+            user_id: ID of the user
+            now: Current time, for the rebuild interval (defaults to utcnow)
+
+        Returns:
+            list: (status, expiry ordinal or None, quantity band, value band,
+            count, value sum, quantity sum) rows for ``IncrementalReportMetrics``
+        """
+        now = now or datetime.utcnow()
+        self._lock_owner(user_id)
+        state = InventoryAggregateState.query.filter_by(user_id=user_id).with_for_update().first()
+        if state is None:
+            return self.rebuild(user_id, now, reason='no aggregates yet')
+
+        rebuild_days = current_app.config.get('REPORT_AGGREGATE_REBUILD_DAYS', 7)
+        if now - state.rebuilt_at >= timedelta(days=rebuild_days):
+            return self.rebuild(user_id, now, state, reason=f'last rebuild over {rebuild_days} day(s) ago')
+
+        max_changes = current_app.config.get('REPORT_AGGREGATE_MAX_CHANGES', 5000)
+        changes = ItemChange.query.filter(
+            ItemChange.user_id == user_id,
+            ItemChange.id > state.last_change_id
+        ).order_by(ItemChange.id).limit(max_changes + 1).all()
+        if len(changes) > max_changes:
+            return self.rebuild(user_id, now, state, reason=f'over {max_changes} pending change(s)')
+        if any(change.operation == CHANGE_UNKNOWN for change in changes):
+            return self.rebuild(user_id, now, state, reason='change with unknown previous values')
+
+        aggregates = {self._key(row): row for row in InventoryAggregate.query.filter_by(user_id=user_id)}
+        if changes:
+            for key, (count, quantity_sum, value_sum) in self._deltas(changes).items():
+                row = aggregates.get(key)
+                if row is None:
+                    row = InventoryAggregate(
+                        user_id=user_id, status=key[0], expiry_ordinal=key[1],
+                        quantity_band=key[2], value_band=key[3],
+                        item_count=0, quantity_sum=0.0, value_sum=0.0
+                    )
+                    db.session.add(row)
+                    aggregates[key] = row
+                row.item_count += count
+                row.quantity_sum += quantity_sum
+                row.value_sum += value_sum
+                if row.item_count <= 0:
+                    # Empty group; deleting it also drops any leftover float error
+                    if row.id is not None:
+                        db.session.delete(row)
+                    else:
+                        db.session.expunge(row)
+                    del aggregates[key]
+
+            state.last_change_id = changes[-1].id
+            state.changes_applied += len(changes)
+            self._prune(user_id, state.last_change_id)
+            self._changes_applied.inc(len(changes))
+
+        return [self._row(row) for row in aggregates.values()]
+
+    def rebuild(
+        self,
+        user_id: int,
+        now: Optional[datetime] = None,
+        state: Optional[InventoryAggregateState] = None,
+        reason: str = 'requested'
+    ) -> List[Tuple]:
+        """Recompute a user's aggregates from the items table.
+
+        Returns:
+            list: The rebuilt rows, as returned by :meth:`refresh`
+        """
+        now = now or datetime.utcnow()
+        self._lock_owner(user_id)
+
+        quantity, value, quantity_band_column, value_band_column = item_bands()
+        expiry_day = func.date(Item.expiry_date)
+        grouped = db.session.query(
+            Item.status,
+            expiry_day,
+            quantity_band_column,
+            value_band_column,
+            func.count(Item.id),
+            func.coalesce(func.sum(quantity), 0),
+            func.coalesce(func.sum(value), 0)
+        ).filter(Item.user_id == user_id).group_by(
+            Item.status, expiry_day, quantity_band_column, value_band_column
+        ).all()
+
+        # date() returns text on SQLite, so groups are merged again on the parsed day
+        totals: Dict[GroupKey, List[float]] = {}
+        for status, expiry, quantity_band_value, value_band_value, count, quantity_sum, value_sum in grouped:
+            if isinstance(expiry, str):
+                expiry = date.fromisoformat(expiry)
+            key = (status, expiry.toordinal() if expiry else 0, int(quantity_band_value), int(value_band_value))
+            group = totals.setdefault(key, [0, 0.0, 0.0])
+            group[0] += count
+            group[1] += float(quantity_sum)
+            group[2] += float(value_sum)
+
+        # Writers are held off by the lock, so the log ends exactly where the scan did
+        last_change_id = db.session.query(func.max(ItemChange.id)).filter(ItemChange.user_id == user_id).scalar() or 0
+
+        InventoryAggregate.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        rows = [
+            InventoryAggregate(
+                user_id=user_id, status=key[0], expiry_ordinal=key[1], quantity_band=key[2], value_band=key[3],
+                item_count=count, quantity_sum=quantity_sum, value_sum=value_sum
+            )
+            for key, (count, quantity_sum, value_sum) in totals.items()
+        ]
+        db.session.add_all(rows)
+
+        if state is None:
+            state = InventoryAggregateState(user_id=user_id)
+            db.session.add(state)
+        state.last_change_id = last_change_id
+        state.changes_applied = 0
+        state.rebuilt_at = now
+        self._prune(user_id, last_change_id)
+        self._rebuilds.inc()
+
+        current_app.logger.info(f"Rebuilt {len(rows)} inventory aggregate(s) for user {user_id}: {reason}")
+        return [self._row(row) for row in rows]
+
+    def _deltas(self, changes: List[ItemChange]) -> Dict[GroupKey, List[float]]:
+        """Net (count, quantity, value) change per group for a run of logged changes."""
+        deltas: Dict[GroupKey, List[float]] = {}
+
+        def add(status, expiry_ordinal, quantity, value, sign):
+            key = (status, expiry_ordinal or 0, quantity_band(quantity), value_band(value))
+            delta = deltas.setdefault(key, [0, 0.0, 0.0])
+            delta[0] += sign
+            delta[1] += sign * quantity
+            delta[2] += sign * value
+
+        for change in changes:
+            if change.operation in (CHANGE_UPDATE, CHANGE_STATUS, CHANGE_DELETE):
+                add(change.old_status, change.old_expiry_ordinal, change.old_quantity or 0, change.old_value or 0, -1)
+            if change.operation in (CHANGE_INSERT, CHANGE_UPDATE, CHANGE_STATUS):
+                add(change.new_status, change.new_expiry_ordinal, change.new_quantity or 0, change.new_value or 0, 1)
+        return {key: delta for key, delta in deltas.items() if delta[0] or delta[1] or delta[2]}
+
+    @staticmethod
+    def _lock_owner(user_id: int) -> None:
+        """Lock the user's row until the caller's transaction ends, waiting for writers logging changes."""
+        db.session.query(User.id).filter_by(id=user_id).with_for_update().first()
+
+    @staticmethod
+    def _prune(user_id: int, last_change_id: int) -> None:
+        """Delete log rows the aggregates have absorbed.
+
+        The watermark row itself is kept: SQLite reuses the highest rowid once
+        it is deleted, which would put new changes below the watermark.
+        """
+        ItemChange.query.filter(
+            ItemChange.user_id == user_id,
+            ItemChange.id < last_change_id
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def _key(row: InventoryAggregate) -> GroupKey:
+        return (row.status, row.expiry_ordinal, row.quantity_band, row.value_band)
+
+    @staticmethod
+    def _row(row: InventoryAggregate) -> Tuple:
+        return (
+            row.status,
+            row.expiry_ordinal or None,
+            row.quantity_band,
+            row.value_band,
+            row.item_count,
+            row.value_sum,
+            row.quantity_sum
+        )
@@ -0,0 +1,172 @@
+"""Streaming export of a report's per-item sections.
+
+Items are read from a server-side cursor in fixed-size partitions. Each
+partition goes through the same :class:`ReportMetrics` kernel as the report
+itself, so risk scores and section membership match the report. Only one
+partition is held in memory at a time, whatever the inventory size.
+"""
+import csv
+import io
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import numpy as np
+from sqlalchemy import select
+from app.core.extensions import db
+from app.models.item import Item
+from app.models.report import Report
+from app.services.report_metrics import ReportMetrics, LOW_STOCK_QUANTITY
+
+# Columns written for every exported item, in order
+EXPORT_COLUMNS = (
+    'id', 'name', 'quantity', 'unit', 'expiry_date', 'days_until_expiry',
+    'location', 'batch_number', 'value', 'risk_score', 'status'
+)
+
+# Report sections that list items, as masks over a metrics kernel
+EXPORT_SECTIONS: Dict[str, Callable[[ReportMetrics], np.ndarray]] = {
+    'all_items': lambda kernel: np.ones(len(kernel.ids), dtype=bool),
+    'critical_items': lambda kernel: kernel.expiring_soon & (kernel.quantity > LOW_STOCK_QUANTITY),
+    'high_value_expiring': lambda kernel: kernel.expiring_soon & kernel.high_value,
+    'expired': lambda kernel: kernel.expired,
+    'critical': lambda kernel: kernel.expiring_soon,
+    'short_term': lambda kernel: kernel.days_between(8, 30),
+    'medium_term': lambda kernel: kernel.days_between(31, 90),
+    'long_term': lambda kernel: kernel.days_between(91, 365),
+    'beyond_year': lambda kernel: kernel.days_between(low=366),
+    'no_expiry_date': lambda kernel: kernel.pending,
+    'low_stock': lambda kernel: kernel.low_stock
+}
+
+# Format name -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+# Block size used when streaming a finished export file
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+class ReportExporter:
+    """Streams one per-item section of a report as CSV, XLSX or Parquet.
+
+    Rows are in item id order. Days until expiry, and therefore section
+    membership and risk scores, are evaluated relative to the report date;
+    the item fields themselves are read as they are now.
+    """
+
+    def __init__(self, report: Report, section: str = 'all_items', chunk_size: int = 2000) -> None:
+        if section not in EXPORT_SECTIONS:
+            raise ValueError(f"Section must be one of: {', '.join(EXPORT_SECTIONS)}")
+        self.report = report
+        self.section = section
+        self.chunk_size = chunk_size
+
+    def filename(self, export_format: str) -> str:
+        return f"report-{self.report.date.strftime('%Y-%m-%d')}-{self.section}.{EXPORT_FORMATS[export_format][1]}"
+
+    def iter_chunks(self) -> Iterator[List[Tuple[Any, ...]]]:
+        """Yield the section's rows one cursor partition at a time."""
+        query = select(
+            Item.id, Item.name, Item.quantity, Item.unit, Item.expiry_date, Item.location,
+            Item.batch_number, Item.cost_price, Item.status
+        ).where(Item.user_id == self.report.user_id).order_by(Item.id).execution_options(yield_per=self.chunk_size)
+
+        for partition in db.session.execute(query).partitions():
+            kernel = ReportMetrics(partition, self.report.date)
+            indexes = np.flatnonzero(EXPORT_SECTIONS[self.section](kernel))
+            if len(indexes):
+                yield [tuple(kernel.detail(int(index))[column] for column in EXPORT_COLUMNS) for index in indexes]
+
+    def stream(self, export_format: str) -> Iterator[bytes]:
+        """Stream the export in the given format."""
+        if export_format == 'csv':
+            return self.stream_csv()
+        if export_format == 'xlsx':
+            return self.stream_xlsx()
+        if export_format == 'parquet':
+            return self.stream_parquet()
+        raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    def stream_csv(self) -> Iterator[bytes]:
+        """Yield CSV text one partition at a time."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode('utf-8')
+
+        for rows in self.iter_chunks():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+
+    def stream_xlsx(self) -> Iterator[bytes]:
+        """Build the workbook in openpyxl write-only mode, then stream the file."""
+        # Imported here so a missing package fails before the response starts
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("XLSX export requires the openpyxl package")
+
+        def generate() -> Iterator[bytes]:
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet(title=self.section[:31])
+            sheet.append(EXPORT_COLUMNS)
+            for rows in self.iter_chunks():
+                for row in rows:
+                    sheet.append(row)
+            yield from self._stream_file(workbook.save)
+
+        return generate()
+
+    def stream_parquet(self) -> Iterator[bytes]:
+        """Write one Parquet row group per partition, then stream the file."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the pyarrow package")
+
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('name', pa.string()),
+            ('quantity', pa.float64()),
+            ('unit', pa.string()),
+            ('expiry_date', pa.string()),
+            ('days_until_expiry', pa.int64()),
+            ('location', pa.string()),
+            ('batch_number', pa.string()),
+            ('value', pa.float64()),
+            ('risk_score', pa.int64()),
+            ('status', pa.string())
+        ])
+
+        def write(path: str) -> None:
+            with pq.ParquetWriter(path, schema) as writer:
+                for rows in self.iter_chunks():
+                    columns = list(zip(*rows))
+                    writer.write_table(pa.table(
+                        {name: list(values) for name, values in zip(EXPORT_COLUMNS, columns)},
+                        schema=schema
+                    ))
+
+        return self._stream_file(write)
+
+    @staticmethod
+    def _stream_file(write: Callable[[str], None]) -> Iterator[bytes]:
+        """Write a file with ``write(path)`` and stream it back in blocks."""
+        handle, path = tempfile.mkstemp(prefix='report-export-')
+        os.close(handle)
+        try:
+            write(path)
+            with open(path, 'rb') as exported:
+                while True:
+                    block = exported.read(FILE_BLOCK_SIZE)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            os.remove(path)
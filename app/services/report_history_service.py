@@ -0,0 +1,112 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import func
+from app.core.extensions import db
+from app.models.daily_metric import DailyMetric, METRIC_FIELDS
+from app.models.metric_rollup import MetricRollup, PERIOD_WEEK, PERIOD_MONTH, period_bounds
+
+# Series resolutions accepted by get_series
+RESOLUTIONS = ('day', PERIOD_WEEK, PERIOD_MONTH)
+
+class ReportHistoryService:
+    """Service for the daily report metrics time series and its rollups."""
+
+    def record(self, user_id: int, day: date, values: Dict[str, Any]) -> DailyMetric:
+        """Store a day's report metrics and refresh the week and month rollups.
+
+        Runs in the caller's transaction so the metrics are committed together
+        with the report they describe.
+
+        Args:
+            user_id: ID of the user the report belongs to
+            day: Report date
+            values: Metric values keyed by ``METRIC_FIELDS``
+
+        Returns:
+            DailyMetric: The recorded row
+        """
+        DailyMetric.query.filter_by(user_id=user_id, date=day).delete(synchronize_session=False)
+        metric = DailyMetric(user_id=user_id, date=day, **{field: values.get(field) or 0 for field in METRIC_FIELDS})
+        db.session.add(metric)
+        db.session.flush()
+
+        for period in (PERIOD_WEEK, PERIOD_MONTH):
+            self._refresh_rollup(user_id, period, day)
+        return metric
+
+    def _refresh_rollup(self, user_id: int, period: str, day: date) -> None:
+        """Recompute one rollup row from the daily rows in its period."""
+        start, end = period_bounds(period, day)
+        row = db.session.query(
+            func.count(DailyMetric.id),
+            *[func.avg(getattr(DailyMetric, field)) for field in METRIC_FIELDS]
+        ).filter(
+            DailyMetric.user_id == user_id,
+            DailyMetric.date.between(start, end)
+        ).one()
+
+        rollup = MetricRollup.query.filter_by(user_id=user_id, period=period, period_start=start).first()
+        if rollup is None:
+            rollup = MetricRollup(user_id=user_id, period=period, period_start=start)
+            db.session.add(rollup)
+        rollup.days = row[0]
+        for field, average in zip(METRIC_FIELDS, row[1:]):
+            setattr(rollup, field, float(average or 0))
+
+    def get_day(self, user_id: int, day: date) -> Optional[Dict[str, Any]]:
+        """Get the recorded metrics for one day, if any."""
+        metric = DailyMetric.query.filter_by(user_id=user_id, date=day).first()
+        return metric.to_dict() if metric else None
+
+    def get_series(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        resolution: str = 'day',
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a user's metrics over a date range with one range scan.
+
+        Args:
+            user_id: ID of the user
+            start_date: First day of the range
+            end_date: Last day of the range
+            resolution: 'day', 'week' or 'month'
+            fields: Metrics to include (all of ``METRIC_FIELDS`` by default)
+
+        Returns:
+            list: One point per day or period, oldest first
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Resolution must be one of: {', '.join(RESOLUTIONS)}")
+        fields = [field for field in (fields or METRIC_FIELDS) if field in METRIC_FIELDS]
+
+        if resolution == 'day':
+            rows = db.session.query(DailyMetric.date, *[getattr(DailyMetric, field) for field in fields]).filter(
+                DailyMetric.user_id == user_id,
+                DailyMetric.date.between(start_date, end_date)
+            ).order_by(DailyMetric.date).all()
+            return [
+                {'date': row[0].strftime('%Y-%m-%d'), **dict(zip(fields, row[1:]))}
+                for row in rows
+            ]
+
+        first_period, _ = period_bounds(resolution, start_date)
+        rows = db.session.query(
+            MetricRollup.period_start,
+            MetricRollup.days,
+            *[getattr(MetricRollup, field) for field in fields]
+        ).filter(
+            MetricRollup.user_id == user_id,
+            MetricRollup.period == resolution,
+            MetricRollup.period_start.between(first_period, end_date)
+        ).order_by(MetricRollup.period_start).all()
+        return [
+            {
+                'date': row[0].strftime('%Y-%m-%d'),
+                'days': row[1],
+                **{field: round(value, 2) for field, value in zip(fields, row[2:])}
+            }
+            for row in rows
+        ]
@@ -0,0 +1,498 @@
+"""Vectorised metrics shared by the report sections.
+
+Three sources feed the same interface: :class:`ReportMetrics` loads every item
+into arrays, :class:`GroupedReportMetrics` gets the same numbers from one
+grouped SQL query plus a capped detail query, and
+:class:`IncrementalReportMetrics` folds aggregates maintained from the item
+change log.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import case, func
+from app.core.extensions import db
+from app.models.item import Item, STATUS_ACTIVE, STATUS_EXPIRING_SOON, STATUS_EXPIRED, STATUS_PENDING
+
+# Thresholds shared with ReportService
+LOW_STOCK_QUANTITY = 10
+HIGH_QUANTITY = 100
+HIGH_VALUE = 1000
+SAFETY_STOCK = 5
+MIN_ORDER_QUANTITY = 10
+
+# Days-until-expiry buckets as (first day, representative value); every day
+# range the report sections filter on starts at one of these boundaries
+EXPIRY_BUCKETS = ((None, -1), (0, 0), (1, 1), (8, 8), (31, 31), (91, 91), (366, 366))
+
+
+def item_bands():
+    """SQL expressions for an item's quantity, value and their report bands.
+
+    Returns:
+        tuple: (quantity, value, quantity band, value band)
+    """
+    quantity = func.coalesce(Item.quantity, 0)
+    value = quantity * func.coalesce(Item.cost_price, 0)
+
+    # Representative values sit inside each band, so masks and risk scores match per-item results
+    quantity_band = case(
+        (quantity <= SAFETY_STOCK, SAFETY_STOCK),
+        (quantity < LOW_STOCK_QUANTITY, LOW_STOCK_QUANTITY - 1),
+        (quantity <= MIN_ORDER_QUANTITY, MIN_ORDER_QUANTITY),
+        (quantity <= MIN_ORDER_QUANTITY * 2, MIN_ORDER_QUANTITY * 2),
+        (quantity <= HIGH_QUANTITY, HIGH_QUANTITY),
+        else_=HIGH_QUANTITY + 1
+    )
+    value_band = case(
+        (value <= 100, 100),
+        (value <= 500, 500),
+        (value <= HIGH_VALUE, HIGH_VALUE),
+        else_=HIGH_VALUE + 1
+    )
+    return quantity, value, quantity_band, value_band
+
+
+def day_bucket(days: Optional[int]) -> Optional[int]:
+    """Representative days-until-expiry of the bucket holding ``days``."""
+    if days is None:
+        return None
+    representative = EXPIRY_BUCKETS[0][1]
+    for first, bucket_value in EXPIRY_BUCKETS[1:]:
+        if days < first:
+            break
+        representative = bucket_value
+    return representative
+
+
+def quantity_band(quantity: float) -> int:
+    """Python twin of the quantity band CASE in :class:`GroupedReportMetrics`."""
+    if quantity <= SAFETY_STOCK:
+        return SAFETY_STOCK
+    if quantity < LOW_STOCK_QUANTITY:
+        return LOW_STOCK_QUANTITY - 1
+    if quantity <= MIN_ORDER_QUANTITY:
+        return MIN_ORDER_QUANTITY
+    if quantity <= MIN_ORDER_QUANTITY * 2:
+        return MIN_ORDER_QUANTITY * 2
+    if quantity <= HIGH_QUANTITY:
+        return HIGH_QUANTITY
+    return HIGH_QUANTITY + 1
+
+
+def value_band(value: float) -> int:
+    """Python twin of the value band CASE in :class:`GroupedReportMetrics`."""
+    if value <= 100:
+        return 100
+    if value <= 500:
+        return 500
+    if value <= HIGH_VALUE:
+        return HIGH_VALUE
+    return HIGH_VALUE + 1
+
+
+class ReportMetrics:
+    """Column arrays for a user's items, built in one pass over the ORM objects.
+
+    Quantity, value, days until expiry and status are loaded into NumPy
+    arrays once; every count, sum, bucket and risk score used by the report
+    sections is then a vectorised mask or reduction over those arrays.
+    Per-item detail dictionaries are built only for the items a section
+    actually lists, and each one is built at most once.
+
+    Each row carries a weight and value/quantity sums so that a row can
+    stand for a group of items (see :class:`GroupedReportMetrics`).
+    """
+
+    def __init__(self, items: Sequence[Item], today: Optional[date] = None) -> None:
+        self.items = list(items)
+        self.today = today or datetime.now().date()
+        count = len(self.items)
+
+        ids = np.empty(count, dtype=np.int64)
+        quantity = np.empty(count, dtype=np.float64)
+        cost_price = np.empty(count, dtype=np.float64)
+        expiry_ordinal = np.zeros(count, dtype=np.int64)
+        has_expiry = np.zeros(count, dtype=bool)
+        status = np.empty(count, dtype=object)
+
+        for index, item in enumerate(self.items):
+            ids[index] = item.id or 0
+            quantity[index] = item.quantity or 0
+            cost_price[index] = item.cost_price or 0
+            status[index] = item.status
+            if item.expiry_date:
+                expiry = item.expiry_date.date() if isinstance(item.expiry_date, datetime) else item.expiry_date
+                expiry_ordinal[index] = expiry.toordinal()
+                has_expiry[index] = True
+
+        self.ids = ids
+        value = quantity * cost_price
+        self._set_columns(
+            quantity=quantity,
+            value=value,
+            days=np.where(has_expiry, expiry_ordinal - self.today.toordinal(), 0),
+            has_expiry=has_expiry,
+            status=status,
+            weight=np.ones(count, dtype=np.int64),
+            quantity_sum=quantity,
+            value_sum=value
+        )
+
+    def _set_columns(self, quantity: np.ndarray, value: np.ndarray, days: np.ndarray, has_expiry: np.ndarray,
+                     status: np.ndarray, weight: np.ndarray, quantity_sum: np.ndarray, value_sum: np.ndarray) -> None:
+        self.quantity = quantity
+        self.value = value
+        self.has_expiry = has_expiry
+        # Only meaningful where has_expiry is set
+        self.days = days
+        self.weight = weight
+        self.quantity_sum = quantity_sum
+        self.value_sum = value_sum
+
+        self.expired = status == STATUS_EXPIRED
+        self.expiring_soon = status == STATUS_EXPIRING_SOON
+        self.pending = status == STATUS_PENDING
+        self.active = status == STATUS_ACTIVE
+        self.low_stock = quantity < LOW_STOCK_QUANTITY
+        self.high_value = value > HIGH_VALUE
+
+        self.risk_scores = self._risk_scores()
+        self._details: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return int(self.weight.sum())
+
+    def days_between(self, low: Optional[int] = None, high: Optional[int] = None) -> np.ndarray:
+        """Mask of items with an expiry date and ``low <= days <= high``."""
+        mask = self.has_expiry.copy()
+        if low is not None:
+            mask &= self.days >= low
+        if high is not None:
+            mask &= self.days <= high
+        return mask
+
+    def count(self, mask: Optional[np.ndarray] = None) -> int:
+        """Number of items in the mask (all items if None)."""
+        return len(self) if mask is None else int(self.weight[mask].sum())
+
+    def total_value(self, mask: Optional[np.ndarray] = None) -> float:
+        """Sum of quantity * cost price over the mask."""
+        return float(self.value_sum.sum() if mask is None else self.value_sum[mask].sum())
+
+    def total_quantity(self, mask: Optional[np.ndarray] = None) -> float:
+        """Sum of quantity over the mask."""
+        return float(self.quantity_sum.sum() if mask is None else self.quantity_sum[mask].sum())
+
+    def item_ids(self, mask: np.ndarray) -> List[int]:
+        """IDs of the items in the mask, in inventory order."""
+        return self.ids[mask].tolist()
+
+    def days_until_expiry(self, index: int) -> Optional[int]:
+        """Days until expiry of one item, or None without an expiry date."""
+        return int(self.days[index]) if self.has_expiry[index] else None
+
+    def details(self, mask: np.ndarray) -> List[Dict[str, Any]]:
+        """Detail dictionaries for the items in the mask, in inventory order."""
+        return [self.detail(int(index)) for index in np.flatnonzero(mask)]
+
+    def ranked_details(self) -> List[Dict[str, Any]]:
+        """Detail dictionaries for all items by descending risk score."""
+        return [self.detail(int(index)) for index in np.argsort(-self.risk_scores, kind='stable')]
+
+    def detail(self, index: int) -> Dict[str, Any]:
+        """Detail dictionary for one item, including its risk score."""
+        cached = self._details.get(index)
+        if cached is None:
+            cached = _item_detail(self.items[index], self.days_until_expiry(index), float(self.value[index]),
+                                  int(self.risk_scores[index]))
+            self._details[index] = cached
+        return cached
+
+    def summary_details(self, mask: np.ndarray) -> List[Dict[str, Any]]:
+        """Detail dictionaries without location, batch and risk score."""
+        return [_summary(detail) for detail in self.details(mask)]
+
+    def _risk_scores(self) -> np.ndarray:
+        """Vectorised ReportService._calculate_risk_score for every row."""
+        days = self.days
+        quantity = self.quantity
+        value = self.value
+
+        expiry_score = np.select(
+            [days <= 7, days <= 30, days <= 90, days <= 365],
+            [40, 25, 15, 5],
+            default=0
+        )
+        quantity_score = np.select(
+            [quantity <= SAFETY_STOCK, quantity <= MIN_ORDER_QUANTITY, quantity <= MIN_ORDER_QUANTITY * 2],
+            [30, 20, 10],
+            default=0
+        )
+        value_score = np.select(
+            [value > 1000, value > 500, value > 100],
+            [30, 20, 10],
+            default=0
+        )
+
+        scores = np.minimum(expiry_score + quantity_score + value_score, 100)
+        # Items without expiry dates get a medium risk score
+        return np.where(self.has_expiry, scores, 50)
+
+
+class GroupedReportMetrics(ReportMetrics):
+    """Report metrics aggregated in the database.
+
+    One grouped query returns a row per (status, expiry bucket, quantity
+    band, value band) with the item count and value/quantity sums. Rows
+    carry a representative days/quantity/value inside their band, so the
+    masks and risk scores of :class:`ReportMetrics` work unchanged while
+    counts and sums come from the aggregates. Detail lists are filled from a
+    second query that returns at most ``detail_limit`` items per group, and
+    each list is capped at ``detail_limit`` items by risk score.
+    """
+
+    def __init__(self, user_id: int, today: Optional[date] = None, detail_limit: int = 100) -> None:
+        self.today = today or datetime.now().date()
+        self.detail_limit = detail_limit
+        self.items = []
+
+        banded = self._banded_items(user_id)
+        self._set_groups(self._load_groups(banded))
+        self._group_details = self._load_details(banded)
+
+    def _load_groups(self, banded) -> List[Tuple]:
+        """Rows of (status, day bucket, quantity band, value band, count, value sum, quantity sum)."""
+        group_columns = (banded.c.status, banded.c.day_bucket, banded.c.quantity_band, banded.c.value_band)
+        return db.session.query(
+            *group_columns,
+            func.count(banded.c.id),
+            func.coalesce(func.sum(banded.c.value), 0),
+            func.coalesce(func.sum(banded.c.quantity), 0)
+        ).group_by(*group_columns).all()
+
+    def _set_groups(self, rows: Sequence[Tuple]) -> None:
+        self._groups: Dict[Tuple, int] = {
+            self._group_key(row[0], row[1], row[2], row[3]): index
+            for index, row in enumerate(rows)
+        }
+
+        self.ids = np.zeros(len(rows), dtype=np.int64)
+        self._set_columns(
+            quantity=np.array([row[2] for row in rows], dtype=np.float64),
+            value=np.array([row[3] for row in rows], dtype=np.float64),
+            days=np.array([row[1] if row[1] is not None else 0 for row in rows], dtype=np.int64),
+            has_expiry=np.array([row[1] is not None for row in rows], dtype=bool),
+            status=np.array([row[0] for row in rows], dtype=object),
+            weight=np.array([row[4] for row in rows], dtype=np.int64),
+            quantity_sum=np.array([row[6] for row in rows], dtype=np.float64),
+            value_sum=np.array([row[5] for row in rows], dtype=np.float64)
+        )
+
+    def _banded_items(self, user_id: int):
+        """Subquery mapping each of the user's items to its expiry bucket and bands.
+
+        Grouping on the subquery's columns (rather than repeating the CASE
+        expressions) keeps the GROUP BY valid on PostgreSQL.
+        """
+        def day_start(offset: int) -> datetime:
+            return datetime.combine(self.today + timedelta(days=offset), time.min)
+
+        quantity, value, quantity_band, value_band = item_bands()
+        day_bucket = case(
+            (Item.expiry_date.is_(None), None),
+            *[
+                (Item.expiry_date < day_start(next_first), representative)
+                for (_, representative), (next_first, _) in zip(EXPIRY_BUCKETS, EXPIRY_BUCKETS[1:])
+            ],
+            else_=EXPIRY_BUCKETS[-1][1]
+        )
+
+        return db.session.query(
+            Item.id.label('id'),
+            Item.status.label('status'),
+            Item.expiry_date.label('expiry_date'),
+            day_bucket.label('day_bucket'),
+            quantity_band.label('quantity_band'),
+            value_band.label('value_band'),
+            quantity.label('quantity'),
+            value.label('value')
+        ).filter(Item.user_id == user_id).subquery()
+
+    @staticmethod
+    def _group_key(status, day_bucket, quantity_band, value_band) -> Tuple:
+        return (status, day_bucket, float(quantity_band), float(value_band))
+
+    def _load_details(self, banded) -> Dict[int, List[Dict[str, Any]]]:
+        """Fetch the first ``detail_limit`` items of every group, soonest expiry first."""
+        group_columns = (banded.c.status, banded.c.day_bucket, banded.c.quantity_band, banded.c.value_band)
+        ranked = db.session.query(
+            banded.c.id,
+            *group_columns,
+            func.row_number().over(
+                partition_by=group_columns,
+                order_by=(banded.c.expiry_date, banded.c.id)
+            ).label('position')
+        ).subquery()
+
+        rows = db.session.query(
+            Item, ranked.c.status, ranked.c.day_bucket, ranked.c.quantity_band, ranked.c.value_band
+        ).join(
+            ranked, Item.id == ranked.c.id
+        ).filter(
+            ranked.c.position <= self.detail_limit
+        ).order_by(Item.expiry_date, Item.id).all()
+
+        details: Dict[int, List[Dict[str, Any]]] = {}
+        for item, status, day_bucket, quantity_band, value_band in rows:
+            group = self._groups.get(self._group_key(status, day_bucket, quantity_band, value_band))
+            if group is None:
+                continue
+            days = None
+            if item.expiry_date:
+                expiry = item.expiry_date.date() if isinstance(item.expiry_date, datetime) else item.expiry_date
+                days = (expiry - self.today).days
+            details.setdefault(group, []).append(_item_detail(
+                item,
+                days,
+                float((item.quantity or 0) * (item.cost_price or 0)),
+                int(self.risk_scores[group])
+            ))
+        return details
+
+    def details(self, mask: np.ndarray) -> List[Dict[str, Any]]:
+        """Up to ``detail_limit`` items in the mask, highest risk first."""
+        selected = [detail for group in np.flatnonzero(mask) for detail in self._group_details.get(int(group), [])]
+        selected.sort(key=_risk_sort_key)
+        return selected[:self.detail_limit]
+
+    def ranked_details(self) -> List[Dict[str, Any]]:
+        """Up to ``detail_limit`` items by descending risk score."""
+        return self.details(np.ones(len(self.weight), dtype=bool))
+
+    def item_ids(self, mask: np.ndarray) -> List[int]:
+        """IDs of the listed items in the mask."""
+        return [detail['id'] for detail in self.details(mask)]
+
+
+def _item_detail(item: Item, days_until_expiry: Optional[int], value: float, risk_score: int) -> Dict[str, Any]:
+    return {
+        'id': item.id,
+        'name': item.name,
+        'quantity': item.quantity,
+        'unit': item.unit,
+        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
+        'days_until_expiry': days_until_expiry,
+        'location': item.location,
+        'batch_number': item.batch_number,
+        'value': value,
+        'risk_score': risk_score,
+        'status': item.status
+    }
+
+
+def _summary(detail: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: detail[key]
+        for key in ('id', 'name', 'quantity', 'unit', 'expiry_date', 'days_until_expiry', 'value', 'status')
+    }
+
+
+def _risk_sort_key(detail: Dict[str, Any]) -> tuple:
+    days = detail['days_until_expiry']
+    return (-detail['risk_score'], days if days is not None else float('inf'), detail['id'])
+
+
+class IncrementalReportMetrics(GroupedReportMetrics):
+    """Report metrics folded from maintained per-expiry-date aggregates.
+
+    ``aggregates`` are (status, expiry ordinal or None, quantity band, value
+    band, count, value sum, quantity sum) rows kept up to date from the item
+    change log (see ``ReportAggregateService``). Expiry dates are absolute,
+    so the rows only need folding into today's day buckets here instead of
+    a grouped scan over every item.
+
+    Detail lists are read per group with a ``LIMIT`` over the
+    ``(user_id, status, expiry_date)`` index. The aggregates give each
+    group's expiry dates and counts, so the range read stops at the first
+    day by which ``detail_limit`` of its items have expired. The items
+    outside a report's lists are never read.
+    """
+
+    def __init__(self, user_id: int, aggregates: Sequence[Tuple], today: Optional[date] = None,
+                 detail_limit: int = 100) -> None:
+        self.today = today or datetime.now().date()
+        self.detail_limit = detail_limit
+        self.items = []
+
+        rows, days_by_group = self._fold(aggregates)
+        self._set_groups(rows)
+        self._group_details = self._load_group_details(user_id, days_by_group)
+
+    def _fold(self, aggregates: Sequence[Tuple]) -> Tuple[List[Tuple], Dict[Tuple, Dict[Optional[int], int]]]:
+        """Fold aggregate rows into today's day buckets.
+
+        Returns:
+            tuple: (group rows as for ``_set_groups``, item count per expiry
+            ordinal within each group, keyed like the rows)
+        """
+        today = self.today.toordinal()
+        folded: Dict[Tuple, List[float]] = {}
+        days_by_group: Dict[Tuple, Dict[Optional[int], int]] = {}
+        for status, expiry_ordinal, quantity_band_value, value_band_value, count, value_sum, quantity_sum in aggregates:
+            bucket = day_bucket(expiry_ordinal - today if expiry_ordinal is not None else None)
+            key = (status, bucket, quantity_band_value, value_band_value)
+            totals = folded.setdefault(key, [0, 0.0, 0.0])
+            totals[0] += count
+            totals[1] += value_sum
+            totals[2] += quantity_sum
+            days = days_by_group.setdefault(key, {})
+            days[expiry_ordinal] = days.get(expiry_ordinal, 0) + count
+        rows = [key + tuple(totals) for key, totals in folded.items() if totals[0] > 0]
+        return rows, {key: days_by_group[key] for key in (row[:4] for row in rows)}
+
+    def _load_group_details(self, user_id: int, days_by_group: Dict[Tuple, Dict[Optional[int], int]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Fetch the first ``detail_limit`` items of every group, soonest expiry first."""
+        _, _, quantity_band, value_band = item_bands()
+        details: Dict[int, List[Dict[str, Any]]] = {}
+        for key, days in days_by_group.items():
+            group = self._groups[self._group_key(*key)]
+            status, _, quantity_band_value, value_band_value = key
+
+            query = Item.query.filter(
+                Item.user_id == user_id,
+                Item.status == status if status is not None else Item.status.is_(None),
+                quantity_band == quantity_band_value,
+                value_band == value_band_value
+            )
+            if None in days:
+                query = query.filter(Item.expiry_date.is_(None))
+            else:
+                # Stop the range at the day the group's first detail_limit items have reached
+                ordinals = sorted(days)
+                last, listed = ordinals[-1], 0
+                for ordinal in ordinals:
+                    listed += days[ordinal]
+                    if listed >= self.detail_limit:
+                        last = ordinal
+                        break
+                query = query.filter(
+                    Item.expiry_date >= _day_start(ordinals[0]),
+                    Item.expiry_date < _day_start(last + 1)
+                )
+
+            for item in query.order_by(Item.expiry_date, Item.id).limit(self.detail_limit):
+                days_until_expiry = None
+                if item.expiry_date:
+                    expiry = item.expiry_date.date() if isinstance(item.expiry_date, datetime) else item.expiry_date
+                    days_until_expiry = (expiry - self.today).days
+                details.setdefault(group, []).append(_item_detail(
+                    item,
+                    days_until_expiry,
+                    float((item.quantity or 0) * (item.cost_price or 0)),
+                    int(self.risk_scores[group])
+                ))
+        return details
+
+
+def _day_start(ordinal: int) -> datetime:
+    return datetime.combine(date.fromordinal(ordinal), time.min)
@@ -1,18 +1,32 @@
 from datetime import datetime, timedelta, date
+import hashlib
 import secrets
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from flask import current_app
+from sqlalchemy import and_, func
 from app.core.extensions import db
-from app.models.report import Report
-from app.models.item import Item, STATUS_ACTIVE, STATUS_EXPIRING_SOON, STATUS_EXPIRED, STATUS_PENDING
+from app.models.report import Report, REPORT_SCHEMA_VERSION
+from app.models.item import Item, calculate_risk_score
 from app.models.user import User
 from app.services.activity_service import ActivityService
+from app.services.report_history_service import ReportHistoryService
+from app.services.report_aggregate_service import ReportAggregateService
+from app.services.public_report_cache import public_report_cache
+from app.services.report_metrics import ReportMetrics, GroupedReportMetrics, IncrementalReportMetrics, HIGH_QUANTITY, LOW_STOCK_QUANTITY
+
+# Metrics compared week over week in each report
+COMPARISON_FIELDS = (
+    'expiring_items', 'expired_items', 'low_stock_items', 'total_items', 'active_items',
+    'critical_items', 'pending_items', 'total_value', 'value_at_risk'
+)
 
 class ReportService:
     """Service for generating and managing inventory reports."""
     
     def __init__(self):
         self.activity_service = ActivityService()
+        self.history_service = ReportHistoryService()
+        self.aggregate_service = ReportAggregateService()
     
     def _calculate_risk_score(self, item) -> float:
         """Calculate risk score for an item (0-100) based on industry standards.
@@ -22,52 +36,9 @@ class ReportService:
         - Quantity risk (30%): Based on MOQ, safety stock, and current levels
         - Value risk (30%): Based on item value and carrying costs
         """
-        if not item.expiry_date:
-            return 50  # Items without expiry dates get medium risk score
-            
-        score = 0
-        quantity = item.quantity or 0
-        value = quantity * (item.cost_price or 0)
-        
-        # 1. Expiry Risk (40% weight) - Use actual Item model logic
-        days_until_expiry = item.days_until_expiry
-        
-        if days_until_expiry is None:
-            score += 40  # Can't calculate, assume high risk
-        elif days_until_expiry < 0:
-            score += 40  # Expired items get maximum risk score
-        elif 0 <= days_until_expiry <= 7:
-            score += 40  # Critical: Within 7 days (matches STATUS_EXPIRING_SOON logic)
-        elif 8 <= days_until_expiry <= 30:
-            score += 25  # High: Within 30 days
-        elif 31 <= days_until_expiry <= 90:
-            score += 15  # Medium: Within 3 months
-        elif 91 <= days_until_expiry <= 365:
-            score += 5   # Low: Within 1 year
-            
-        # 2. Quantity Risk (30% weight)
-        # Use default values if attributes don't exist
-        min_order_qty = getattr(item, 'min_order_quantity', 10)
-        safety_stock = getattr(item, 'safety_stock', 5)
-        
-        if quantity <= safety_stock:
-            score += 30  # Critical: Below safety stock
-        elif quantity <= min_order_qty:
-            score += 20  # High: Below MOQ
-        elif quantity <= min_order_qty * 2:
-            score += 10  # Medium: Below 2x MOQ
-            
-        # 3. Value Risk (30% weight)
-        if value > 1000:
-            score += 30  # High value items
-        elif value > 500:
-            score += 20  # Medium value items
-        elif value > 100:
-            score += 10  # Low value items
-            
-        return min(score, 100)  # Cap at 100
+        return calculate_risk_score(item.days_until_expiry, item.quantity, item.cost_price)
     
-    def _calculate_value_at_risk(self, items: List[Item]) -> Dict[str, Any]:
+    def _calculate_value_at_risk(self, items: List[Item], kernel: Optional[ReportMetrics] = None) -> Dict[str, Any]:
         """Calculate Value at Risk (VaR) analysis using industry-standard methodology.
         
         Categories:
@@ -76,82 +47,26 @@ class ReportService:
         - Medium-term Risk (31-90 days): Items expiring within 3 months
         - High Quantity Risk: Items with large quantities expiring soon
         """
-        total_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
+        kernel = kernel or ReportMetrics(items)
+        total_value = kernel.total_value()
         
         # Use actual Item model status and expiry logic
-        immediate_risk_items = [item for item in items if item.status == STATUS_EXPIRING_SOON]
-        short_term_items = [item for item in items if item.days_until_expiry is not None and 8 <= item.days_until_expiry <= 30]
-        medium_term_items = [item for item in items if item.days_until_expiry is not None and 31 <= item.days_until_expiry <= 90]
-        high_quantity_items = [item for item in items if (item.quantity or 0) > 100 and item.days_until_expiry is not None and item.days_until_expiry <= 30]
+        immediate_risk_mask = kernel.expiring_soon
+        short_term_mask = kernel.days_between(8, 30)
+        medium_term_mask = kernel.days_between(31, 90)
+        high_quantity_mask = (kernel.quantity > HIGH_QUANTITY) & kernel.days_between(high=30)
         
         # Calculate values
-        immediate_risk_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in immediate_risk_items)
-        short_term_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in short_term_items)
-        medium_term_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in medium_term_items)
-        high_quantity_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in high_quantity_items)
-            
-            # Calculate percentages
+        immediate_risk_value = kernel.total_value(immediate_risk_mask)
+        short_term_value = kernel.total_value(short_term_mask)
+        medium_term_value = kernel.total_value(medium_term_mask)
+        high_quantity_value = kernel.total_value(high_quantity_mask)
+        
+        # Calculate percentages
         immediate_risk_percentage = (immediate_risk_value / total_value * 100) if total_value > 0 else 0
         short_term_percentage = (short_term_value / total_value * 100) if total_value > 0 else 0
         medium_term_percentage = (medium_term_value / total_value * 100) if total_value > 0 else 0
         high_quantity_percentage = (high_quantity_value / total_value * 100) if total_value > 0 else 0
-            
-        # Prepare item details for each category
-        immediate_risk_details = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'unit': item.unit,
-                'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                'days_until_expiry': item.days_until_expiry,
-                'value': (item.quantity or 0) * (item.cost_price or 0),
-                'status': item.status
-            }
-            for item in immediate_risk_items
-        ]
-        
-        short_term_details = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'unit': item.unit,
-                'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                'days_until_expiry': item.days_until_expiry,
-                'value': (item.quantity or 0) * (item.cost_price or 0),
-                'status': item.status
-            }
-            for item in short_term_items
-        ]
-        
-        medium_term_details = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'unit': item.unit,
-                'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                'days_until_expiry': item.days_until_expiry,
-                'value': (item.quantity or 0) * (item.cost_price or 0),
-                'status': item.status
-            }
-            for item in medium_term_items
-        ]
-        
-        high_quantity_details = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'quantity': item.quantity,
-                'unit': item.unit,
-                'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                'days_until_expiry': item.days_until_expiry,
-                'value': (item.quantity or 0) * (item.cost_price or 0),
-                'status': item.status
-            }
-            for item in high_quantity_items
-        ]
         
         # Calculate overall risk metrics
         total_risk_value = immediate_risk_value + short_term_value + medium_term_value
@@ -166,31 +81,31 @@ class ReportService:
         ))
         
         return {
-                'immediate_risk': {
+            'immediate_risk': {
                 'value': immediate_risk_value,
                 'percentage': immediate_risk_percentage,
-                'count': len(immediate_risk_items),
-                'items': immediate_risk_details
-                },
-                'short_term_risk': {
-                    'value': short_term_value,
-                    'percentage': short_term_percentage,
-                'count': len(short_term_items),
-                'items': short_term_details
-                },
-                'medium_term_risk': {
-                    'value': medium_term_value,
-                    'percentage': medium_term_percentage,
-                'count': len(medium_term_items),
-                'items': medium_term_details
-                },
-                'high_quantity_risk': {
-                    'value': high_quantity_value,
-                    'percentage': high_quantity_percentage,
-                'count': len(high_quantity_items),
-                'items': high_quantity_details
-                },
-                'metrics': {
+                'count': kernel.count(immediate_risk_mask),
+                'items': kernel.summary_details(immediate_risk_mask)
+            },
+            'short_term_risk': {
+                'value': short_term_value,
+                'percentage': short_term_percentage,
+                'count': kernel.count(short_term_mask),
+                'items': kernel.summary_details(short_term_mask)
+            },
+            'medium_term_risk': {
+                'value': medium_term_value,
+                'percentage': medium_term_percentage,
+                'count': kernel.count(medium_term_mask),
+                'items': kernel.summary_details(medium_term_mask)
+            },
+            'high_quantity_risk': {
+                'value': high_quantity_value,
+                'percentage': high_quantity_percentage,
+                'count': kernel.count(high_quantity_mask),
+                'items': kernel.summary_details(high_quantity_mask)
+            },
+            'metrics': {
                 'total_risk_value': total_risk_value,
                 'total_risk_percentage': total_risk_percentage,
                 'risk_score': risk_score,
@@ -198,7 +113,7 @@ class ReportService:
             }
         }
     
-    def _generate_action_recommendations(self, items: List[Item], metrics: Dict, risk_analysis: Dict) -> List[Dict]:
+    def _generate_action_recommendations(self, items: List[Item], metrics: Dict, risk_analysis: Dict, kernel: Optional[ReportMetrics] = None) -> List[Dict]:
         """Generate industry-aligned action recommendations based on inventory analysis.
         
         This method provides specific, actionable recommendations based on:
@@ -209,14 +124,16 @@ class ReportService:
         - Compliance and safety considerations
         """
         recommendations = []
+        kernel = kernel or ReportMetrics(items)
         
         # Get key metrics
-        total_items = len(items)
-        total_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
-        expiring_items = [item for item in items if item.days_until_expiry is not None and 0 < item.days_until_expiry <= 7]
-        expired_items = [item for item in items if item.days_until_expiry is not None and item.days_until_expiry <= 0]
-        low_stock_items = [item for item in items if (item.quantity or 0) < 10]
-        high_value_items = [item for item in items if (item.quantity or 0) * (item.cost_price or 0) > 1000]
+        total_items = len(kernel)
+        total_value = kernel.total_value()
+        expiring_mask = kernel.days_between(1, 7)
+        expired_mask = kernel.days_between(high=0)
+        expiring_count = kernel.count(expiring_mask)
+        expired_count = kernel.count(expired_mask)
+        low_stock_count = kernel.count(kernel.low_stock)
         
         # Calculate additional metrics
         stock_coverage = metrics.get('inventory_health', {}).get('stock_coverage', 0)
@@ -226,32 +143,32 @@ class ReportService:
         # URGENT RECOMMENDATIONS (Immediate action required)
         
         # 1. Expired Items - Critical Safety Issue
-        if expired_items:
-            expired_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in expired_items)
+        if expired_count:
+            expired_value = kernel.total_value(expired_mask)
             recommendations.append({
                 'type': 'urgent',
                 'category': 'safety_compliance',
                 'title': 'Immediate Disposal Required',
-                'message': f'Dispose of {len(expired_items)} expired items worth £{expired_value:.2f} immediately. Expired items pose safety risks and compliance issues.',
+                'message': f'Dispose of {expired_count} expired items worth £{expired_value:.2f} immediately. Expired items pose safety risks and compliance issues.',
                 'action': 'Review expired items list and arrange disposal within 24 hours',
                 'impact': 'High - Safety and compliance risk',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in expired_items],
+                'item_ids': kernel.item_ids(expired_mask),
                 'priority_score': 100
             })
         
         # 2. Critical Expiry Risk
-        if expiring_items:
-            expiring_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in expiring_items)
+        if expiring_count:
+            expiring_value = kernel.total_value(expiring_mask)
             recommendations.append({
                 'type': 'urgent',
                 'category': 'expiry_management',
                 'title': 'Critical Expiry Management',
-                'message': f'Act immediately on {len(expiring_items)} items expiring within 7 days (value: £{expiring_value:.2f}). Consider discounting, donation, or disposal.',
+                'message': f'Act immediately on {expiring_count} items expiring within 7 days (value: £{expiring_value:.2f}). Consider discounting, donation, or disposal.',
                 'action': 'Implement discount strategy or arrange disposal to minimize losses',
                 'impact': 'High - Financial loss prevention',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in expiring_items],
+                'item_ids': kernel.item_ids(expiring_mask),
                 'priority_score': 95
             })
         
@@ -265,7 +182,7 @@ class ReportService:
                 'action': 'Review high-value expiring items and implement discounting or disposal strategy',
                 'impact': 'High - Financial loss prevention',
                 'effort': 'High',
-                'item_ids': [item.id for item in high_value_items if item.days_until_expiry is not None and 0 < item.days_until_expiry <= 30],
+                'item_ids': kernel.item_ids(kernel.high_value & kernel.days_between(1, 30)),
                 'priority_score': 90
             })
         
@@ -281,7 +198,7 @@ class ReportService:
                 'action': 'Analyze demand patterns and adjust reorder points for low-stock items',
                 'impact': 'Medium - Operational efficiency',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in low_stock_items],
+                'item_ids': kernel.item_ids(kernel.low_stock),
                 'priority_score': 80
             })
         
@@ -295,23 +212,23 @@ class ReportService:
                 'action': 'Analyze ordering patterns and negotiate better terms with suppliers',
                 'impact': 'Medium - Cost reduction',
                 'effort': 'High',
-                'item_ids': [item.id for item in items if item.days_until_expiry is not None and 0 < item.days_until_expiry <= 30],
+                'item_ids': kernel.item_ids(kernel.days_between(1, 30)),
                 'priority_score': 75
             })
         
         # 6. Inventory Aging Analysis
-        aging_items = [item for item in items if item.days_until_expiry is not None and 30 < item.days_until_expiry <= 90]
-        if aging_items:
-            aging_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in aging_items)
+        aging_mask = kernel.days_between(31, 90)
+        if aging_mask.any():
+            aging_value = kernel.total_value(aging_mask)
             recommendations.append({
                 'type': 'high_priority',
                 'category': 'inventory_optimization',
                 'title': 'Address Aging Inventory',
-                'message': f'{len(aging_items)} items (value: £{aging_value:.2f}) are aging (30-90 days). Consider promotional strategies.',
+                'message': f'{kernel.count(aging_mask)} items (value: £{aging_value:.2f}) are aging (30-90 days). Consider promotional strategies.',
                 'action': 'Implement promotional campaigns or bulk discounting for aging items',
                 'impact': 'Medium - Cash flow improvement',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in aging_items],
+                'item_ids': kernel.item_ids(aging_mask),
                 'priority_score': 70
             })
         
@@ -329,26 +246,26 @@ class ReportService:
                     'action': 'Implement ABC analysis and adjust inventory policies for high-value items',
                     'impact': 'Medium - Cost optimization',
                     'effort': 'Medium',
-                    'item_ids': [item.id for item in high_value_items],
+                    'item_ids': kernel.item_ids(kernel.high_value),
                     'priority_score': 60
                 })
         
         # 8. Safety Stock Review
-        if low_stock_items:
+        if low_stock_count:
             recommendations.append({
                 'type': 'medium_priority',
                 'category': 'risk_management',
                 'title': 'Review Safety Stock Levels',
-                'message': f'{len(low_stock_items)} items are below safety stock levels. Review and update safety stock calculations.',
+                'message': f'{low_stock_count} items are below safety stock levels. Review and update safety stock calculations.',
                 'action': 'Analyze demand variability and update safety stock levels',
                 'impact': 'Medium - Risk reduction',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in low_stock_items],
+                'item_ids': kernel.item_ids(kernel.low_stock),
                 'priority_score': 55
             })
         
         # 9. Supplier Performance Analysis
-        if expiring_items:
+        if expiring_count:
             recommendations.append({
                 'type': 'medium_priority',
                 'category': 'supplier_management',
@@ -357,7 +274,7 @@ class ReportService:
                 'action': 'Analyze supplier lead times and quality issues',
                 'impact': 'Medium - Quality improvement',
                 'effort': 'High',
-                'item_ids': [item.id for item in expiring_items],
+                'item_ids': kernel.item_ids(expiring_mask),
                 'priority_score': 50
             })
         
@@ -378,7 +295,7 @@ class ReportService:
             })
         
         # 11. Process Optimization
-        if expired_items or expiring_items:
+        if expired_count or expiring_count:
             recommendations.append({
                 'type': 'strategic',
                 'category': 'process_improvement',
@@ -387,7 +304,7 @@ class ReportService:
                 'action': 'Train staff on FIFO/FEFO procedures and update storage layout',
                 'impact': 'Medium - Waste reduction',
                 'effort': 'Medium',
-                'item_ids': [item.id for item in items if item.expiry_date],
+                'item_ids': kernel.item_ids(kernel.has_expiry),
                 'priority_score': 35
             })
         
@@ -409,49 +326,116 @@ class ReportService:
         
         return recommendations
     
-    def generate_daily_report(self, user_id: int) -> Optional[Report]:
-        """Generate a daily inventory report for a specific user."""
+    def get_inventory_versions(self, user_ids: List[int]) -> Dict[int, str]:
+        """Fingerprint each user's inventory with one grouped query.
+        
+        The version changes whenever an item is added, removed or updated
+        (including status changes), so an unchanged version means a new
+        report would be built from the same data.
+        
+        Args:
+            user_ids: Users to fingerprint
+            
+        Returns:
+            Mapping of user ID to inventory version
+        """
+        rows = db.session.query(
+            Item.user_id,
+            func.count(Item.id),
+            func.coalesce(func.sum(Item.id), 0),
+            func.max(Item.updated_at)
+        ).filter(Item.user_id.in_(user_ids)).group_by(Item.user_id).all()
+        
+        fingerprints = {user_id: '0:0:' for user_id in user_ids}
+        for user_id, count, id_sum, last_updated in rows:
+            fingerprints[user_id] = f"{count}:{id_sum}:{last_updated.isoformat() if last_updated else ''}"
+        return {
+            user_id: hashlib.sha1(fingerprint.encode()).hexdigest()
+            for user_id, fingerprint in fingerprints.items()
+        }
+    
+    def get_latest_report_versions(self, user_ids: List[int]) -> Dict[int, Optional[str]]:
+        """Get the inventory version of each user's most recent report."""
+        latest = db.session.query(
+            Report.user_id.label('user_id'),
+            func.max(Report.date).label('date')
+        ).filter(Report.user_id.in_(user_ids)).group_by(Report.user_id).subquery()
+        
+        rows = db.session.query(Report.user_id, Report.inventory_version).join(
+            latest,
+            and_(Report.user_id == latest.c.user_id, Report.date == latest.c.date)
+        ).all()
+        return {user_id: version for user_id, version in rows}
+    
+    def generate_daily_report(self, user_id: int, inventory_version: Optional[str] = None, log_activity: bool = True) -> Optional[Report]:
+        """Generate a daily inventory report for a specific user.
+        
+        Args:
+            user_id: The ID of the user to report on
+            inventory_version: Precomputed inventory version (computed if omitted)
+            log_activity: Whether to record the generation in the user's activity log
+        """
         try:
             current_date = datetime.now().date()
+            if inventory_version is None:
+                inventory_version = self.get_inventory_versions([user_id])[user_id]
             
             # Delete any existing report for today and user
             existing_report = Report.query.filter_by(date=current_date, user_id=user_id).first()
             if existing_report:
                 try:
                     current_app.logger.info(f"Deleting existing report for user {user_id} on {current_date}")
+                    existing_report_id = existing_report.id
                     db.session.delete(existing_report)
                     db.session.commit()
+                    public_report_cache.invalidate_report(existing_report_id)
                 except Exception as e:
                     current_app.logger.error(f"Failed to delete existing report: {str(e)}")
                     db.session.rollback()
                     raise Exception(f"Could not delete existing report: {str(e)}")
             
-            # Get all items for the user
-            items = Item.query.filter_by(user_id=user_id).all()
-            current_app.logger.info(f"Found {len(items)} items for user {user_id}")
+            # Every section below reads its numbers from one metrics kernel
+            aggregation_mode = current_app.config.get('REPORT_AGGREGATION_MODE', 'incremental')
+            if aggregation_mode == 'incremental':
+                # Apply logged item changes to the stored aggregates; committed with the report
+                items = []
+                kernel = IncrementalReportMetrics(
+                    user_id,
+                    self.aggregate_service.refresh(user_id),
+                    current_date,
+                    current_app.config.get('REPORT_DETAIL_LIMIT', 100)
+                )
+            elif aggregation_mode == 'sql':
+                # Aggregate in the database; only the capped detail lists are loaded as items
+                items = []
+                kernel = GroupedReportMetrics(user_id, current_date, current_app.config.get('REPORT_DETAIL_LIMIT', 100))
+            else:
+                items = Item.query.filter_by(user_id=user_id).all()
+                kernel = ReportMetrics(items, current_date)
+            current_app.logger.info(f"Found {len(kernel)} items for user {user_id}")
             
             # Calculate basic metrics using the actual Item model status constants
-            total_items = len(items)
-            expiring_items = len([item for item in items if item.status == STATUS_EXPIRING_SOON])
-            expired_items = len([item for item in items if item.status == STATUS_EXPIRED])
-            pending_items = len([item for item in items if item.status == STATUS_PENDING])
-            active_items = len([item for item in items if item.status == STATUS_ACTIVE])
-            low_stock_items = len([item for item in items if (item.quantity or 0) < 10])
+            total_items = len(kernel)
+            expiring_items = kernel.count(kernel.expiring_soon)
+            expired_items = kernel.count(kernel.expired)
+            pending_items = kernel.count(kernel.pending)
+            active_items = kernel.count(kernel.active)
+            low_stock_items = kernel.count(kernel.low_stock)
             
             # Calculate value metrics
-            total_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
-            expiring_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items if item.status == STATUS_EXPIRING_SOON)
-            expired_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items if item.status == STATUS_EXPIRED)
+            total_value = kernel.total_value()
+            expiring_value = kernel.total_value(kernel.expiring_soon)
+            expired_value = kernel.total_value(kernel.expired)
             
             # Calculate Value at Risk analysis
-            var_analysis = self._calculate_value_at_risk(items)
+            var_analysis = self._calculate_value_at_risk(items, kernel)
             
             # Calculate industry-standard metrics
             inventory_metrics = {
                 'stock_turnover': total_value / (total_items or 1),  # Average value per item
                 'expiry_risk_score': (expiring_value / total_value * 100) if total_value > 0 else 0,
                 'inventory_health': {
-                    'stock_coverage': sum(1 for item in items if (item.quantity or 0) >= 10) / total_items * 100 if total_items > 0 else 0,
+                    'stock_coverage': (total_items - low_stock_items) / total_items * 100 if total_items > 0 else 0,
                     'expiry_ratio': expiring_items / total_items * 100 if total_items > 0 else 0,
                     'value_at_risk': expiring_value / total_value * 100 if total_value > 0 else 0
                 },
@@ -484,75 +468,41 @@ class ReportService:
                 }
             }
             
-            # Calculate risk scores for all items
-            items_with_risk = []
-            for item in items:
-                risk_score = self._calculate_risk_score(item)
-                items_with_risk.append({
-                    'id': item.id,
-                    'name': item.name,
-                    'quantity': item.quantity,
-                    'unit': item.unit,
-                    'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                    'days_until_expiry': item.days_until_expiry,
-                    'location': item.location,
-                    'batch_number': item.batch_number,
-                    'value': (item.quantity or 0) * (item.cost_price or 0),
-                    'risk_score': risk_score,
-                    'status': item.status
-                })
-            
-            # Sort items by risk score
-            items_with_risk.sort(key=lambda x: x['risk_score'], reverse=True)
+            # Items sorted by risk score (scores are computed in the kernel)
+            items_with_risk = kernel.ranked_details()
             
             current_app.logger.info(f"Calculated metrics - Total: {total_items}, Expiring: {expiring_items}, Expired: {expired_items}, Pending: {pending_items}, Active: {active_items}, Low Stock: {low_stock_items}")
             current_app.logger.info(f"Value metrics - Total: £{total_value:.2f}, Expiring: £{expiring_value:.2f}, Expired: £{expired_value:.2f}")
             current_app.logger.info(f"Inventory health - Coverage: {inventory_metrics['inventory_health']['stock_coverage']:.1f}%, Expiry: {inventory_metrics['inventory_health']['expiry_ratio']:.1f}%, Risk: {inventory_metrics['inventory_health']['value_at_risk']:.1f}%")
             
             # Calculate expiry risk metrics using actual status
-            critical_items = [item for item in items if item.status == STATUS_EXPIRING_SOON and (item.quantity or 0) > 10]
-            high_value_expiring = [item for item in items if item.status == STATUS_EXPIRING_SOON and (item.quantity or 0) * (item.cost_price or 0) > 1000]
+            critical_mask = kernel.expiring_soon & (kernel.quantity > LOW_STOCK_QUANTITY)
+            high_value_expiring_mask = kernel.expiring_soon & kernel.high_value
             
             # Generate comprehensive expiry analysis
-            comprehensive_expiry_analysis = self._generate_comprehensive_expiry_analysis(items)
-            
-            # Calculate historical comparison (last 7 days)
-            last_week = datetime.now().date() - timedelta(days=7)
-            last_week_report = Report.query.filter_by(user_id=user_id, date=last_week).first()
-            
-            # Prepare metrics for comparison
-            def get_metrics(report_obj, items_list=None):
-                if report_obj:
-                    summary = report_obj.report_data.get('summary', {}) if hasattr(report_obj, 'report_data') and report_obj.report_data else {}
-                    return {
-                        'expiring_items': getattr(report_obj, 'expiring_items', summary.get('expiring_items', 0)),
-                        'expired_items': getattr(report_obj, 'expired_items', summary.get('expired_items', 0)),
-                        'low_stock_items': getattr(report_obj, 'low_stock_items', summary.get('low_stock_items', 0)),
-                        'total_items': getattr(report_obj, 'total_items', summary.get('total_items', 0)),
-                        'active_items': summary.get('active_items', 0),
-                        'critical_items': summary.get('critical_items', 0),
-                        'pending_items': summary.get('pending_items', 0),
-                        'total_value': getattr(report_obj, 'total_value', summary.get('total_value', 0)),
-                        'value_at_risk': summary.get('inventory_metrics', {}).get('value_at_risk', 0)
-                    }
-                elif items_list is not None:
-                    # fallback for legacy or baseline
-                    return {
-                        'expiring_items': len([item for item in items_list if item.status == STATUS_EXPIRING_SOON]),
-                        'expired_items': len([item for item in items_list if item.status == STATUS_EXPIRED]),
-                        'low_stock_items': len([item for item in items_list if (item.quantity or 0) < 10]),
-                        'total_items': len(items_list),
-                        'active_items': len([item for item in items_list if item.status == STATUS_ACTIVE]),
-                        'critical_items': len([item for item in items_list if item.status == STATUS_EXPIRING_SOON and (item.quantity or 0) > 10]),
-                        'pending_items': len([item for item in items_list if item.status == STATUS_PENDING]),
-                        'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in items_list),
-                        'value_at_risk': 0
-                    }
-                else:
-                    return {}
+            comprehensive_expiry_analysis = self._generate_comprehensive_expiry_analysis(items, kernel)
+            
+            # Metrics recorded in the daily time series alongside the report
+            metric_values = {
+                'total_items': total_items,
+                'active_items': active_items,
+                'expired_items': expired_items,
+                'expiring_items': expiring_items,
+                'pending_items': pending_items,
+                'low_stock_items': low_stock_items,
+                'critical_items': kernel.count(critical_mask),
+                'high_value_expiring': kernel.count(high_value_expiring_mask),
+                'total_value': total_value,
+                'expiring_value': expiring_value,
+                'expired_value': expired_value,
+                'value_at_risk': var_analysis['metrics']['total_risk_value'],
+                'risk_score': var_analysis['metrics']['risk_score']
+            }
             
-            current_metrics = get_metrics(None, items)
-            last_week_metrics = get_metrics(last_week_report)
+            # Calculate historical comparison (last 7 days) from the time series
+            last_week = current_date - timedelta(days=7)
+            current_metrics = {key: metric_values[key] for key in COMPARISON_FIELDS}
+            last_week_metrics = self.history_service.get_day(user_id, last_week) or {}
             
             # Calculate changes
             comparison = {}
@@ -575,12 +525,12 @@ class ReportService:
             # Prepare detailed report data
             low_stock_items_list = [
                 {
-                    'id': item.id,
-                    'name': item.name,
-                    'quantity': item.quantity,
-                    'unit': item.unit
+                    'id': detail['id'],
+                    'name': detail['name'],
+                    'quantity': detail['quantity'],
+                    'unit': detail['unit']
                 }
-                for item in items if (item.quantity or 0) < 10
+                for detail in kernel.details(kernel.low_stock)
             ]
             
             # Create items by status breakdown
@@ -600,8 +550,8 @@ class ReportService:
                     'pending_items': pending_items,
                     'low_stock_items': low_stock_items,
                     'low_stock_items_list': low_stock_items_list,
-                    'critical_items': len(critical_items),
-                    'high_value_expiring': len(high_value_expiring),
+                    'critical_items': kernel.count(critical_mask),
+                    'high_value_expiring': kernel.count(high_value_expiring_mask),
                     'total_value': total_value,
                     'expiring_value': expiring_value,
                     'expired_value': expired_value,
@@ -610,42 +560,12 @@ class ReportService:
                     'items_by_status': items_by_status
                 },
                 'risk_analysis': {
-                    'critical_items': [
-                        {
-                            'id': item.id,
-                            'name': item.name,
-                            'quantity': item.quantity,
-                            'unit': item.unit,
-                            'expiry_date': item.expiry_date.strftime('%Y-%m-%d'),
-                            'days_until_expiry': item.days_until_expiry,
-                            'location': item.location,
-                            'batch_number': item.batch_number,
-                            'value': (item.quantity or 0) * (item.cost_price or 0),
-                            'risk_score': self._calculate_risk_score(item),
-                            'status': item.status
-                        }
-                        for item in critical_items
-                    ],
-                    'high_value_expiring': [
-                        {
-                            'id': item.id,
-                            'name': item.name,
-                            'quantity': item.quantity,
-                            'unit': item.unit,
-                            'expiry_date': item.expiry_date.strftime('%Y-%m-%d'),
-                            'days_until_expiry': item.days_until_expiry,
-                            'location': item.location,
-                            'batch_number': item.batch_number,
-                            'value': (item.quantity or 0) * (item.cost_price or 0),
-                            'risk_score': self._calculate_risk_score(item),
-                            'status': item.status
-                        }
-                        for item in high_value_expiring
-                    ],
-                    'all_items': items_with_risk  # Include all items, not just high-risk ones
+                    'critical_items': kernel.details(critical_mask),
+                    'high_value_expiring': kernel.details(high_value_expiring_mask),
+                    'all_items': items_with_risk  # All items, or the top REPORT_DETAIL_LIMIT in SQL mode
                 },
                 'comprehensive_expiry_analysis': comprehensive_expiry_analysis,
-                'action_recommendations': self._generate_action_recommendations(items, inventory_metrics, var_analysis),
+                'action_recommendations': self._generate_action_recommendations(items, inventory_metrics, var_analysis, kernel),
                 'historical_comparison': historical_comparison
             }
             
@@ -660,14 +580,18 @@ class ReportService:
                 expired_items=expired_items,
                 low_stock_items=low_stock_items,
                 is_public=False,
-                public_token=secrets.token_urlsafe(32)
+                public_token=secrets.token_urlsafe(32),
+                inventory_version=inventory_version,
+                schema_version=REPORT_SCHEMA_VERSION
             )
             
             db.session.add(report)
+            self.history_service.record(user_id, current_date, metric_values)
             db.session.commit()
             
             # Log activity for report generation
-            self.activity_service.log_report_generated(user_id, "Daily inventory")
+            if log_activity:
+                self.activity_service.log_report_generated(user_id, "Daily inventory")
             
             current_app.logger.info(f"Successfully generated daily report for user {user_id} with {total_items} items")
             return report
@@ -678,94 +602,38 @@ class ReportService:
             return None
     
     def get_report(self, report_id: int) -> Optional[Report]:
-        """Get report by ID."""
-        report = Report.query.get(report_id)
-        if report:
-            if report.report_data is None:
-                current_app.logger.warning(f"Report {report_id} has no report_data, attempting to regenerate")
-                # Try to regenerate the report data
-                try:
-                    # Get all items for the user to regenerate report data
-                    items = Item.query.filter_by(user_id=report.user_id).all()
-                    
-                    # Calculate basic metrics
-                    total_items = len(items)
-                    expiring_items = len([item for item in items if item.status == STATUS_EXPIRING_SOON])
-                    expired_items = len([item for item in items if item.status == STATUS_EXPIRED])
-                    pending_items = len([item for item in items if item.status == STATUS_PENDING])
-                    active_items = len([item for item in items if item.status == STATUS_ACTIVE])
-                    low_stock_items = len([item for item in items if (item.quantity or 0) < 10])
-                    total_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
-                    
-                    # Calculate historical comparison (last 7 days)
-                    last_week = datetime.now().date() - timedelta(days=7)
-                    last_week_report = Report.query.filter_by(user_id=report.user_id, date=last_week).first()
-                    
-                    historical_comparison = {}
-                    if last_week_report:
-                        historical_comparison = {
-                            'last_week': {
-                                'expiring_items': last_week_report.expiring_items,
-                                'expired_items': last_week_report.expired_items,
-                                'low_stock_items': last_week_report.low_stock_items,
-                                'total_items': last_week_report.total_items,
-                                'total_value': last_week_report.total_value
-                            }
-                        }
-                    else:
-                        # If no last week report, use current values as baseline
-                        historical_comparison = {
-                            'last_week': {
-                                'expiring_items': expiring_items,
-                                'expired_items': expired_items,
-                                'low_stock_items': low_stock_items,
-                                'total_items': total_items,
-                                'total_value': total_value
-                            }
-                        }
-                    
-                    # Create a basic report_data structure
-                    report.report_data = {
-                        'summary': {
-                            'total_items': total_items,
-                            'active_items': active_items,
-                            'expired_items': expired_items,
-                            'expiring_items': expiring_items,
-                            'pending_items': pending_items,
-                            'low_stock_items': low_stock_items,
-                            'total_value': total_value,
-                            'items_by_status': {
-                                'active': active_items,
-                                'expired': expired_items,
-                                'expiring_soon': expiring_items,
-                                'pending_expiry_date': pending_items
-                            }
-                        },
-                        'risk_analysis': {
-                            'critical_items': [],
-                            'high_value_expiring': [],
-                            'all_items': []
-                        },
-                        'comprehensive_expiry_analysis': {},
-                        'action_recommendations': [],
-                        'historical_comparison': historical_comparison
-                    }
-                    
-                    # Save the updated report
-                    db.session.commit()
-                    current_app.logger.info(f"Successfully regenerated report_data for report {report_id}")
-                    
-                except Exception as e:
-                    current_app.logger.error(f"Failed to regenerate report_data for report {report_id}: {str(e)}")
-                    # Fallback to empty dict if regeneration fails
-                    report.report_data = {}
-                    db.session.commit()
-            else:
-                current_app.logger.info(f"Retrieved report {report_id} with data: {list(report.report_data.keys()) if report.report_data else 'None'}")
-        else:
+        """Get report by ID.
+        
+        Reports are returned exactly as generated. A report without detail
+        data is left as is here; ``app/tasks/report_backfill.py`` repairs
+        such rows offline.
+        """
+        report = db.session.get(Report, report_id)
+        if report is None:
             current_app.logger.warning(f"Report {report_id} not found")
+        elif report.payload is None:
+            current_app.logger.warning(f"Report {report_id} has no report_data; run the report backfill to repair it")
         return report
     
+    def delete_report(self, report_id: int, user_id: int) -> bool:
+        """Delete one of a user's reports.
+        
+        Returns:
+            bool: True if the report existed and was deleted
+        """
+        try:
+            report = Report.query.filter_by(id=report_id, user_id=user_id).first()
+            if report is None:
+                return False
+            db.session.delete(report)
+            db.session.commit()
+            public_report_cache.invalidate_report(report_id)
+            return True
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error deleting report {report_id}: {str(e)}")
+            raise
+    
     def get_latest_report(self, user_id: int) -> Optional[Report]:
         """Get the most recent report for a user."""
         return Report.query.filter_by(user_id=user_id).order_by(Report.date.desc()).first()
@@ -834,23 +702,61 @@ class ReportService:
             current_app.logger.error(f"Error getting all paginated reports: {str(e)}")
             return [], 0
     
-    def make_report_public(self, report_id: int) -> bool:
-        """Make a report publicly accessible."""
+    def make_report_public(self, report_id: int, user_id: Optional[int] = None) -> Optional[Report]:
+        """Make a report publicly accessible through its public token.
+        
+        Args:
+            report_id: The ID of the report
+            user_id: Only share the report if it belongs to this user
+            
+        Returns:
+            Report: The shared report, or None if it wasn't found
+        """
         try:
-            report = Report.query.get_or_404(report_id)
+            query = Report.query.filter_by(id=report_id)
+            if user_id is not None:
+                query = query.filter_by(user_id=user_id)
+            report = query.first()
+            if report is None:
+                return None
             report.is_public = True
             db.session.commit()
-            return True
+            return report
         except Exception as e:
             current_app.logger.error(f"Error making report public: {str(e)}")
             db.session.rollback()
+            return None
+    
+    def make_report_private(self, report_id: int, user_id: int) -> bool:
+        """Revoke public access to a report and drop its cached page."""
+        try:
+            updated = Report.query.filter_by(id=report_id, user_id=user_id).update(
+                {'is_public': False}, synchronize_session=False
+            )
+            db.session.commit()
+            public_report_cache.invalidate_report(report_id)
+            return bool(updated)
+        except Exception as e:
+            current_app.logger.error(f"Error making report private: {str(e)}")
+            db.session.rollback()
             return False
     
     def get_public_report(self, token: str) -> Optional[Report]:
         """Get a report by its public token."""
         return Report.query.filter_by(public_token=token, is_public=True).first() 
     
-    def _generate_comprehensive_expiry_analysis(self, items: List[Item]) -> Dict[str, Any]:
+    def get_public_report_version(self, token: str) -> Optional[Tuple[int, Optional[datetime]]]:
+        """Get the ID and ``updated_at`` of a shared report without loading it.
+        
+        Returns:
+            Tuple of report ID and last change, or None if the token is not shared
+        """
+        row = db.session.query(Report.id, Report.updated_at).filter_by(
+            public_token=token, is_public=True
+        ).first()
+        return (row.id, row.updated_at) if row is not None else None
+    
+    def _generate_comprehensive_expiry_analysis(self, items: List[Item], kernel: Optional[ReportMetrics] = None) -> Dict[str, Any]:
         """Generate comprehensive expiry analysis covering all items with proper categorization.
         
         Categories:
@@ -862,150 +768,33 @@ class ReportService:
         - Beyond Year: Items with days_until_expiry > 365
         - No Expiry Date: Items without expiry_date
         """
-        today = datetime.now().date()
+        kernel = kernel or ReportMetrics(items)
         
         # Categorize items using actual Item model logic
-        expired_items = [item for item in items if item.status == STATUS_EXPIRED]
-        critical_items = [item for item in items if item.status == STATUS_EXPIRING_SOON]
-        short_term_items = [item for item in items if item.days_until_expiry is not None and 8 <= item.days_until_expiry <= 30]
-        medium_term_items = [item for item in items if item.days_until_expiry is not None and 31 <= item.days_until_expiry <= 90]
-        long_term_items = [item for item in items if item.days_until_expiry is not None and 91 <= item.days_until_expiry <= 365]
-        beyond_year_items = [item for item in items if item.days_until_expiry is not None and item.days_until_expiry > 365]
-        no_expiry_items = [item for item in items if item.status == STATUS_PENDING]
+        category_masks = {
+            'expired': kernel.expired,
+            'critical': kernel.expiring_soon,
+            'short_term': kernel.days_between(8, 30),
+            'medium_term': kernel.days_between(31, 90),
+            'long_term': kernel.days_between(91, 365),
+            'beyond_year': kernel.days_between(low=366),
+            'no_expiry_date': kernel.pending
+        }
         
         # Calculate metrics for each category
         categories = {
-            'expired': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in expired_items
-                ],
-                'count': len(expired_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in expired_items),
-                'total_quantity': sum(item.quantity or 0 for item in expired_items)
-            },
-            'critical': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in critical_items
-                ],
-                'count': len(critical_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in critical_items),
-                'total_quantity': sum(item.quantity or 0 for item in critical_items)
-            },
-            'short_term': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in short_term_items
-                ],
-                'count': len(short_term_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in short_term_items),
-                'total_quantity': sum(item.quantity or 0 for item in short_term_items)
-            },
-            'medium_term': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in medium_term_items
-                ],
-                'count': len(medium_term_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in medium_term_items),
-                'total_quantity': sum(item.quantity or 0 for item in medium_term_items)
-            },
-            'long_term': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in long_term_items
-                ],
-                'count': len(long_term_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in long_term_items),
-                'total_quantity': sum(item.quantity or 0 for item in long_term_items)
-            },
-            'beyond_year': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': item.expiry_date.strftime('%Y-%m-%d') if item.expiry_date else None,
-                        'days_until_expiry': item.days_until_expiry,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in beyond_year_items
-                ],
-                'count': len(beyond_year_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in beyond_year_items),
-                'total_quantity': sum(item.quantity or 0 for item in beyond_year_items)
-            },
-            'no_expiry_date': {
-                'items': [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'quantity': item.quantity,
-                        'unit': item.unit,
-                        'expiry_date': None,
-                        'days_until_expiry': None,
-                        'value': (item.quantity or 0) * (item.cost_price or 0),
-                        'status': item.status
-                    }
-                    for item in no_expiry_items
-                ],
-                'count': len(no_expiry_items),
-                'total_value': sum((item.quantity or 0) * (item.cost_price or 0) for item in no_expiry_items),
-                'total_quantity': sum(item.quantity or 0 for item in no_expiry_items)
+            name: {
+                'items': kernel.summary_details(mask),
+                'count': kernel.count(mask),
+                'total_value': kernel.total_value(mask),
+                'total_quantity': kernel.total_quantity(mask)
             }
+            for name, mask in category_masks.items()
         }
         
         # Calculate overall metrics
-        total_items = len(items)
-        total_value = sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
+        total_items = len(kernel)
+        total_value = kernel.total_value()
         
         # Calculate percentages
         overall_metrics = {
@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 from app.core.extensions import db
 from app.models.item import Item
+from app.models.inventory_aggregate import InventoryAggregateState
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
 from app.models.user import User
 from app.services.zoho_service import ZohoService
 from app.services.notification_service import NotificationService
@@ -19,6 +21,11 @@ def cleanup_expired_items():
             item.update_status(force_update=True)
         db.session.commit()
         
+        # Scores of items crossing an expiry threshold overnight change without a write
+        rescored = Item.refresh_risk_scores(current_date)
+        db.session.commit()
+        current_app.logger.info(f"Refreshed risk scores of {rescored} item(s)")
+        
         # Find items with 0 days left
         items_zero_days = Item.query.filter(
             Item.expiry_date == current_date,
@@ -94,9 +101,11 @@ def cleanup_unverified_accounts():
             try:
                 # Delete all items associated with the user
                 Item.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+                InventoryAggregateState.invalidate(user.id)
                 
                 # Delete all notifications associated with the user
                 Notification.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+                NotificationCounter.invalidate(user.id)
                 
                 # Delete the user
                 db.session.delete(user)
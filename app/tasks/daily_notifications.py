@@ -0,0 +1,76 @@
+from datetime import datetime
+from flask import current_app
+from app.core.extensions import db
+from app.models.job_checkpoint import JobCheckpoint
+from app.models.user import User
+from app.services.notification_service import NotificationService
+from app.services.email_templates import email_templates
+from app.tasks.sharding import plan_shards, run_shards, has_incomplete_run
+
+JOB_NAME = 'send_daily_notifications'
+
+def _eligible_users():
+    """Query for users who receive the daily notification."""
+    return User.query.filter(User.email_notifications.is_(True))
+
+def _process_shard(checkpoint: JobCheckpoint, advance) -> None:
+    """Send notifications for one id-range shard, committing progress after each batch of users."""
+    notification_service = NotificationService()
+    batch_size = current_app.config.get('NOTIFICATION_JOB_BATCH_SIZE', 100)
+    after_id = checkpoint.resume_after
+
+    while True:
+        users = _eligible_users().filter(
+            User.id > after_id,
+            User.id <= checkpoint.end_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not users:
+            break
+
+        # One item query for the whole batch instead of one per user
+        results = notification_service.check_expiry_dates_for_users(users)
+        current_app.logger.info(f"Shard {checkpoint.shard}: processed {len(users)} users, {sum(results.values())} notified")
+
+        after_id = users[-1].id
+        advance(after_id, len(users))
+
+def send_daily_notifications(resume_only: bool = False) -> dict:
+    """Send daily notifications to all users, partitioned into concurrent shards.
+
+    Users are split into id-range shards that run on a thread pool sized to the
+    database connection budget. Each shard checkpoints the last processed user
+    so that re-running the job on the same day resumes instead of restarting.
+
+    Args:
+        resume_only: Only continue an interrupted run for today; don't start a new one
+
+    Returns:
+        dict: Summary of the run
+    """
+    run_date = datetime.now().date()
+
+    if resume_only and not has_incomplete_run(JOB_NAME, run_date):
+        current_app.logger.info(f"No interrupted {JOB_NAME} run to resume for {run_date}")
+        return {'shards': 0, 'done': 0, 'failed': 0}
+
+    user_ids = [row.id for row in db.session.query(User.id).filter(User.email_notifications.is_(True)).order_by(User.id)]
+    checkpoints = plan_shards(
+        JOB_NAME,
+        run_date,
+        user_ids,
+        current_app.config.get('NOTIFICATION_JOB_SHARDS', 8)
+    )
+
+    # Header, footer and links are the same for every recipient; render them once
+    with email_templates.render_scope():
+        summary = run_shards(
+            current_app._get_current_object(),
+            checkpoints,
+            _process_shard,
+            current_app.config.get('NOTIFICATION_JOB_WORKERS', 4)
+        )
+    current_app.logger.info(
+        f"{JOB_NAME} for {run_date}: {summary['done']}/{summary['shards']} shard(s) done, "
+        f"{summary['failed']} failed, {summary['workers']} worker(s)"
+    )
+    return summary
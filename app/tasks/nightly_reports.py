@@ -0,0 +1,171 @@
+import os
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, current_app
+from app.core.extensions import db
+from app.core.metrics import metrics
+from app.core.processes import worker_context
+from app.models.user import User
+from app.services.report_service import ReportService
+
+JOB_NAME = 'generate_nightly_reports'
+
+# App used by _generate_batch: the caller's app inline, one built by _init_worker in worker processes
+_worker_app: Optional[Flask] = None
+
+_generate_seconds = metrics.histogram(
+    'reports.generate_seconds',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+_generated = metrics.counter('reports.nightly.generated')
+_skipped = metrics.counter('reports.nightly.skipped')
+_failed = metrics.counter('reports.nightly.failed')
+
+def _init_worker() -> None:
+    """Build the app for a worker process, without the background work of a server process.
+
+    Workers come from the fork server, so they hold none of the parent's
+    locks or connections. They inherit its environment, which selects the
+    same configuration.
+    """
+    global _worker_app
+    from app import create_app
+
+    os.environ.pop('WERKZEUG_RUN_MAIN', None)  # Not the reloader's server process; never schedule jobs
+    _worker_app = create_app(SCHEDULER_RUN=False, EMAIL_QUEUE_ENABLED=False, OCR_JOBS_ENABLED=False)
+
+def _generate_batch(batch: List[Tuple[int, str]]) -> List[Dict]:
+    """Generate reports for one batch of users in a fresh app context and session.
+
+    Args:
+        batch: (user_id, inventory_version) pairs
+
+    Returns:
+        list: Per-user result with status and generation time
+    """
+    results = []
+    with _worker_app.app_context():
+        report_service = ReportService()
+        for user_id, inventory_version in batch:
+            started = time.perf_counter()
+            try:
+                report = report_service.generate_daily_report(
+                    user_id,
+                    inventory_version=inventory_version,
+                    log_activity=False
+                )
+                status = 'generated' if report else 'failed'
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Nightly report failed for user {user_id}: {str(e)}")
+                status = 'failed'
+            results.append({
+                'user_id': user_id,
+                'status': status,
+                'seconds': time.perf_counter() - started
+            })
+            # Keep the session from accumulating every user's items
+            db.session.expunge_all()
+    return results
+
+def _due_batches(user_ids: List[int], batch_size: int, report_service: ReportService):
+    """Yield batches of users whose inventory changed since their last report.
+
+    Returns:
+        generator: (due batch, number of users skipped in that batch)
+    """
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        versions = report_service.get_inventory_versions(chunk)
+        reported = report_service.get_latest_report_versions(chunk)
+        due = [(user_id, versions[user_id]) for user_id in chunk if reported.get(user_id) != versions[user_id]]
+        yield due, len(chunk) - len(due)
+
+def generate_nightly_reports() -> dict:
+    """Build the daily report for every active user in worker processes.
+
+    Users are fingerprinted in batches (item count, id sum and last update)
+    and skipped when the fingerprint matches the one stored on their latest
+    report, so re-running the job only picks up users it hasn't finished.
+    Due batches are handed to a process pool with a bounded number in
+    flight; each worker builds its own app, engine and session.
+
+    Returns:
+        dict: Summary of the run
+    """
+    global _worker_app
+    run_started = time.perf_counter()
+    run_date = datetime.now().date()
+    processes = max(1, current_app.config.get('REPORT_JOB_PROCESSES', 2))
+    batch_size = max(1, current_app.config.get('REPORT_JOB_BATCH_SIZE', 25))
+
+    user_ids = [row.id for row in db.session.query(User.id).filter(
+        User.is_active.is_(True),
+        User.is_verified.is_(True)
+    ).order_by(User.id)]
+
+    report_service = ReportService()
+    results: List[Dict] = []
+    skipped = 0
+
+    context = worker_context() if processes > 1 else None
+    if context is not None:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_init_worker
+        ) as executor:
+            in_flight = set()
+            for due, batch_skipped in _due_batches(user_ids, batch_size, report_service):
+                skipped += batch_skipped
+                if not due:
+                    continue
+                if len(in_flight) >= processes * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results.extend(future.result())
+                in_flight.add(executor.submit(_generate_batch, due))
+            for future in wait(in_flight).done:
+                results.extend(future.result())
+    else:
+        processes = 1
+        _worker_app = current_app._get_current_object()
+        for due, batch_skipped in _due_batches(user_ids, batch_size, report_service):
+            skipped += batch_skipped
+            if due:
+                results.extend(_generate_batch(due))
+
+    timings = sorted(result['seconds'] for result in results)
+    for seconds in timings:
+        _generate_seconds.observe(seconds)
+    generated = sum(1 for result in results if result['status'] == 'generated')
+    failed = len(results) - generated
+    _generated.inc(generated)
+    _skipped.inc(skipped)
+    _failed.inc(failed)
+
+    summary = {
+        'users': len(user_ids),
+        'generated': generated,
+        'skipped': skipped,
+        'failed': failed,
+        'processes': processes,
+        'seconds': round(time.perf_counter() - run_started, 3)
+    }
+    if timings:
+        summary['p50_seconds'] = round(statistics.median(timings), 3)
+        summary['p95_seconds'] = round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3)
+
+    slowest = sorted(results, key=lambda result: result['seconds'], reverse=True)[:5]
+    current_app.logger.info(
+        f"{JOB_NAME} for {run_date}: {generated} generated, {skipped} unchanged, {failed} failed "
+        f"across {processes} process(es) in {summary['seconds']}s"
+    )
+    if slowest:
+        current_app.logger.info(
+            "Slowest reports: " + ', '.join(f"user {result['user_id']} {result['seconds']:.3f}s" for result in slowest)
+        )
+    return summary
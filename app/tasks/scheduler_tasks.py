@@ -1,9 +1,10 @@
 from datetime import datetime
 from flask import current_app
 from app.tasks.cleanup import cleanup_expired_items, cleanup_unverified_accounts
-from app.services.notification_service import NotificationService
+from app.tasks.daily_notifications import send_daily_notifications
+from app.tasks.nightly_reports import generate_nightly_reports
 from app import create_app
-from app.models.user import User
+from app.core.extensions import scheduler
 
 def cleanup_expired_task():
     """Task for cleaning up expired items."""
@@ -26,12 +27,19 @@ def send_daily_notifications_task():
     app = create_app()
     with app.app_context():
         current_app.logger.info("Starting send_daily_notifications job at %s", datetime.now())
-        notification_service = NotificationService()
-        
-        # Get all users with email notifications enabled
-        users = User.query.filter_by(email_notifications=True).all()
-        for user in users:
-            current_app.logger.info(f"Processing notifications for user {user.id} ({user.email})")
-            notification_service.check_expiry_dates(user.id)
-            
-        current_app.logger.info("Completed send_daily_notifications job at %s", datetime.now()) 
\ No newline at end of file
+        send_daily_notifications()
+        current_app.logger.info("Completed send_daily_notifications job at %s", datetime.now())
+
+def generate_nightly_reports_task():
+    """Task for generating every active user's daily report."""
+    app = create_app()
+    with app.app_context():
+        current_app.logger.info("Starting generate_nightly_reports job at %s", datetime.now())
+        generate_nightly_reports()
+        current_app.logger.info("Completed generate_nightly_reports job at %s", datetime.now())
+
+def resume_daily_notifications_task():
+    """Task for resuming an interrupted daily notifications run after a restart."""
+    # Reuse the scheduler's app; create_app() here would re-register this startup job
+    with scheduler.app.app_context():
+        send_daily_notifications(resume_only=True)
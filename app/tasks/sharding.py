@@ -0,0 +1,143 @@
+"""Helpers for running id-range partitioned jobs with resumable checkpoints."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Callable, List, Sequence
+from flask import Flask, current_app
+from app.core.extensions import db
+from app.models.job_checkpoint import (
+    JobCheckpoint, SHARD_PENDING, SHARD_RUNNING, SHARD_DONE, SHARD_FAILED
+)
+
+# Called with (last_id, processed_increment) after each unit of work
+ProgressCallback = Callable[[int, int], None]
+ShardHandler = Callable[[JobCheckpoint, ProgressCallback], None]
+
+
+def db_worker_budget(app: Flask, requested: int, reserve: int = 1) -> int:
+    """Bound worker count by the database connection pool.
+
+    Each worker thread holds one connection while it runs, so the pool
+    (``pool_size`` + ``max_overflow``) minus a reserve for other work in the
+    process is the upper limit.
+    """
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}) or {}
+    pool_limit = engine_options.get('pool_size', 5) + engine_options.get('max_overflow', 10)
+    return max(1, min(requested, pool_limit - reserve))
+
+
+def partition_ids(ids: Sequence[int], shard_count: int) -> List[tuple]:
+    """Split sorted ids into at most shard_count contiguous, balanced id ranges."""
+    if not ids:
+        return []
+    shard_count = max(1, min(shard_count, len(ids)))
+    size, remainder = divmod(len(ids), shard_count)
+    ranges = []
+    start = 0
+    for shard in range(shard_count):
+        end = start + size + (1 if shard < remainder else 0)
+        ranges.append((ids[start], ids[end - 1]))
+        start = end
+    return ranges
+
+
+def plan_shards(job_name: str, run_date: date, ids: Sequence[int], shard_count: int) -> List[JobCheckpoint]:
+    """Load the checkpoints for a run, creating them on the first attempt.
+
+    Returns:
+        List of checkpoints that still need work (pending, running or failed)
+    """
+    checkpoints = JobCheckpoint.query.filter_by(job_name=job_name, run_date=run_date).order_by(JobCheckpoint.shard).all()
+
+    if checkpoints:
+        current_app.logger.info(f"Resuming {job_name} for {run_date} from existing checkpoints")
+    else:
+        for shard, (start_id, end_id) in enumerate(partition_ids(ids, shard_count)):
+            checkpoint = JobCheckpoint()
+            checkpoint.job_name = job_name
+            checkpoint.run_date = run_date
+            checkpoint.shard = shard
+            checkpoint.start_id = start_id
+            checkpoint.end_id = end_id
+            checkpoint.processed = 0
+            checkpoint.status = SHARD_PENDING
+            db.session.add(checkpoint)
+            checkpoints.append(checkpoint)
+        db.session.commit()
+        current_app.logger.info(f"Planned {len(checkpoints)} shard(s) for {job_name} on {run_date}")
+
+    return [checkpoint for checkpoint in checkpoints if checkpoint.status != SHARD_DONE]
+
+
+def has_incomplete_run(job_name: str, run_date: date) -> bool:
+    """Check whether a run was started but not finished."""
+    return db.session.query(JobCheckpoint.id).filter(
+        JobCheckpoint.job_name == job_name,
+        JobCheckpoint.run_date == run_date,
+        JobCheckpoint.status != SHARD_DONE
+    ).first() is not None
+
+
+def run_shards(app: Flask, checkpoints: List[JobCheckpoint], handler: ShardHandler, max_workers: int) -> dict:
+    """Process shards concurrently, each worker in its own app context and DB session.
+
+    Returns:
+        dict: Summary with counts of completed and failed shards
+    """
+    checkpoint_ids = [checkpoint.id for checkpoint in checkpoints]
+    workers = db_worker_budget(app, max_workers)
+    summary = {'shards': len(checkpoint_ids), 'done': 0, 'failed': 0, 'workers': workers}
+    if not checkpoint_ids:
+        return summary
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shard') as executor:
+        futures = [executor.submit(_run_shard, app, checkpoint_id, handler) for checkpoint_id in checkpoint_ids]
+        for future in as_completed(futures):
+            if future.result():
+                summary['done'] += 1
+            else:
+                summary['failed'] += 1
+
+    return summary
+
+
+def _run_shard(app: Flask, checkpoint_id: int, handler: ShardHandler) -> bool:
+    with app.app_context():
+        checkpoint = db.session.get(JobCheckpoint, checkpoint_id)
+        if checkpoint is None or checkpoint.status == SHARD_DONE:
+            return True
+
+        checkpoint.status = SHARD_RUNNING
+        checkpoint.started_at = checkpoint.started_at or datetime.utcnow()
+        checkpoint.error = None
+        db.session.commit()
+
+        def advance(last_id: int, processed: int = 1) -> None:
+            JobCheckpoint.query.filter_by(id=checkpoint_id).update({
+                'last_id': last_id,
+                'processed': JobCheckpoint.processed + processed
+            }, synchronize_session=False)
+            db.session.commit()
+
+        try:
+            handler(checkpoint, advance)
+            checkpoint = db.session.get(JobCheckpoint, checkpoint_id)
+            checkpoint.status = SHARD_DONE
+            checkpoint.finished_at = datetime.utcnow()
+            db.session.commit()
+            current_app.logger.info(
+                f"Shard {checkpoint.shard} of {checkpoint.job_name} done "
+                f"({checkpoint.processed} processed, ids {checkpoint.start_id}-{checkpoint.end_id})"
+            )
+            return True
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Shard {checkpoint_id} failed: {str(e)}", exc_info=True)
+            try:
+                JobCheckpoint.query.filter_by(id=checkpoint_id).update({
+                    'status': SHARD_FAILED,
+                    'error': str(e)[:500]
+                }, synchronize_session=False)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            return False
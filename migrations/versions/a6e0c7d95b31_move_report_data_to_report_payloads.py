@@ -0,0 +1,88 @@
+"""Move report_data into compressed report_payloads
+
+Revision ID: a6e0c7d95b31
+Revises: f3b9d2c64a18
+Create Date: 2026-10-19 15:48:06.972114
+
+"""
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e0c7d95b31'
+down_revision = 'f3b9d2c64a18'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+reports = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('report_data', sa.JSON)
+)
+
+report_payloads = sa.table(
+    'report_payloads',
+    sa.column('report_id', sa.Integer),
+    sa.column('encoding', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('raw_size', sa.Integer)
+)
+
+
+def upgrade():
+    op.create_table('report_payloads',
+    sa.Column('report_id', sa.Integer(), nullable=False),
+    sa.Column('encoding', sa.String(length=20), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('raw_size', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('report_id')
+    )
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(reports.c.id, reports.c.report_data)
+            .where(reports.c.id > last_id, reports.c.report_data.isnot(None))
+            .order_by(reports.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        payloads = []
+        for report_id, report_data in rows:
+            raw = json.dumps(report_data, separators=(',', ':')).encode('utf-8')
+            payloads.append({
+                'report_id': report_id,
+                'encoding': 'zlib+json',
+                'data': zlib.compress(raw, 6),
+                'raw_size': len(raw)
+            })
+        connection.execute(report_payloads.insert(), payloads)
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_column('report_data')
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('report_data', sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(report_payloads.c.report_id, report_payloads.c.data)).fetchall()
+    for report_id, data in rows:
+        connection.execute(
+            reports.update().where(reports.c.id == report_id).values(
+                report_data=json.loads(zlib.decompress(data).decode('utf-8'))
+            )
+        )
+
+    op.drop_table('report_payloads')
@@ -0,0 +1,27 @@
+"""Add schema_version to reports
+
+Revision ID: b1d4e8f27c60
+Revises: a6e0c7d95b31
+Create Date: 2026-10-19 17:10:33.552840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1d4e8f27c60'
+down_revision = 'a6e0c7d95b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are stamped by scripts/utils/backfill_reports.py
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schema_version', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_column('schema_version')
@@ -0,0 +1,49 @@
+"""Add outbound_emails queue table
+
+Revision ID: b7c41e2a9d10
+Revises: e553fff80800
+Create Date: 2026-10-19 09:12:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c41e2a9d10'
+down_revision = 'e553fff80800'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbound_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('sender', sa.String(length=255), nullable=False),
+    sa.Column('recipients', sa.JSON(), nullable=False),
+    sa.Column('html', sa.Text(), nullable=False),
+    sa.Column('template', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('claim_token', sa.String(length=32), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.String(length=500), nullable=True),
+    sa.CheckConstraint("status IN ('queued', 'sending', 'sent', 'failed')", name='check_outbound_email_status'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('outbound_emails', schema=None) as batch_op:
+        batch_op.create_index('ix_outbound_emails_status_next_attempt', ['status', 'next_attempt_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_outbound_emails_claim_token'), ['claim_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('outbound_emails', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_outbound_emails_claim_token'))
+        batch_op.drop_index('ix_outbound_emails_status_next_attempt')
+
+    op.drop_table('outbound_emails')
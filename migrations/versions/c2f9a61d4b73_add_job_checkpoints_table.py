@@ -0,0 +1,42 @@
+"""Add job_checkpoints table
+
+Revision ID: c2f9a61d4b73
+Revises: b7c41e2a9d10
+Create Date: 2026-10-19 11:04:18.552907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f9a61d4b73'
+down_revision = 'b7c41e2a9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('job_name', sa.String(length=100), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('start_id', sa.Integer(), nullable=False),
+    sa.Column('end_id', sa.Integer(), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.String(length=500), nullable=True),
+    sa.CheckConstraint("status IN ('pending', 'running', 'done', 'failed')", name='check_job_checkpoint_status'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_name', 'run_date', 'shard', name='unique_job_run_shard')
+    )
+
+
+def downgrade():
+    op.drop_table('job_checkpoints')
@@ -0,0 +1,50 @@
+"""Add ocr_jobs table for asynchronous date OCR
+
+Revision ID: c3f9d2a7e514
+Revises: e4c8a1f9b267
+Create Date: 2026-10-19 23:41:08.305174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9d2a7e514'
+down_revision = 'e4c8a1f9b267'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ocr_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('token', sa.String(length=32), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('image', sa.LargeBinary(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('date', sa.String(length=10), nullable=True),
+    sa.Column('cached', sa.Boolean(), nullable=False),
+    sa.Column('error', sa.String(length=500), nullable=True),
+    sa.Column('claim_token', sa.String(length=32), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("status IN ('queued', 'processing', 'done', 'failed')", name='check_ocr_job_status'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_ocr_jobs_status_created', ['status', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_token'), ['token'], unique=True)
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_claim_token'), ['claim_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_claim_token'))
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_token'))
+        batch_op.drop_index('ix_ocr_jobs_status_created')
+
+    op.drop_table('ocr_jobs')
@@ -0,0 +1,183 @@
+"""Add daily_metrics time series and metric_rollups
+
+Revision ID: c9f2a4e61d85
+Revises: b1d4e8f27c60
+Create Date: 2026-10-19 18:34:57.210463
+
+"""
+import json
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f2a4e61d85'
+down_revision = 'b1d4e8f27c60'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+METRIC_FIELDS = (
+    'total_items', 'active_items', 'expired_items', 'expiring_items', 'pending_items',
+    'low_stock_items', 'critical_items', 'high_value_expiring',
+    'total_value', 'expiring_value', 'expired_value', 'value_at_risk', 'risk_score'
+)
+
+FLOAT_FIELDS = ('total_value', 'expiring_value', 'expired_value', 'value_at_risk', 'risk_score')
+
+reports = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('date', sa.Date),
+    sa.column('total_items', sa.Integer),
+    sa.column('expiring_items', sa.Integer),
+    sa.column('expired_items', sa.Integer),
+    sa.column('low_stock_items', sa.Integer),
+    sa.column('total_value', sa.Float)
+)
+
+report_payloads = sa.table(
+    'report_payloads',
+    sa.column('report_id', sa.Integer),
+    sa.column('data', sa.LargeBinary)
+)
+
+daily_metrics = sa.table(
+    'daily_metrics',
+    sa.column('user_id', sa.Integer),
+    sa.column('date', sa.Date),
+    *[sa.column(field, sa.Float if field in FLOAT_FIELDS else sa.Integer) for field in METRIC_FIELDS]
+)
+
+metric_rollups = sa.table(
+    'metric_rollups',
+    sa.column('user_id', sa.Integer),
+    sa.column('period', sa.String),
+    sa.column('period_start', sa.Date),
+    sa.column('days', sa.Integer),
+    *[sa.column(field, sa.Float) for field in METRIC_FIELDS]
+)
+
+
+def _metrics_from_report(row, summary):
+    """Daily metrics for an existing report, from its columns and stored summary."""
+    var_metrics = summary.get('inventory_metrics', {}).get('value_at_risk_analysis', {}).get('total_metrics', {})
+    values = {
+        'total_items': row.total_items or 0,
+        'active_items': summary.get('active_items', 0),
+        'expired_items': row.expired_items or 0,
+        'expiring_items': row.expiring_items or 0,
+        'pending_items': summary.get('pending_items', 0),
+        'low_stock_items': row.low_stock_items or 0,
+        'critical_items': summary.get('critical_items', 0),
+        'high_value_expiring': summary.get('high_value_expiring', 0),
+        'total_value': row.total_value or 0,
+        'expiring_value': summary.get('expiring_value', 0),
+        'expired_value': summary.get('expired_value', 0),
+        'value_at_risk': var_metrics.get('total_risk_value', 0),
+        'risk_score': var_metrics.get('risk_score', 0)
+    }
+    return {field: values[field] or 0 for field in METRIC_FIELDS}
+
+
+def _period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def upgrade():
+    op.create_table('daily_metrics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('total_items', sa.Integer(), nullable=False),
+    sa.Column('active_items', sa.Integer(), nullable=False),
+    sa.Column('expired_items', sa.Integer(), nullable=False),
+    sa.Column('expiring_items', sa.Integer(), nullable=False),
+    sa.Column('pending_items', sa.Integer(), nullable=False),
+    sa.Column('low_stock_items', sa.Integer(), nullable=False),
+    sa.Column('critical_items', sa.Integer(), nullable=False),
+    sa.Column('high_value_expiring', sa.Integer(), nullable=False),
+    sa.Column('total_value', sa.Float(), nullable=False),
+    sa.Column('expiring_value', sa.Float(), nullable=False),
+    sa.Column('expired_value', sa.Float(), nullable=False),
+    sa.Column('value_at_risk', sa.Float(), nullable=False),
+    sa.Column('risk_score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('daily_metrics', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_metrics_user_date', ['user_id', 'date'], unique=True)
+
+    op.create_table('metric_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    *[sa.Column(field, sa.Float(), nullable=False) for field in METRIC_FIELDS],
+    sa.CheckConstraint("period IN ('week', 'month')", name='check_metric_rollup_period'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('metric_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_metric_rollups_user_period_start', ['user_id', 'period', 'period_start'], unique=True)
+
+    # Seed the time series from existing reports, then average it into rollups
+    connection = op.get_bind()
+    sums = defaultdict(lambda: defaultdict(float))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(reports, report_payloads.c.data)
+            .select_from(reports.outerjoin(report_payloads, report_payloads.c.report_id == reports.c.id))
+            .where(reports.c.id > last_id)
+            .order_by(reports.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        metrics = []
+        for row in rows:
+            summary = json.loads(zlib.decompress(row.data).decode('utf-8')).get('summary', {}) if row.data else {}
+            values = _metrics_from_report(row, summary)
+            metrics.append({'user_id': row.user_id, 'date': row.date, **values})
+            for period in ('week', 'month'):
+                totals = sums[(row.user_id, period, _period_start(period, row.date))]
+                totals['days'] += 1
+                for field in METRIC_FIELDS:
+                    totals[field] += values[field]
+        connection.execute(daily_metrics.insert(), metrics)
+        last_id = rows[-1].id
+
+    rollups = [
+        {
+            'user_id': user_id,
+            'period': period,
+            'period_start': period_start,
+            'days': int(totals['days']),
+            **{field: totals[field] / totals['days'] for field in METRIC_FIELDS}
+        }
+        for (user_id, period, period_start), totals in sums.items()
+    ]
+    for start in range(0, len(rollups), BATCH_SIZE):
+        connection.execute(metric_rollups.insert(), rollups[start:start + BATCH_SIZE])
+
+
+def downgrade():
+    with op.batch_alter_table('metric_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_metric_rollups_user_period_start')
+
+    op.drop_table('metric_rollups')
+    with op.batch_alter_table('daily_metrics', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_metrics_user_date')
+
+    op.drop_table('daily_metrics')
@@ -0,0 +1,25 @@
+"""Add an items index on (user_id, status, expiry_date) for report detail lists
+
+Revision ID: d2b6e4f8a913
+Revises: c3f9d2a7e514
+Create Date: 2026-10-20 09:12:47.518204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b6e4f8a913'
+down_revision = 'c3f9d2a7e514'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_user_status_expiry', ['user_id', 'status', 'expiry_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('ix_items_user_status_expiry')
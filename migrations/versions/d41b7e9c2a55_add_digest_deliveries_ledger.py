@@ -0,0 +1,41 @@
+"""Add digest_deliveries ledger
+
+Revision ID: d41b7e9c2a55
+Revises: c2f9a61d4b73
+Create Date: 2026-10-19 12:47:02.390114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b7e9c2a55'
+down_revision = 'c2f9a61d4b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('digest_deliveries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('digest_date', sa.Date(), nullable=False),
+    sa.Column('channel', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("status IN ('claimed', 'sent')", name='check_digest_delivery_status'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('digest_deliveries', schema=None) as batch_op:
+        batch_op.create_index('ix_digest_deliveries_user_date_channel', ['user_id', 'digest_date', 'channel'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('digest_deliveries', schema=None) as batch_op:
+        batch_op.drop_index('ix_digest_deliveries_user_date_channel')
+
+    op.drop_table('digest_deliveries')
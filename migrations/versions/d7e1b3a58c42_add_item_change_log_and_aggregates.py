@@ -0,0 +1,81 @@
+"""Add item_changes log and inventory aggregates
+
+Revision ID: d7e1b3a58c42
+Revises: c9f2a4e61d85
+Create Date: 2026-10-19 20:12:43.518027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e1b3a58c42'
+down_revision = 'c9f2a4e61d85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Aggregates are built on first use, so no data is copied here
+    op.create_table('item_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('operation', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.Column('old_status', sa.String(length=20), nullable=True),
+    sa.Column('old_expiry_ordinal', sa.Integer(), nullable=True),
+    sa.Column('old_quantity', sa.Float(), nullable=True),
+    sa.Column('old_value', sa.Float(), nullable=True),
+    sa.Column('new_status', sa.String(length=20), nullable=True),
+    sa.Column('new_expiry_ordinal', sa.Integer(), nullable=True),
+    sa.Column('new_quantity', sa.Float(), nullable=True),
+    sa.Column('new_value', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('item_changes', schema=None) as batch_op:
+        batch_op.create_index('ix_item_changes_user_id_id', ['user_id', 'id'], unique=False)
+
+    op.create_table('inventory_aggregates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('expiry_ordinal', sa.Integer(), nullable=False),
+    sa.Column('quantity_band', sa.Integer(), nullable=False),
+    sa.Column('value_band', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('quantity_sum', sa.Float(), nullable=False),
+    sa.Column('value_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('inventory_aggregates', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_inventory_aggregates_group',
+            ['user_id', 'status', 'expiry_ordinal', 'quantity_band', 'value_band'],
+            unique=True
+        )
+
+    op.create_table('inventory_aggregate_states',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_change_id', sa.Integer(), nullable=False),
+    sa.Column('changes_applied', sa.Integer(), nullable=False),
+    sa.Column('rebuilt_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('inventory_aggregate_states')
+
+    with op.batch_alter_table('inventory_aggregates', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_aggregates_group')
+    op.drop_table('inventory_aggregates')
+
+    with op.batch_alter_table('item_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_changes_user_id_id')
+    op.drop_table('item_changes')
@@ -0,0 +1,61 @@
+"""Add persisted items.risk_score with a per-user index
+
+Revision ID: e4c8a1f9b267
+Revises: d7e1b3a58c42
+Create Date: 2026-10-19 21:03:27.640915
+
+"""
+from datetime import date, datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c8a1f9b267'
+down_revision = 'd7e1b3a58c42'
+branch_labels = None
+depends_on = None
+
+items = sa.table(
+    'items',
+    sa.column('quantity', sa.Float),
+    sa.column('cost_price', sa.Float),
+    sa.column('expiry_date', sa.DateTime),
+    sa.column('risk_score', sa.Integer)
+)
+
+
+def _risk_score(today):
+    """Same thresholds as app.models.item.calculate_risk_score."""
+    def day_start(offset):
+        return datetime.combine(today + timedelta(days=offset), time.min)
+
+    quantity = sa.func.coalesce(items.c.quantity, 0)
+    value = quantity * sa.func.coalesce(items.c.cost_price, 0)
+    expiry_score = sa.case(
+        (items.c.expiry_date < day_start(8), 40),
+        (items.c.expiry_date < day_start(31), 25),
+        (items.c.expiry_date < day_start(91), 15),
+        (items.c.expiry_date < day_start(366), 5),
+        else_=0
+    )
+    quantity_score = sa.case((quantity <= 5, 30), (quantity <= 10, 20), (quantity <= 20, 10), else_=0)
+    value_score = sa.case((value > 1000, 30), (value > 500, 20), (value > 100, 10), else_=0)
+    return sa.case((items.c.expiry_date.is_(None), 50), else_=expiry_score + quantity_score + value_score)
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('risk_score', sa.Integer(), nullable=True))
+
+    op.execute(items.update().values(risk_score=_risk_score(date.today())))
+
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_user_risk_score', ['user_id', 'risk_score'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('ix_items_user_risk_score')
+        batch_op.drop_column('risk_score')
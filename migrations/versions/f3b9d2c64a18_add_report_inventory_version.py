@@ -0,0 +1,26 @@
+"""Add inventory_version to reports
+
+Revision ID: f3b9d2c64a18
+Revises: e8a3c5f1b027
+Create Date: 2026-10-19 14:22:41.318907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2c64a18'
+down_revision = 'e8a3c5f1b027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('inventory_version', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_column('inventory_version')
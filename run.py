@@ -9,7 +9,11 @@ from sqlalchemy import inspect
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = create_app()
+if __name__ == '__mp_main__':
+    # Imported by a worker process (app/core/processes.py), which builds its own app
+    app = None
+else:
+    app = create_app()
 
 def init_db():
     """Initialize the database."""
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+OCR Corpus Builder for Expiry Tracker
+
+Renders the synthetic label photos in scripts/benchmarks/ocr_corpus/ and
+writes their manifest. Each case lists the lines printed on the label, the
+transcript an OCR engine returns for it (misreads included) and the expiry
+date a person reads off the label. Images get a seeded mix of rotation,
+blur, uneven lighting and sensor noise, so rebuilding produces the same
+files.
+
+The corpus is checked in; rebuild it only when adding or changing cases,
+and commit the images and manifest together.
+
+Usage:
+    python scripts/benchmarks/build_ocr_corpus.py
+"""
+
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'ocr_corpus'
+SEED = 2024
+
+# (name, printed lines, OCR transcript, expected date or None, tags, photo size)
+CASES = [
+    ('milk-exp-slash', ['WHOLE MILK 2L', 'EXP 31/12/2025'],
+     'WHOLE MILK 2L\nEXP 31/12/2025', '2025-12-31', ['keyword', 'dd/mm/yyyy'], (1600, 1200)),
+    ('yoghurt-best-before', ['GREEK YOGHURT', 'BEST BEFORE: 04.01.2026'],
+     'GREEK YOGHURT\nBEST BEFORE: 04.01.2026', '2026-01-04', ['keyword', 'dd.mm.yyyy'], (1600, 1200)),
+    ('bread-use-by-short-year', ['SLICED WHITE', 'USE BY 17-03-26'],
+     'SLICED WHITE\nUSE BY 17-03-26', '2026-03-17', ['keyword', 'dd-mm-yy'], (1200, 1600)),
+    ('chicken-packed-and-exp', ['CHICKEN FILLETS', 'PACKED 02/05/2025', 'EXP 09/05/2025'],
+     'CHICKEN FILLETS\nPACKED 02/05/2025\nEXP 09/05/2025', '2025-05-09', ['keyword', 'two-dates'], (2400, 1800)),
+    ('cheese-iso-date', ['MATURE CHEDDAR', 'EXPIRY 2026-02-14'],
+     'MATURE CHEDDAR\nEXPIRY 2026-02-14', '2026-02-14', ['keyword', 'yyyy-mm-dd'], (1600, 1200)),
+    ('juice-month-name', ['ORANGE JUICE', 'BEST BEFORE JUNE 12, 2025'],
+     'ORANGE JUICE\nBEST BEFORE JUNE 12, 2025', '2025-06-12', ['keyword', 'month-name'], (1600, 1200)),
+    ('rice-month-year', ['BASMATI RICE 1KG', 'BB 11/2027'],
+     'BASMATI RICE 1KG\nBB 11/2027', '2027-11-30', ['keyword', 'mm/yyyy'], (1600, 1200)),
+    ('pasta-month-abbrev', ['FUSILLI 500G', 'EXP:OCT 2026'],
+     'FUSILLI 500G\nEXP:OCT 2026', '2026-10-31', ['keyword', 'month-name', 'no-space'], (1600, 1200)),
+    ('beans-concatenated', ['BAKED BEANS', 'EXP 31122026'],
+     'BAKED BEANS\nEXP 31122026', '2026-12-31', ['keyword', 'concatenated'], (1600, 1200)),
+    ('soup-misread-see', ['TOMATO SOUP', 'EXP 15/09/2025'],
+     'TOMATO SOUP\nSEE 15/09/2025', '2025-09-15', ['misread', 'dd/mm/yyyy'], (1600, 1200)),
+    ('ham-misread-katakana', ['COOKED HAM', 'EXP 21/04/2025'],
+     'COOKED HAM\nマEXP 21/04/2025', '2025-04-21', ['misread', 'dd/mm/yyyy'], (1600, 1200)),
+    ('butter-spaced-separators', ['SALTED BUTTER', 'USE BY 08 / 08 / 2025'],
+     'SALTED BUTTER\nUSE BY 08 / 08 / 2025', '2025-08-08', ['keyword', 'spaced'], (1600, 1200)),
+    ('crisps-no-keyword', ['SEA SALT CRISPS', '30.11.2025', 'L4821'],
+     'SEA SALT CRISPS\n30.11.2025\nL4821', '2025-11-30', ['no-keyword', 'dd.mm.yyyy'], (1600, 1200)),
+    ('water-year-only', ['SPRING WATER', 'BEST BEFORE 2027'],
+     'SPRING WATER\nBEST BEFORE 2027', '2027-12-31', ['keyword', 'year-only'], (1600, 1200)),
+    ('pate-french', ['PATE DE CAMPAGNE', "DATE D'EXP: 19/06/2025"],
+     "PATE DE CAMPAGNE\nDATE D'EXP: 19/06/2025", '2025-06-19', ['keyword', 'french'], (1600, 1200)),
+    ('chorizo-spanish', ['CHORIZO EXTRA', 'FECHA DE CADUCIDAD 03/03/2026'],
+     'CHORIZO EXTRA\nFECHA DE CADUCIDAD 03/03/2026', '2026-03-03', ['keyword', 'spanish'], (1600, 1200)),
+    ('salad-keyword-split', ['MIXED LEAVES', 'USE', 'BY 27/05/2025'],
+     'MIXED LEAVES USE\nBY 27/05/2025', '2025-05-27', ['keyword', 'split-line'], (1600, 1200)),
+    ('eggs-lot-first', ['FREE RANGE EGGS', 'LOT 20250412', 'BB 02/05/2025'],
+     'FREE RANGE EGGS\nLOT 20250412\nBB 02/05/2025', '2025-05-02', ['keyword', 'two-dates'], (1600, 1200)),
+    ('cream-large-photo', ['DOUBLE CREAM', 'USE BY 14/07/2025'],
+     'DOUBLE CREAM\nUSE BY 14/07/2025', '2025-07-14', ['keyword', 'large-photo'], (4000, 3000)),
+    ('fish-large-rotated', ['SMOKED SALMON', 'EXP 06/02/2026'],
+     'SMOKED SALMON\nEXP 06/02/2026', '2026-02-06', ['keyword', 'large-photo'], (4032, 3024)),
+    ('coffee-no-date', ['GROUND COFFEE', 'MEDIUM ROAST 227G'],
+     'GROUND COFFEE\nMEDIUM ROAST 227G', None, ['no-date'], (1600, 1200)),
+    ('sauce-blank-read', ['HOT SAUCE', 'EXP 01/01/2026'],
+     '', None, ['unreadable'], (1600, 1200)),
+    ('jam-expiry-date-colon', ['STRAWBERRY JAM', 'EXPIRY DATE:2026/09/30'],
+     'STRAWBERRY JAM\nEXPIRY DATE:2026/09/30', '2026-09-30', ['keyword', 'yyyy/mm/dd'], (1600, 1200)),
+    ('tofu-misread-bb', ['FIRM TOFU', 'BB. 12.12.25'],
+     'FIRM TOFU\nBB. 12.12.25', '2025-12-12', ['keyword', 'dd.mm.yy'], (1600, 1200)),
+]
+
+
+def render(lines: List[str], size: tuple, rng: random.Random) -> bytes:
+    """Render label lines onto a phone-sized photo with realistic degradation."""
+    width, height = size
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    image = np.full((height, width), 235, np.uint8)
+
+    scale = width / 500
+    thickness = max(2, int(scale * 1.6))
+    y = int(height * 0.3)
+    for line in lines:
+        font = rng.choice([cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_PLAIN])
+        font_scale = scale * (1.8 if font == cv2.FONT_HERSHEY_PLAIN else 0.9)
+        (text_width, text_height), _ = cv2.getTextSize(line, font, font_scale, thickness)
+        x = max(10, (width - text_width) // 2 + rng.randint(-width // 20, width // 20))
+        cv2.putText(image, line, (x, y), font, font_scale, rng.randint(10, 60), thickness, cv2.LINE_AA)
+        y += int(text_height * 2.2)
+
+    # Uneven lighting, slight rotation, focus blur and sensor noise
+    gradient = np.linspace(rng.uniform(-40, 0), rng.uniform(0, 25), width, dtype=np.float32)
+    image = np.clip(image.astype(np.float32) + gradient[None, :], 0, 255).astype(np.uint8)
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), rng.uniform(-6, 6), 1.0)
+    image = cv2.warpAffine(image, rotation, (width, height), borderValue=235)
+    blur = rng.choice([1, 3, 5])
+    image = cv2.GaussianBlur(image, (blur, blur), 0)
+    noise = np_rng.normal(0, rng.uniform(1, 3), image.shape).astype(np.float32)
+    image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+    colour = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    ok, encoded = cv2.imencode('.jpg', colour, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    if not ok:
+        raise RuntimeError('JPEG encoding failed')
+    return encoded.tobytes()
+
+
+def build() -> Dict:
+    rng = random.Random(SEED)
+    CORPUS_DIR.mkdir(exist_ok=True)
+    cases = []
+    for name, lines, transcript, expected, tags, size in CASES:
+        data = render(lines, size, rng)
+        filename = f'{name}.jpg'
+        (CORPUS_DIR / filename).write_bytes(data)
+        cases.append({
+            'file': filename,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'expected_date': expected,
+            'transcript': transcript,
+            'tags': tags,
+        })
+    manifest = {'version': 1, 'seed': SEED, 'cases': cases}
+    with open(CORPUS_DIR / 'manifest.json', 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2, ensure_ascii=False)
+        handle.write('\n')
+    return manifest
+
+
+def main() -> None:
+    manifest = build()
+    total = sum((CORPUS_DIR / case['file']).stat().st_size for case in manifest['cases'])
+    print(f"Wrote {len(manifest['cases'])} images ({total / 1024:.0f} KB) and manifest.json to {CORPUS_DIR}")
+
+
+if __name__ == '__main__':
+    main()
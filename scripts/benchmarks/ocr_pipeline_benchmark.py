@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+OCR Pipeline Benchmark for Expiry Tracker
+
+Runs the date OCR pipeline over the checked-in label corpus
+(scripts/benchmarks/ocr_corpus/) and reports date accuracy, p50/p95 time of
+every stage and peak memory as JSON. The stages are the preprocessing stages
+of app/services/ocr_preprocessing.py, the backend call ('recognize') and
+date matching ('match'); the OCR result cache is bypassed.
+
+The report also gives the size of the image sent to the backend and, with
+the 'roi' stage, the share of each photo kept, so that
+'--stages roi clahe denoise threshold --compare' shows what region cropping
+saves.
+
+The default backend is the offline fake one, answering each image with the
+transcript in the corpus manifest. Accuracy then measures correction and
+date matching, and the timings cover everything but the OCR engine.
+'--backend tesseract' reads the images for real, if pytesseract is installed.
+
+The report has sorted keys and rounded figures so that runs on different
+commits can be diffed, or compared directly with --compare.
+
+Usage:
+    python scripts/benchmarks/ocr_pipeline_benchmark.py --output before.json
+    python scripts/benchmarks/ocr_pipeline_benchmark.py --compare before.json
+    python scripts/benchmarks/ocr_pipeline_benchmark.py --stages clahe threshold --repeat 10
+    python scripts/benchmarks/ocr_pipeline_benchmark.py --stages roi clahe denoise threshold --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import cv2
+from app.config import Config
+from app.services.ocr_backends import FakeOCRBackend, OCRBackend, create_backend
+from app.services.ocr_preprocessing import PreprocessingPipeline
+from app.services.ocr_text import DateTextMatcher
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'ocr_corpus'
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def load_corpus() -> List[Dict[str, Any]]:
+    with open(CORPUS_DIR / 'manifest.json', encoding='utf-8') as handle:
+        cases = json.load(handle)['cases']
+    for case in cases:
+        case['data'] = (CORPUS_DIR / case['file']).read_bytes()
+    return cases
+
+
+def build_backend(name: str, settings: Dict[str, Any], cases: List[Dict[str, Any]]) -> OCRBackend:
+    if name == 'fake':
+        return FakeOCRBackend({case['sha256']: case['transcript'] for case in cases})
+    backend = create_backend(dict(settings, OCR_BACKEND=name))
+    if not backend.available:
+        raise SystemExit(f"OCR backend '{name}' is not available; check its configuration")
+    return backend
+
+
+def process(case: Dict[str, Any], pipeline: PreprocessingPipeline, backend: OCRBackend,
+            matcher: DateTextMatcher) -> Dict[str, Any]:
+    """Run one image through the pipeline, returning the date found and seconds per stage."""
+    started = time.perf_counter()
+    result = pipeline.run(case['data'], record=False)
+    timings = dict(result.timings)
+
+    stage_started = time.perf_counter()
+    text = ' '.join(backend.recognize(result.data, case['sha256']))
+    timings['recognize'] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    found = matcher.find_date(text) if text else None
+    timings['match'] = time.perf_counter() - stage_started
+
+    timings['total'] = time.perf_counter() - started
+    return {'date': found, 'timings': timings, 'payload': len(result.data), 'region_fraction': result.region_fraction}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    settings = {name: getattr(Config, name) for name in dir(Config) if name.startswith('OCR_')}
+    settings['OCR_DEBUG_IMAGES'] = False
+    if args.stages is not None:
+        settings['OCR_PREPROCESS_STAGES'] = tuple(args.stages)
+    cases = load_corpus()
+    pipeline = PreprocessingPipeline.from_config(settings)
+    backend = build_backend(args.backend, settings, cases)
+    matcher = DateTextMatcher()
+
+    # Warm-up pass: first-call costs (codec setup, CLAHE allocation) are not what is being measured
+    for case in cases:
+        process(case, pipeline, backend, matcher)
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    results = {}
+    payloads = {}
+    fractions = {}
+    for _ in range(args.repeat):
+        for case in cases:
+            outcome = process(case, pipeline, backend, matcher)
+            results[case['file']] = outcome['date']
+            payloads[case['file']] = outcome['payload']
+            fractions[case['file']] = outcome['region_fraction']
+            for stage, seconds in outcome['timings'].items():
+                samples[stage].append(seconds * 1000)
+
+    # Memory is traced in its own pass, as tracing slows allocation-heavy stages down
+    tracemalloc.start()
+    image_peaks = []
+    for case in cases:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        process(case, pipeline, backend, matcher)
+        image_peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    by_tag: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    failures = []
+    for case in cases:
+        correct = results[case['file']] == case['expected_date']
+        for tag in case['tags']:
+            by_tag[tag][0] += correct
+            by_tag[tag][1] += 1
+        if not correct:
+            failures.append({'file': case['file'], 'expected': case['expected_date'], 'got': results[case['file']]})
+    correct_total = len(cases) - len(failures)
+
+    return {
+        'corpus': {'images': len(cases), 'bytes': sum(len(case['data']) for case in cases)},
+        'settings': {
+            'backend': args.backend,
+            'repeat': args.repeat,
+            'stages': list(pipeline.stages),
+            'max_side': pipeline.max_side,
+            'encode_format': pipeline.encode_format,
+        },
+        'accuracy': {
+            'correct': correct_total,
+            'total': len(cases),
+            'rate': round(correct_total / len(cases), 4),
+            'by_tag': {tag: f'{counts[0]}/{counts[1]}' for tag, counts in sorted(by_tag.items())},
+            'failures': failures,
+        },
+        'stages_ms': {
+            stage: {'p50': round(percentile(values, 50), 2), 'p95': round(percentile(values, 95), 2)}
+            for stage, values in samples.items()
+        },
+        'payload_kb': {
+            'p50': round(percentile(list(payloads.values()), 50) / 1024, 1),
+            'total': round(sum(payloads.values()) / 1024, 1),
+            'region_fraction_p50': round(percentile(list(fractions.values()), 50), 3),
+        },
+        'memory_kb': {
+            'image_peak_p50': round(percentile(image_peaks, 50) / 1024),
+            'image_peak_max': round(max(image_peaks) / 1024),
+            # ru_maxrss is in KB on Linux and bytes on macOS
+            'process_max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1),
+        },
+        'environment': {'python': platform.python_version(), 'opencv': cv2.__version__},
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print accuracy and stage timing changes against an earlier report."""
+    old, new = baseline['accuracy'], report['accuracy']
+    print(f"accuracy: {old['correct']}/{old['total']} -> {new['correct']}/{new['total']}")
+    old_failures = {failure['file'] for failure in old['failures']}
+    new_failures = {failure['file'] for failure in new['failures']}
+    for name in sorted(new_failures - old_failures):
+        print(f"  now failing: {name}")
+    for name in sorted(old_failures - new_failures):
+        print(f"  now passing: {name}")
+
+    print(f"\n{'stage':<12} {'p50 ms':>18} {'p95 ms':>18}")
+    for stage, figures in report['stages_ms'].items():
+        before = baseline['stages_ms'].get(stage, {})
+        cells = []
+        for key in ('p50', 'p95'):
+            if key in before:
+                cells.append(f"{before[key]:.2f} -> {figures[key]:.2f}")
+            else:
+                cells.append(f"new {figures[key]:.2f}")
+        print(f"{stage:<12} {cells[0]:>18} {cells[1]:>18}")
+    for stage in baseline['stages_ms']:
+        if stage not in report['stages_ms']:
+            print(f"{stage:<12} {'removed':>18} {'removed':>18}")
+
+    if 'payload_kb' in baseline:
+        old_payload, new_payload = baseline['payload_kb'], report['payload_kb']
+        print(f"\nimage sent to the backend, p50: {old_payload['p50']} KB -> {new_payload['p50']} KB, "
+              f"total: {old_payload['total']} KB -> {new_payload['total']} KB "
+              f"({new_payload['total'] / old_payload['total'] - 1:+.0%})")
+
+    old_memory, new_memory = baseline['memory_kb'], report['memory_kb']
+    print(f"\npeak traced memory per image: {old_memory['image_peak_max']} KB -> {new_memory['image_peak_max']} KB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark OCR accuracy and stage latency on the label corpus')
+    parser.add_argument('--backend', default='fake', help="OCR backend: 'fake' (default), 'tesseract' or 'azure'")
+    parser.add_argument('--stages', nargs='*', help='Preprocessing stages to run instead of OCR_PREPROCESS_STAGES')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the corpus')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--compare', help='Earlier JSON report to compare this run against')
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args.output:
+        Path(args.output).write_text(text, encoding='utf-8')
+    elif not args.compare:
+        sys.stdout.write(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            compare(report, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+OCR Text Matching Benchmark for Expiry Tracker
+
+Times date extraction from OCR transcripts with the compiled matcher
+(app/services/ocr_text.py) against the previous implementation, which is
+embedded below: one re.sub per correction entry, one find per keyword and
+date regexes looked up inside the loops. Both run on the same transcripts
+and the script reports how often their corrected text and dates agree.
+The compiled matcher corrects in a single pass, so a replacement no longer
+changes which neighbouring words count as whole words: "exp:oct 2026" now
+reads as October rather than "expiryoct 2026". Disagreements are listed.
+
+Transcripts are generated from a fixed seed: product text, expiry keywords
+with common OCR misreads and dates in every supported format. A JSON list
+of real transcripts, or the {sha256: text} file used by the fake OCR
+backend, can be benchmarked instead.
+
+Usage:
+    python scripts/benchmarks/ocr_text_benchmark.py
+    python scripts/benchmarks/ocr_text_benchmark.py --count 5000 --repeat 5
+    python scripts/benchmarks/ocr_text_benchmark.py --transcripts transcripts.json
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.ocr_text import (
+    DATE_FORMATS, DATE_PATTERNS, EXPIRY_KEYWORDS, OCR_CORRECTIONS, DateTextMatcher, parse_concatenated_date
+)
+
+PRODUCT_WORDS = [
+    'organic', 'whole', 'milk', 'greek', 'yoghurt', 'sliced', 'bread', 'chicken', 'breast', 'fillets',
+    'net', 'wt', 'keep', 'refrigerated', 'below', '5°c', 'ingredients', 'lot', 'batch', 'packed', 'on',
+    'produce', 'of', 'france', 'store', 'in', 'a', 'cool', 'dry', 'place', 'once', 'opened', 'consume',
+    'within', '3', 'days', 'nutrition', 'per', '100g', 'energy', 'kj', 'www.example.com', 'mar', 'see',
+]
+KEYWORD_VARIANTS = [
+    'EXP', 'Exp.', 'EXP:', 'exp', 'Expiry', 'EXPIRY DATE', 'Expiry-Date', 'expirydate', 'SEE', 'Best Before',
+    'BEST BEFORE:', 'best-before', 'BB', 'bb.', 'B.B.', 'Use By', 'USE BY:', 'use-by', 'UB', 'useby',
+    "Date d'expiration", "DATE D'EXP", "date d'exp.", 'Fecha de caducidad', 'FECHA DE CADUCIDAD:',
+    'fecha de exp', 'EXP DATE', 'マEXP', 'Exp「',
+]
+MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+               'september', 'october', 'november', 'december']
+
+
+def legacy_correct(text: str) -> str:
+    """Previous correct_ocr_errors: one word-bounded re.sub per entry, longest first."""
+    corrected = text.lower()
+    for wrong, right in sorted(OCR_CORRECTIONS.items(), key=lambda x: len(x[0]), reverse=True):
+        corrected = re.sub(r'\b' + re.escape(wrong) + r'\b', right, corrected)
+    return corrected
+
+
+def _legacy_parse(date_str: str) -> Optional[str]:
+    for fmt in DATE_FORMATS:
+        try:
+            date_obj = datetime.strptime(date_str, fmt)
+            if 2000 <= date_obj.year <= 2100:
+                if fmt in ['%m/%Y', '%Y/%m', '%B %Y']:
+                    if date_obj.month == 12:
+                        next_month = date_obj.replace(year=date_obj.year + 1, month=1)
+                    else:
+                        next_month = date_obj.replace(month=date_obj.month + 1)
+                    date_obj = date_obj.replace(day=(next_month - timedelta(days=1)).day)
+                if fmt == '%Y':
+                    date_obj = date_obj.replace(month=12, day=31)
+                return date_obj.strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def _legacy_find_in(text: str) -> Optional[str]:
+    for match in re.findall(r'\d{8,10}', text):
+        date_obj = parse_concatenated_date(match)
+        if date_obj:
+            return date_obj.strftime('%Y-%m-%d')
+    for pattern in DATE_PATTERNS:
+        matches = re.findall(pattern, text)
+        if matches:
+            found = _legacy_parse(matches[0])
+            if found:
+                return found
+    return None
+
+
+def legacy_find_date(text: str) -> Optional[str]:
+    """Previous extract_date_from_text, without its debug prints."""
+    full_text = legacy_correct(text)
+    for keyword in sorted(EXPIRY_KEYWORDS, key=len, reverse=True):
+        keyword_pos = full_text.lower().find(keyword.lower())
+        if keyword_pos != -1:
+            found = _legacy_find_in(full_text[keyword_pos + len(keyword):].lstrip(' :.,;'))
+            if found:
+                return found
+    return _legacy_find_in(full_text)
+
+
+def random_date(rng: random.Random) -> str:
+    """A date in one of the printed formats labels use."""
+    day = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 1500))
+    formats = [
+        lambda: day.strftime('%d/%m/%Y'), lambda: day.strftime('%d.%m.%Y'), lambda: day.strftime('%d-%m-%y'),
+        lambda: day.strftime('%Y-%m-%d'), lambda: day.strftime('%Y/%m/%d'), lambda: day.strftime('%d%m%Y'),
+        lambda: day.strftime('%m/%Y'), lambda: day.strftime('%Y'), lambda: day.strftime('%d %b %Y').upper(),
+        lambda: f'{MONTH_NAMES[day.month - 1].title()} {day.day}, {day.year}',
+        lambda: f'{MONTH_NAMES[day.month - 1][:3].upper()} {day.year}',
+        lambda: day.strftime('%d/%m/%Y').replace('/', ' / '),
+    ]
+    return rng.choice(formats)()
+
+
+def build_transcripts(count: int, seed: int = 42) -> List[str]:
+    """Synthetic label transcripts: product text around zero to two dates."""
+    rng = random.Random(seed)
+    transcripts = []
+    for _ in range(count):
+        parts = [' '.join(rng.choices(PRODUCT_WORDS, k=rng.randint(3, 25)))]
+        roll = rng.random()
+        if roll < 0.75:
+            separator = rng.choice([' ', ': ', ':', '. ', ' - ', '\n'])
+            parts.append(f'{rng.choice(KEYWORD_VARIANTS)}{separator}{random_date(rng)}')
+        elif roll < 0.9:
+            parts.append(random_date(rng))  # Date without a keyword
+        if rng.random() < 0.3:
+            parts.append(f'LOT {rng.randint(10000, 99999)} PACKED {random_date(rng)}')
+        rng.shuffle(parts)
+        transcripts.append(' '.join(parts))
+    return transcripts
+
+
+def load_transcripts(path: str) -> List[str]:
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+    values = data.values() if isinstance(data, dict) else data
+    return ['\n'.join(value) if isinstance(value, list) else value for value in values]
+
+
+def time_call(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run func repeat times and return median and best wall time in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': statistics.median(samples), 'best_ms': min(samples)}
+
+
+def run(transcripts: List[str], repeat: int, show: int) -> None:
+    started = time.perf_counter()
+    matcher = DateTextMatcher()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    stages = {
+        'legacy correction': lambda: [legacy_correct(text) for text in transcripts],
+        'compiled correction': lambda: [matcher.correct(text) for text in transcripts],
+        'legacy date extraction': lambda: [legacy_find_date(text) for text in transcripts],
+        'compiled date extraction': lambda: [matcher.find_date(text) for text in transcripts],
+    }
+    print(f"{len(transcripts)} transcripts, matcher compiled in {compile_ms:.1f} ms\n")
+    print(f"{'stage':<28} {'median ms':>10} {'best ms':>10} {'us/text':>9}")
+    results = {}
+    for stage, func in stages.items():
+        results[stage] = time_call(func, repeat)
+        per_text = results[stage]['median_ms'] * 1000 / len(transcripts)
+        print(f"{stage:<28} {results[stage]['median_ms']:>10.2f} {results[stage]['best_ms']:>10.2f} {per_text:>9.1f}")
+    for task in ('correction', 'date extraction'):
+        speedup = results[f'legacy {task}']['median_ms'] / results[f'compiled {task}']['median_ms']
+        print(f"{task} speed-up: {speedup:.1f}x")
+
+    corrected_differ = [text for text in transcripts if legacy_correct(text) != matcher.correct(text)]
+    dates_differ = [text for text in transcripts if legacy_find_date(text) != matcher.find_date(text)]
+    print(f"\ncorrected text agrees: {len(transcripts) - len(corrected_differ)}/{len(transcripts)}")
+    print(f"dates agree:           {len(transcripts) - len(dates_differ)}/{len(transcripts)}")
+    for text in dates_differ[:show]:
+        print(f"  {text!r}: legacy {legacy_find_date(text)}, compiled {matcher.find_date(text)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark OCR text correction and date matching')
+    parser.add_argument('--count', type=int, default=2000, help='Synthetic transcripts to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic transcripts')
+    parser.add_argument('--transcripts', help='JSON list of transcripts, or a fake-backend transcripts file')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage')
+    parser.add_argument('--show', type=int, default=10, help='Date disagreements to print')
+    args = parser.parse_args()
+    transcripts = load_transcripts(args.transcripts) if args.transcripts else build_transcripts(args.count, args.seed)
+    run(transcripts, args.repeat, args.show)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Report Metrics Benchmark for Expiry Tracker
+
+Times the vectorised report metrics kernel (app/services/report_metrics.py)
+and the report sections built from it on synthetic inventories. A per-item
+reference pass (risk score and expiry bucket scans through the Item
+properties, as the report used to do) is timed alongside for comparison.
+
+No database is needed; items are built in memory.
+
+Usage:
+    python scripts/benchmarks/report_metrics_benchmark.py
+    python scripts/benchmarks/report_metrics_benchmark.py --sizes 10000 100000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from flask import Flask
+from app.models.item import Item, STATUS_ACTIVE, STATUS_EXPIRED, STATUS_EXPIRING_SOON, STATUS_PENDING
+from app.services.report_metrics import ReportMetrics
+from app.services.report_service import ReportService
+
+
+def build_items(count: int, seed: int = 42) -> List[Item]:
+    """Create a synthetic inventory with a realistic spread of expiry dates."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    items = []
+    for index in range(count):
+        days = None if rng.random() < 0.05 else rng.randint(-60, 730)
+        if days is None:
+            status = STATUS_PENDING
+        elif days < 0:
+            status = STATUS_EXPIRED
+        elif days <= 7:
+            status = STATUS_EXPIRING_SOON
+        else:
+            status = STATUS_ACTIVE
+        item = Item(
+            name=f'Item {index}',
+            quantity=rng.choice([0, 2, 5, 8, 12, 25, 60, 150, 400]),
+            cost_price=round(rng.uniform(0.5, 80), 2),
+            unit='pcs',
+            location='Store',
+            batch_number=f'B{index:06d}',
+            expiry_date=now + timedelta(days=days) if days is not None else None,
+            status=status
+        )
+        item.id = index + 1
+        items.append(item)
+    return items
+
+
+def per_item_reference(service: ReportService, items: List[Item]) -> None:
+    """The scalar pass the kernel replaces: property calls per item per scan."""
+    [service._calculate_risk_score(item) for item in items]
+    for low, high in ((8, 30), (31, 90), (91, 365)):
+        [item for item in items if item.days_until_expiry is not None and low <= item.days_until_expiry <= high]
+    sum((item.quantity or 0) * (item.cost_price or 0) for item in items)
+
+
+def time_call(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run func repeat times and return median and best wall time in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': statistics.median(samples), 'best_ms': min(samples)}
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    app = Flask(__name__)
+    service = ReportService.__new__(ReportService)  # Sections don't need the activity service
+
+    print(f"{'items':>8}  {'stage':<32} {'median ms':>10} {'best ms':>10}")
+    with app.app_context():
+        app.logger.disabled = True
+        for size in sizes:
+            items = build_items(size)
+            kernel = ReportMetrics(items)
+            var_analysis = service._calculate_value_at_risk(items, kernel)
+
+            stages = {
+                'per-item reference': lambda: per_item_reference(service, items),
+                'kernel build': lambda: ReportMetrics(items),
+                'value at risk': lambda: service._calculate_value_at_risk(items, kernel),
+                'comprehensive expiry analysis': lambda: service._generate_comprehensive_expiry_analysis(items, kernel),
+                'action recommendations': lambda: service._generate_action_recommendations(items, {}, var_analysis, kernel),
+                'risk-sorted item details': lambda: kernel.ranked_details(),
+            }
+            for stage, func in stages.items():
+                result = time_call(func, repeat)
+                print(f"{size:>8}  {stage:<32} {result['median_ms']:>10.2f} {result['best_ms']:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the report metrics kernel')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Inventory sizes to test')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage')
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
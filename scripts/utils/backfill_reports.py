@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Script to repair stored reports offline.
+
+This script will:
+1. Find reports without detail data or without a schema version
+2. Rebuild missing detail data from each report's own summary columns
+3. Stamp pre-versioning reports with the current schema version
+4. Checkpoint progress so an interrupted run resumes where it stopped
+
+Reports are never regenerated from current items; a report stays a
+snapshot of the day it was generated.
+
+Usage:
+    python scripts/utils/backfill_reports.py
+    python scripts/utils/backfill_reports.py --batch-size 500 --workers 4
+"""
+
+import sys
+import os
+import argparse
+import logging
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import create_app
+from app.tasks.report_backfill import backfill_reports
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main function to handle command line arguments and run the backfill."""
+    parser = argparse.ArgumentParser(description='Repair stored reports offline')
+    parser.add_argument('--batch-size', type=int, help='Reports repaired per commit')
+    parser.add_argument('--shards', type=int, help='Id-range shards for a new run')
+    parser.add_argument('--workers', type=int, help='Shards processed concurrently')
+    args = parser.parse_args()
+    
+    app = create_app()
+    if args.batch_size:
+        app.config['REPORT_BACKFILL_BATCH_SIZE'] = args.batch_size
+    if args.shards:
+        app.config['REPORT_BACKFILL_SHARDS'] = args.shards
+    if args.workers:
+        app.config['REPORT_BACKFILL_WORKERS'] = args.workers
+    
+    with app.app_context():
+        try:
+            summary = backfill_reports()
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+    
+    print("\n" + "="*60)
+    print("REPORT BACKFILL SUMMARY")
+    print("="*60)
+    print(f"Reports needing repair: {summary['reports']}")
+    print(f"Shards done: {summary['done']}/{summary['shards']}")
+    print(f"Shards failed: {summary['failed']}")
+    
+    if summary['failed']:
+        print("\n❌ Some shards failed; run the script again to resume them.")
+        sys.exit(1)
+    print("\n✅ Report backfill completed successfully!")
+
+if __name__ == '__main__':
+    main()
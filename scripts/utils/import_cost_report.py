@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Script to report what each blueprint costs at application startup.
+
+This script will:
+1. Import the app package in a fresh interpreter with ``-X importtime``
+2. Rebuild the import tree from the timing lines
+3. Report the cumulative and own import time of every blueprint module
+4. List the heaviest third-party packages pulled in beneath each one
+
+A module is imported once per process, so a package shared by several
+blueprints is charged to the first one that imports it. Import order follows
+app/__init__.py and app/api/v1/__init__.py. Timings vary between runs; use
+--repeat to keep the fastest of several.
+
+Usage:
+    python scripts/utils/import_cost_report.py
+    python scripts/utils/import_cost_report.py --top 5 --repeat 3
+    python scripts/utils/import_cost_report.py --json
+"""
+
+import sys
+import os
+import argparse
+import json
+import subprocess
+import tempfile
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+BLUEPRINT_PACKAGES = ('app.routes', 'app.api.v1')  # Modules directly inside these define routes
+# Standard library modules are not reported as third-party imports (Python 3.10+)
+STDLIB_MODULES = frozenset(getattr(sys, 'stdlib_module_names', ()))
+
+
+class ImportNode:
+    """One module in the import tree, with times in microseconds."""
+
+    def __init__(self, name: str, depth: int, own_us: int, cumulative_us: int) -> None:
+        self.name = name
+        self.depth = depth
+        self.own_us = own_us
+        self.cumulative_us = cumulative_us
+        self.children: List['ImportNode'] = []
+
+    @property
+    def package(self) -> str:
+        return self.name.split('.', 1)[0]
+
+
+def run_importtime() -> str:
+    """Import the app in a child interpreter and return its -X importtime output."""
+    env = dict(os.environ)
+    # app.config refuses to load without these; their values do not matter for imports
+    for name in ('ZOHO_CLIENT_ID', 'ZOHO_CLIENT_SECRET', 'ZOHO_REDIRECT_URI'):
+        env.setdefault(name, 'import-cost-report')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+
+    # Settings open logs/ relative to the working directory, so import from a scratch one
+    with tempfile.TemporaryDirectory() as workdir:
+        os.mkdir(os.path.join(workdir, 'logs'))
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import app'],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{completed.stderr[-2000:]}")
+    return completed.stderr
+
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """Rebuild the import tree from -X importtime lines.
+
+    Lines are written when a module finishes importing, so children come
+    before their parent; the module name is indented two spaces per level.
+
+    Returns:
+        list: Top-level imports of the interpreter
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip(' ')
+        depth = (len(name) - len(stripped) - 1) // 2
+        node = ImportNode(stripped.strip(), depth, int(own), int(cumulative))
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def walk(nodes: List[ImportNode]):
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
+
+
+def heavy_packages(node: ImportNode, top: int) -> List[Dict[str, float]]:
+    """Third-party packages imported beneath a module, heaviest first.
+
+    A package is charged the cumulative time of the imports that entered
+    it from application or standard library code, which includes whatever
+    it imports in turn; figures therefore add up without double counting.
+    """
+    totals: Dict[str, int] = {}
+
+    def visit(current: ImportNode) -> None:
+        for child in current.children:
+            package = child.package
+            if package != 'app' and package.lstrip('_') not in STDLIB_MODULES:
+                totals[package] = totals.get(package, 0) + child.cumulative_us
+            else:
+                visit(child)
+
+    visit(node)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{'package': package, 'ms': round(us / 1000, 1)} for package, us in ranked]
+
+
+def build_report(roots: List[ImportNode], top: int) -> Dict:
+    nodes = list(walk(roots))
+    app_node = next((node for node in nodes if node.name == 'app'), None)
+    if app_node is None:
+        raise RuntimeError("No timing line for the app package")
+
+    blueprints = []
+    for node in walk([app_node]):
+        if node.name.rpartition('.')[0] in BLUEPRINT_PACKAGES:
+            blueprints.append({
+                'module': node.name,
+                'cumulative_ms': round(node.cumulative_us / 1000, 1),
+                'self_ms': round(node.own_us / 1000, 1),
+                'heavy_imports': heavy_packages(node, top),
+            })
+    blueprints.sort(key=lambda entry: entry['cumulative_ms'], reverse=True)
+    return {
+        'app_import_ms': round(app_node.cumulative_us / 1000, 1),
+        'blueprints': blueprints,
+        'app_heavy_imports': heavy_packages(app_node, top),
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"import app: {report['app_import_ms']:.1f} ms\n")
+    print(f"{'blueprint module':<32} {'cumulative ms':>14} {'self ms':>9}  heaviest imports")
+    for entry in report['blueprints']:
+        heavy = ', '.join(f"{item['package']} {item['ms']:.1f}" for item in entry['heavy_imports']) or '-'
+        print(f"{entry['module']:<32} {entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {heavy}")
+    print('\nheaviest third-party imports overall:')
+    for item in report['app_heavy_imports']:
+        print(f"  {item['package']:<24} {item['ms']:>8.1f} ms")
+
+
+def main():
+    """Main function to handle command line arguments and print the report."""
+    parser = argparse.ArgumentParser(description='Report the import cost of each blueprint at startup')
+    parser.add_argument('--top', type=int, default=3, help='Third-party packages to list per module')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs to take the fastest app import from')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    reports = [build_report(parse_importtime(run_importtime()), args.top) for _ in range(max(1, args.repeat))]
+    report = min(reports, key=lambda entry: entry['app_import_ms'])
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Outbound email queue: enqueueing, claiming, retrying and recovering rows."""
+import smtplib
+from datetime import datetime, timedelta
+import pytest
+from flask_mail import Connection
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from app.core.extensions import db, mail
+from app.models import User
+from app.models.outbound_email import OutboundEmail, EMAIL_QUEUED, EMAIL_SENDING, EMAIL_SENT, EMAIL_FAILED
+from app.services.email_queue import email_queue
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = create_app('testing')
+    # Rows are drained explicitly with drain_once, never by background threads
+    monkeypatch.setattr(email_queue, '_ensure_workers', lambda: None)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='queued', email='queued@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _enqueue(subject='Subject', recipients=('someone@example.com',)):
+    return email_queue.enqueue(
+        subject=subject,
+        recipients=list(recipients),
+        html='<p>Hello</p>',
+        sender='sender@example.com',
+        template='test'
+    )
+
+
+def test_enqueue_does_not_commit_caller_changes(user):
+    user.verification_code = '123456'
+
+    email_id = _enqueue()
+
+    assert user in db.session.dirty
+    queued = db.session.get(OutboundEmail, email_id)
+    assert queued.status == EMAIL_QUEUED
+    assert queued.recipients == ['someone@example.com']
+
+
+def test_failed_enqueue_keeps_caller_changes(user):
+    user.verification_code = '654321'
+
+    with pytest.raises(IntegrityError):
+        _enqueue(subject=None)
+
+    assert user in db.session.dirty
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(User, user.id).verification_code == '654321'
+    assert OutboundEmail.query.count() == 0
+
+
+def _statuses():
+    db.session.expire_all()
+    return [email.status for email in OutboundEmail.query.order_by(OutboundEmail.id)]
+
+
+def test_drain_sends_claimed_batch(app):
+    ids = [_enqueue(subject=f'Message {index}') for index in range(3)]
+
+    with mail.record_messages() as outbox:
+        assert email_queue.drain_once() == 3
+
+    assert [message.subject for message in outbox] == ['Message 0', 'Message 1', 'Message 2']
+    assert _statuses() == [EMAIL_SENT] * 3
+    assert all(db.session.get(OutboundEmail, email_id).claim_token is None for email_id in ids)
+    assert email_queue.drain_once() == 0
+
+
+def test_transient_failure_requeues_with_backoff(app, monkeypatch):
+    first, second = _enqueue(subject='First'), _enqueue(subject='Second')
+    send = Connection.send
+
+    def disconnect(self, message, envelope_from=None):
+        raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+    monkeypatch.setattr(Connection, 'send', disconnect)
+    assert email_queue.drain_once() == 2
+
+    failed = db.session.get(OutboundEmail, first)
+    assert failed.status == EMAIL_QUEUED
+    assert failed.attempts == 1
+    assert failed.next_attempt_at > datetime.utcnow()
+    assert 'SMTPServerDisconnected' in failed.last_error
+    # The rest of the batch is handed back without counting an attempt
+    released = db.session.get(OutboundEmail, second)
+    assert (released.status, released.attempts, released.claim_token) == (EMAIL_QUEUED, 0, None)
+
+    monkeypatch.setattr(Connection, 'send', send)
+    with mail.record_messages() as outbox:
+        assert email_queue.drain_once() == 1  # The failed row waits for its backoff
+    assert [message.subject for message in outbox] == ['Second']
+
+
+def test_permanent_failure_is_not_retried(app, monkeypatch):
+    email_id = _enqueue()
+
+    def reject(self, message, envelope_from=None):
+        raise smtplib.SMTPRecipientsRefused({'someone@example.com': (550, b'No such user')})
+
+    monkeypatch.setattr(Connection, 'send', reject)
+    email_queue.drain_once()
+
+    email = db.session.get(OutboundEmail, email_id)
+    assert (email.status, email.attempts) == (EMAIL_FAILED, 1)
+
+
+def test_stale_claim_is_recovered(app):
+    email_id = _enqueue()
+    timeout = app.config['EMAIL_QUEUE_CLAIM_TIMEOUT']
+    OutboundEmail.query.filter_by(id=email_id).update({
+        'status': EMAIL_SENDING,
+        'claim_token': 'worker-that-died',
+        'claimed_at': datetime.utcnow() - timedelta(seconds=timeout + 1)
+    })
+    db.session.commit()
+
+    with mail.record_messages() as outbox:
+        assert email_queue.drain_once() == 1
+    assert len(outbox) == 1
+    assert _statuses() == [EMAIL_SENT]
+
+
+def test_fresh_claim_is_left_alone(app):
+    email_id = _enqueue()
+    OutboundEmail.query.filter_by(id=email_id).update({
+        'status': EMAIL_SENDING, 'claim_token': 'busy-worker', 'claimed_at': datetime.utcnow()
+    })
+    db.session.commit()
+
+    assert email_queue.drain_once() == 0
+    assert _statuses() == [EMAIL_SENDING]
@@ -0,0 +1,95 @@
+"""Item change log: incremental report aggregates must match a full rebuild."""
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from app.core.extensions import db
+from app.models import InventoryAggregateState, Item, User
+from app.services.report_aggregate_service import ReportAggregateService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def users(app):
+    first = User(username='first', email='first@example.com')
+    second = User(username='second', email='second@example.com')
+    db.session.add_all([first, second])
+    db.session.commit()
+    return first, second
+
+
+def _sorted_rows(rows):
+    return sorted(rows, key=lambda row: (row[0] or '', row[1] or 0, row[2], row[3]))
+
+
+def _assert_matches_rebuild(service, user_id):
+    refreshed = _sorted_rows(service.refresh(user_id))
+    db.session.commit()
+    state = InventoryAggregateState.query.filter_by(user_id=user_id).one()
+    rebuilt = _sorted_rows(service.rebuild(user_id, state=state))
+    db.session.commit()
+    assert [row[:5] for row in refreshed] == [row[:5] for row in rebuilt]
+    for row, expected in zip(refreshed, rebuilt):
+        assert row[5:] == pytest.approx(expected[5:])
+
+
+def _stock(user_id, count):
+    today = datetime.utcnow()
+    items = [
+        Item(
+            name=f'item-{user_id}-{index}', user_id=user_id, quantity=float(index + 1),
+            cost_price=2.5, expiry_date=today + timedelta(days=index * 3),
+            status='Active' if index % 2 else 'Pending Expiry Date'
+        )
+        for index in range(count)
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def _prime(service, *user_ids):
+    """Build the aggregates, so later changes are applied incrementally."""
+    for user_id in user_ids:
+        service.rebuild(user_id)
+    db.session.commit()
+
+
+def test_moving_loaded_item_updates_both_owners(users):
+    first, second = users
+    items = _stock(first.id, 6)
+    _stock(second.id, 3)
+    service = ReportAggregateService()
+    _prime(service, first.id, second.id)
+
+    item = db.session.get(Item, items[2].id)
+    item.name  # Load the instance so its previous values are known
+    item.user_id = second.id
+    db.session.commit()
+
+    _assert_matches_rebuild(service, first.id)
+    _assert_matches_rebuild(service, second.id)
+
+
+def test_moving_expired_item_updates_both_owners(users):
+    first, second = users
+    items = _stock(first.id, 6)
+    _stock(second.id, 3)
+    service = ReportAggregateService()
+    _prime(service, first.id, second.id)
+
+    item = items[3]
+    db.session.expire(item)
+    item.user_id = second.id
+    item.quantity = 40.0
+    db.session.commit()
+
+    _assert_matches_rebuild(service, first.id)
+    _assert_matches_rebuild(service, second.id)
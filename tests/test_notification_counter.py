@@ -0,0 +1,90 @@
+"""Notification counters: cached badge counts must match the notifications table."""
+import pytest
+from app import create_app
+from app.core.extensions import db
+from app.models import Notification, NotificationCounter, User
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='counted', email='counted@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _notify(service, user_id, message, status):
+    assert service.create_notification(user_id, None, message, 'email', status=status) is not None
+
+
+def _aggregate(user_id):
+    return {
+        status: Notification.query.filter_by(user_id=user_id, type='email', status=status).count()
+        for status in ('pending', 'sent')
+    }
+
+
+def _assert_counter_matches(service, user_id):
+    db.session.expire_all()
+    stats = service.get_notification_stats(user_id)
+    expected = _aggregate(user_id)
+    assert (stats['pending'], stats['sent']) == (expected['pending'], expected['sent'])
+
+
+def test_notification_created_while_seeding_is_counted(user, monkeypatch):
+    service = NotificationService()
+    _notify(service, user.id, 'first', 'pending')
+    original_seed = NotificationCounter.seed.__func__
+
+    def seed_after_concurrent_write(cls, *args, **kwargs):
+        # Another request commits a notification before the row exists; its adjust finds nothing
+        _notify(service, user.id, 'concurrent', 'pending')
+        return original_seed(cls, *args, **kwargs)
+
+    monkeypatch.setattr(NotificationCounter, 'seed', classmethod(seed_after_concurrent_write))
+    service.get_notification_stats(user.id)
+    monkeypatch.undo()
+
+    assert db.session.get(NotificationCounter, user.id) is not None
+    _assert_counter_matches(service, user.id)
+
+
+def test_counter_follows_writes_after_seeding(user):
+    service = NotificationService()
+    _notify(service, user.id, 'before seeding', 'pending')
+    _assert_counter_matches(service, user.id)
+
+    _notify(service, user.id, 'pending', 'pending')
+    _notify(service, user.id, 'sent', 'sent')
+    _assert_counter_matches(service, user.id)
+
+    Notification.query.filter_by(message='pending').one().mark_as_read()
+    _assert_counter_matches(service, user.id)
+
+    _notify(service, user.id, 'another', 'pending')
+    assert service.mark_all_notifications_read(user.id) == 2
+    _assert_counter_matches(service, user.id)
+    assert service.get_unread_count(user.id) == 0
+
+
+def test_invalidated_counter_is_rebuilt(user):
+    service = NotificationService()
+    _notify(service, user.id, 'one', 'pending')
+    _assert_counter_matches(service, user.id)
+
+    NotificationCounter.invalidate(user.id)
+    db.session.commit()
+    _notify(service, user.id, 'two', 'sent')
+
+    assert db.session.get(NotificationCounter, user.id) is None
+    _assert_counter_matches(service, user.id)
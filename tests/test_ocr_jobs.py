@@ -0,0 +1,109 @@
+"""OCR job queue: claiming, recovering and finishing jobs."""
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from app.core.extensions import db
+from app.models.ocr_job import OCRJob, OCR_JOB_QUEUED, OCR_JOB_PROCESSING, OCR_JOB_DONE, OCR_JOB_FAILED
+from app.services.date_ocr_service import DateOCRService
+from app.services.ocr_backends import FakeOCRBackend
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_jobs import ocr_jobs
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = create_app('testing', OCR_JOBS_ENABLED=True, OCR_JOBS_MAX_QUEUED=2)
+    # Jobs are processed explicitly with process_once, never by background threads
+    monkeypatch.setattr(ocr_jobs, '_ensure_workers', lambda: None)
+    monkeypatch.setattr(ocr_jobs, 'service', DateOCRService(FakeOCRBackend(default='EXP 31/12/2025')))
+    ocr_cache.clear()
+    with app.app_context():
+        yield app
+        ocr_cache.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+def _job(token):
+    db.session.expire_all()
+    return OCRJob.query.filter_by(token=token).one()
+
+
+def _claim_expired(token, attempts):
+    timeout = ocr_jobs._config('OCR_JOBS_CLAIM_TIMEOUT', 300)
+    OCRJob.query.filter_by(token=token).update({
+        'status': OCR_JOB_PROCESSING,
+        'claim_token': 'worker-that-died',
+        'claimed_at': datetime.utcnow() - timedelta(seconds=timeout + 1),
+        'attempts': attempts
+    })
+    db.session.commit()
+
+
+def test_submitted_job_is_processed(app):
+    token = ocr_jobs.submit(b'label photo', 'label.jpg').token
+    assert _job(token).status == OCR_JOB_QUEUED
+
+    assert ocr_jobs.process_once() is True
+
+    job = _job(token)
+    assert (job.status, job.date, job.attempts, job.claim_token) == (OCR_JOB_DONE, '2025-12-31', 1, None)
+    assert job.image is None
+    assert ocr_jobs.process_once() is False
+
+
+def test_full_queue_rejects_submissions(app):
+    ocr_jobs.submit(b'first')
+    ocr_jobs.submit(b'second')
+
+    with pytest.raises(RuntimeError):
+        ocr_jobs.submit(b'third')
+
+
+def test_expired_claim_is_requeued(app):
+    token = ocr_jobs.submit(b'label photo').token
+    _claim_expired(token, attempts=1)
+
+    assert ocr_jobs.process_once() is True
+
+    job = _job(token)
+    assert (job.status, job.attempts) == (OCR_JOB_DONE, 2)
+
+
+def test_job_that_keeps_failing_is_given_up(app):
+    token = ocr_jobs.submit(b'label photo').token
+    _claim_expired(token, attempts=app.config['OCR_JOBS_MAX_ATTEMPTS'])
+
+    assert ocr_jobs.process_once() is False
+
+    job = _job(token)
+    assert job.status == OCR_JOB_FAILED
+    assert 'did not finish' in job.error
+
+
+def test_fresh_claim_is_left_alone(app):
+    token = ocr_jobs.submit(b'label photo').token
+    OCRJob.query.filter_by(token=token).update({
+        'status': OCR_JOB_PROCESSING, 'claim_token': 'busy-worker', 'claimed_at': datetime.utcnow(), 'attempts': 1
+    })
+    db.session.commit()
+
+    assert ocr_jobs.process_once() is False
+    assert _job(token).status == OCR_JOB_PROCESSING
+
+
+def test_result_of_a_lost_claim_is_discarded(app, monkeypatch):
+    token = ocr_jobs.submit(b'label photo').token
+    extract = ocr_jobs.service.extract
+
+    def extract_after_claim_expired(image_data):
+        # Another worker reclaims the job while this one is still reading it
+        OCRJob.query.filter_by(token=token).update({'claim_token': 'other-worker'}, synchronize_session=False)
+        db.session.commit()
+        return extract(image_data)
+
+    monkeypatch.setattr(ocr_jobs.service, 'extract', extract_after_claim_expired)
+    ocr_jobs.process_once()
+
+    job = _job(token)
+    assert (job.status, job.claim_token, job.date) == (OCR_JOB_PROCESSING, 'other-worker', None)
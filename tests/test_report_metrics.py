@@ -0,0 +1,89 @@
+"""Incremental report metrics must list the same items as the grouped query."""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import event
+from app import create_app
+from app.core.extensions import db
+from app.models import Item, User
+from app.models.item import STATUS_ACTIVE, STATUS_EXPIRED, STATUS_EXPIRING_SOON
+from app.services.report_aggregate_service import ReportAggregateService
+from app.services.report_metrics import GroupedReportMetrics, IncrementalReportMetrics
+
+DETAIL_LIMIT = 3
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='reporter', email='reporter@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _stock(user_id):
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    statuses = (STATUS_ACTIVE, STATUS_EXPIRING_SOON, STATUS_EXPIRED)
+    items = []
+    for index in range(150):
+        # Groups span several expiry days with many items each, so the limit cuts ranges short
+        expiry = None if index % 13 == 0 else today + timedelta(days=(index % 7) * 5 - 15)
+        items.append(Item(
+            name=f'item-{index}', user_id=user_id, status=statuses[index % 3],
+            quantity=float(index % 2 * 6 + 1), cost_price=2.0 if index % 10 else 300.0, expiry_date=expiry
+        ))
+    db.session.add_all(items)
+    db.session.commit()
+
+
+def _kernels(user_id):
+    today = datetime.utcnow().date()
+    aggregates = ReportAggregateService().refresh(user_id)
+    db.session.commit()
+    grouped = GroupedReportMetrics(user_id, today, DETAIL_LIMIT)
+    incremental = IncrementalReportMetrics(user_id, aggregates, today, DETAIL_LIMIT)
+    return grouped, incremental
+
+
+def test_incremental_details_match_grouped_query(user):
+    _stock(user.id)
+    grouped, incremental = _kernels(user.id)
+
+    assert incremental.ranked_details() == grouped.ranked_details()
+    for mask_name in ('expired', 'expiring_soon', 'active', 'low_stock', 'high_value'):
+        assert incremental.details(getattr(incremental, mask_name)) == grouped.details(getattr(grouped, mask_name))
+    assert incremental.details(incremental.days_between(0, 7)) == grouped.details(grouped.days_between(0, 7))
+    assert incremental.count() == grouped.count()
+    assert incremental.total_value() == pytest.approx(grouped.total_value())
+
+
+def test_incremental_details_read_only_listed_items(user):
+    _stock(user.id)
+    aggregates = ReportAggregateService().refresh(user.id)
+    db.session.commit()
+    assert max(row[4] for row in aggregates) > DETAIL_LIMIT
+
+    statements = []
+    user_id, today = user.id, datetime.utcnow().date()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        incremental = IncrementalReportMetrics(user_id, aggregates, today, DETAIL_LIMIT)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    # One LIMITed query per group, and no window function over the whole inventory
+    assert len(statements) == len(incremental.weight)
+    assert all('LIMIT' in statement and 'row_number' not in statement.lower() for statement in statements)
+    listed = sum(len(details) for details in incremental._group_details.values())
+    assert listed <= DETAIL_LIMIT * len(incremental.weight)
+    assert listed == sum(min(int(count), DETAIL_LIMIT) for count in np.asarray(incremental.weight))
@@ -0,0 +1,82 @@
+"""Shared report pages: cached per worker, but never served once revoked."""
+from datetime import date
+import pytest
+from app import create_app
+from app.core.extensions import db
+from app.models import User
+from app.models.report import Report
+from app.services.public_report_cache import public_report_cache
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    public_report_cache.clear()
+    with app.app_context():
+        yield app
+        public_report_cache.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def report(app):
+    user = User(username='sharer', email='sharer@example.com')
+    db.session.add(user)
+    db.session.commit()
+    report = Report(user_id=user.id, date=date(2026, 1, 5), public_token='shared-token', is_public=True)
+    db.session.add(report)
+    db.session.commit()
+    return report
+
+
+def _revoke_elsewhere(report_id, **values):
+    """Change the share the way another worker process would, leaving this cache alone."""
+    Report.query.filter_by(id=report_id).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def test_shared_page_is_cached_and_revalidated(app, report):
+    client = app.test_client()
+
+    first = client.get('/reports/shared/shared-token')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] in ('public, no-cache', 'no-cache, public')
+    assert public_report_cache.get('shared-token', report.updated_at) is not None
+
+    etag = first.headers['ETag']
+    second = client.get('/reports/shared/shared-token', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+
+
+def test_revoked_share_is_not_served_from_cache(app, report):
+    client = app.test_client()
+    assert client.get('/reports/shared/shared-token').status_code == 200
+
+    _revoke_elsewhere(report.id, is_public=False)
+
+    assert client.get('/reports/shared/shared-token').status_code == 404
+
+
+def test_deleted_report_is_not_served_from_cache(app, report):
+    client = app.test_client()
+    assert client.get('/reports/shared/shared-token').status_code == 200
+
+    db.session.execute(db.delete(Report).where(Report.id == report.id))
+    db.session.commit()
+
+    assert client.get('/reports/shared/shared-token').status_code == 404
+
+
+def test_reshared_report_is_rendered_again(app, report):
+    client = app.test_client()
+    assert client.get('/reports/shared/shared-token').status_code == 200
+    version = report.updated_at
+
+    _revoke_elsewhere(report.id, is_public=False)
+    _revoke_elsewhere(report.id, is_public=True)
+    db.session.expire_all()
+
+    assert client.get('/reports/shared/shared-token').status_code == 200
+    assert db.session.get(Report, report.id).updated_at != version
+    assert public_report_cache.get('shared-token', version) is None